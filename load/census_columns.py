@@ -0,0 +1,281 @@
+# JURISDICTION_DIM column -> census.csv (censusreporter) column, as mapped
+# by the LoadCensus.ktr table output. All of them are INTEGER columns.
+CENSUS_COLUMNS = [
+    ('TOTAL_POP', 'B01001001'),
+    ('MALE_POP', 'B01001002'),
+    ('MALEUNDER_5_YEARS', 'B01001003'),
+    ('MALE5_TO_9_YEARS', 'B01001004'),
+    ('MALE10_TO_14_YEARS', 'B01001005'),
+    ('MALE15_TO_17_YEARS', 'B01001006'),
+    ('MALE18_AND_19_YEARS', 'B01001007'),
+    ('MALE20_YEARS', 'B01001008'),
+    ('MALE21_YEARS', 'B01001009'),
+    ('MALE22_TO_24_YEARS', 'B01001010'),
+    ('MALE25_TO_29_YEARS', 'B01001011'),
+    ('MALE30_TO_34_YEARS', 'B01001012'),
+    ('MALE35_TO_39_YEARS', 'B01001013'),
+    ('MALE40_TO_44_YEARS', 'B01001014'),
+    ('MALE45_TO_49_YEARS', 'B01001015'),
+    ('MALE50_TO_54_YEARS', 'B01001016'),
+    ('MALE55_TO_59_YEARS', 'B01001017'),
+    ('MALE60_AND_61_YEARS', 'B01001018'),
+    ('MALE62_TO_64_YEARS', 'B01001019'),
+    ('MALE65_AND_66_YEARS', 'B01001020'),
+    ('MALE67_TO_69_YEARS', 'B01001021'),
+    ('MALE70_TO_74_YEARS', 'B01001022'),
+    ('MALE75_TO_79_YEARS', 'B01001023'),
+    ('MALE80_TO_84_YEARS', 'B01001024'),
+    ('MALE85_YEARS_AND_OVER', 'B01001025'),
+    ('FEMALE_POP', 'B01001026'),
+    ('FEMALEUNDER_5_YEARS', 'B01001027'),
+    ('FEMALE5_TO_9_YEARS', 'B01001028'),
+    ('FEMALE10_TO_14_YEARS', 'B01001029'),
+    ('FEMALE15_TO_17_YEARS', 'B01001030'),
+    ('FEMALE18_AND_19_YEARS', 'B01001031'),
+    ('FEMALE20_YEARS', 'B01001032'),
+    ('FEMALE21_YEARS', 'B01001033'),
+    ('FEMALE22_TO_24_YEARS', 'B01001034'),
+    ('FEMALE25_TO_29_YEARS', 'B01001035'),
+    ('FEMALE30_TO_34_YEARS', 'B01001036'),
+    ('FEMALE35_TO_39_YEARS', 'B01001037'),
+    ('FEMALE40_TO_44_YEARS', 'B01001038'),
+    ('FEMALE45_TO_49_YEARS', 'B01001039'),
+    ('FEMALE50_TO_54_YEARS', 'B01001040'),
+    ('FEMALE55_TO_59_YEARS', 'B01001041'),
+    ('FEMALE60_AND_61_YEARS', 'B01001042'),
+    ('FEMALE62_TO_64_YEARS', 'B01001043'),
+    ('FEMALE65_AND_66_YEARS', 'B01001044'),
+    ('FEMALE67_TO_69_YEARS', 'B01001045'),
+    ('FEMALE70_TO_74_YEARS', 'B01001046'),
+    ('FEMALE75_TO_79_YEARS', 'B01001047'),
+    ('FEMALE80_TO_84_YEARS', 'B01001048'),
+    ('FEMALE85_YEARS_AND_OVER', 'B01001049'),
+    ('NOT_HISPANIC_OR_LATINO', 'B03002002'),
+    ('NOT_HISPANIC_OR_LATINOWHITE_ALONE', 'B03002003'),
+    ('NOT_HISPANIC_OR_LATINOBLACK_OR_AFRICAN_AMERICAN_ALONE', 'B03002004'),
+    ('NOT_HISPANIC_OR_LATINOAMERICAN_INDIAN_AND_ALASKA_NATIVE_ALONE', 'B03002005'),
+    ('NOT_HISPANIC_OR_LATINOASIAN_ALONE', 'B03002006'),
+    ('NOT_HISPANIC_OR_LATINONATIVE_HAWAIIAN_AND_OTHER_PACIFIC_ISLANDE', 'B03002007'),
+    ('NOT_HISPANIC_OR_LATINOSOME_OTHER_RACE_ALONE', 'B03002008'),
+    ('NOT_HISPANIC_OR_LATINOTWO_OR_MORE_RACES', 'B03002009'),
+    ('NOT_HISPANIC_OR_LATINOTWO_OR_MORE_RACESTWO_RACES_INCLUDING_SOME', 'B03002010'),
+    ('NOT_HISPANIC_OR_LATINOTWO_OR_MORE_RACESTWO_RACES_EXCLUDING_SOME', 'B03002011'),
+    ('HISPANIC_OR_LATINO', 'B03002012'),
+    ('HISPANIC_OR_LATINOWHITE_ALONE', 'B03002013'),
+    ('HISPANIC_OR_LATINOBLACK_OR_AFRICAN_AMERICAN_ALONE', 'B03002014'),
+    ('HISPANIC_OR_LATINOAMERICAN_INDIAN_AND_ALASKA_NATIVE_ALONE', 'B03002015'),
+    ('HISPANIC_OR_LATINOASIAN_ALONE', 'B03002016'),
+    ('HISPANIC_OR_LATINONATIVE_HAWAIIAN_AND_OTHER_PACIFIC_ISLANDER_AL', 'B03002017'),
+    ('HISPANIC_OR_LATINOSOME_OTHER_RACE_ALONE', 'B03002018'),
+    ('HISPANIC_OR_LATINOTWO_OR_MORE_RACES', 'B03002019'),
+    ('HISPANIC_OR_LATINOTWO_OR_MORE_RACESTWO_RACES_INCLUDING_SOME_OTH', 'B03002020'),
+    ('HISPANIC_OR_LATINOTWO_OR_MORE_RACESTWO_RACES_EXCLUDING_SOME_OTH', 'B03002021'),
+    ('NEVER_MARRIED', 'B06008002'),
+    ('NOW_MARRIED_EXCEPT_SEPARATED', 'B06008003'),
+    ('DIVORCED', 'B06008004'),
+    ('SEPARATED', 'B06008005'),
+    ('WIDOWED', 'B06008006'),
+    ('BORN_IN_STATE_OF_RESIDENCE', 'B06008007'),
+    ('BORN_IN_STATE_OF_RESIDENCENEVER_MARRIED', 'B06008008'),
+    ('BORN_IN_STATE_OF_RESIDENCENOW_MARRIED_EXCEPT_SEPARATED', 'B06008009'),
+    ('BORN_IN_STATE_OF_RESIDENCEDIVORCED', 'B06008010'),
+    ('BORN_IN_STATE_OF_RESIDENCESEPARATED', 'B06008011'),
+    ('BORN_IN_STATE_OF_RESIDENCEWIDOWED', 'B06008012'),
+    ('BORN_IN_OTHER_STATE_IN_THE_UNITED_STATES', 'B06008013'),
+    ('BORN_IN_OTHER_STATE_IN_THE_UNITED_STATESNEVER_MARRIED', 'B06008014'),
+    ('BORN_IN_OTHER_STATE_IN_THE_UNITED_STATESNOW_MARRIED_EXCEPT_SEPA', 'B06008015'),
+    ('BORN_IN_OTHER_STATE_IN_THE_UNITED_STATESDIVORCED', 'B06008016'),
+    ('BORN_IN_OTHER_STATE_IN_THE_UNITED_STATESSEPARATED', 'B06008017'),
+    ('BORN_IN_OTHER_STATE_IN_THE_UNITED_STATESWIDOWED', 'B06008018'),
+    ('NATIVE_BORN_OUTSIDE_THE_UNITED_STATES', 'B06008019'),
+    ('NATIVE_BORN_OUTSIDE_THE_UNITED_STATESNEVER_MARRIED', 'B06008020'),
+    ('NATIVE_BORN_OUTSIDE_THE_UNITED_STATESNOW_MARRIED_EXCEPT_SEPARAT', 'B06008021'),
+    ('NATIVE_BORN_OUTSIDE_THE_UNITED_STATESDIVORCED', 'B06008022'),
+    ('NATIVE_BORN_OUTSIDE_THE_UNITED_STATESSEPARATED', 'B06008023'),
+    ('NATIVE_BORN_OUTSIDE_THE_UNITED_STATESWIDOWED', 'B06008024'),
+    ('FOREIGN_BORN', 'B06008025'),
+    ('FOREIGN_BORNNEVER_MARRIED', 'B06008026'),
+    ('FOREIGN_BORNNOW_MARRIED_EXCEPT_SEPARATED', 'B06008027'),
+    ('FOREIGN_BORNDIVORCED', 'B06008028'),
+    ('FOREIGN_BORNSEPARATED', 'B06008029'),
+    ('FOREIGN_BORNWIDOWED', 'B06008030'),
+    ('INCOME_LESS_THAN_10000', 'B19001002'),
+    ('INCOME_10000_TO_14999', 'B19001003'),
+    ('INCOME_15000_TO_19999', 'B19001004'),
+    ('INCOME_20000_TO_24999', 'B19001005'),
+    ('INCOME_25000_TO_29999', 'B19001006'),
+    ('INCOME_30000_TO_34999', 'B19001007'),
+    ('INCOME_35000_TO_39999', 'B19001008'),
+    ('INCOME_40000_TO_44999', 'B19001009'),
+    ('INCOME_45000_TO_49999', 'B19001010'),
+    ('INCOME_50000_TO_59999', 'B19001011'),
+    ('INCOME_60000_TO_74999', 'B19001012'),
+    ('INCOME_75000_TO_99999', 'B19001013'),
+    ('INCOME_100000_TO_124999', 'B19001014'),
+    ('INCOME_125000_TO_149999', 'B19001015'),
+    ('INCOME_150000_TO_199999', 'B19001016'),
+    ('INCOME_200000_OR_MORE', 'B19001017'),
+    ('MALE16_TO_19_YEARS', 'B23001003'),
+    ('MALE16_TO_19_YEARSIN_LABOR_FORCE', 'B23001004'),
+    ('MALE16_TO_19_YEARSIN_LABOR_FORCEIN_ARMED_FORCES', 'B23001005'),
+    ('MALE16_TO_19_YEARSIN_LABOR_FORCECIVILIAN', 'B23001006'),
+    ('MALE16_TO_19_YEARSIN_LABOR_FORCECIVILIANEMPLOYED', 'B23001007'),
+    ('MALE16_TO_19_YEARSIN_LABOR_FORCECIVILIANUNEMPLOYED', 'B23001008'),
+    ('MALE16_TO_19_YEARSNOT_IN_LABOR_FORCE', 'B23001009'),
+    ('MALE20_AND_21_YEARSIN_LABOR_FORCE', 'B23001011'),
+    ('MALE20_AND_21_YEARSIN_LABOR_FORCEIN_ARMED_FORCES', 'B23001012'),
+    ('MALE20_AND_21_YEARSIN_LABOR_FORCECIVILIAN', 'B23001013'),
+    ('MALE20_AND_21_YEARSIN_LABOR_FORCECIVILIANEMPLOYED', 'B23001014'),
+    ('MALE20_AND_21_YEARSIN_LABOR_FORCECIVILIANUNEMPLOYED', 'B23001015'),
+    ('MALE20_AND_21_YEARSNOT_IN_LABOR_FORCE', 'B23001016'),
+    ('MALE22_TO_24_YEARSIN_LABOR_FORCE', 'B23001018'),
+    ('MALE22_TO_24_YEARSIN_LABOR_FORCEIN_ARMED_FORCES', 'B23001019'),
+    ('MALE22_TO_24_YEARSIN_LABOR_FORCECIVILIAN', 'B23001020'),
+    ('MALE22_TO_24_YEARSIN_LABOR_FORCECIVILIANEMPLOYED', 'B23001021'),
+    ('MALE22_TO_24_YEARSIN_LABOR_FORCECIVILIANUNEMPLOYED', 'B23001022'),
+    ('MALE22_TO_24_YEARSNOT_IN_LABOR_FORCE', 'B23001023'),
+    ('MALE25_TO_29_YEARSIN_LABOR_FORCE', 'B23001025'),
+    ('MALE25_TO_29_YEARSIN_LABOR_FORCEIN_ARMED_FORCES', 'B23001026'),
+    ('MALE25_TO_29_YEARSIN_LABOR_FORCECIVILIAN', 'B23001027'),
+    ('MALE25_TO_29_YEARSIN_LABOR_FORCECIVILIANEMPLOYED', 'B23001028'),
+    ('MALE25_TO_29_YEARSIN_LABOR_FORCECIVILIANUNEMPLOYED', 'B23001029'),
+    ('MALE25_TO_29_YEARSNOT_IN_LABOR_FORCE', 'B23001030'),
+    ('MALE30_TO_34_YEARSIN_LABOR_FORCE', 'B23001032'),
+    ('MALE30_TO_34_YEARSIN_LABOR_FORCEIN_ARMED_FORCES', 'B23001033'),
+    ('MALE30_TO_34_YEARSIN_LABOR_FORCECIVILIAN', 'B23001034'),
+    ('MALE30_TO_34_YEARSIN_LABOR_FORCECIVILIANEMPLOYED', 'B23001035'),
+    ('MALE30_TO_34_YEARSIN_LABOR_FORCECIVILIANUNEMPLOYED', 'B23001036'),
+    ('MALE30_TO_34_YEARSNOT_IN_LABOR_FORCE', 'B23001037'),
+    ('MALE35_TO_44_YEARSIN_LABOR_FORCE', 'B23001039'),
+    ('MALE35_TO_44_YEARSIN_LABOR_FORCEIN_ARMED_FORCES', 'B23001040'),
+    ('MALE35_TO_44_YEARSIN_LABOR_FORCECIVILIAN', 'B23001041'),
+    ('MALE35_TO_44_YEARSIN_LABOR_FORCECIVILIANEMPLOYED', 'B23001042'),
+    ('MALE35_TO_44_YEARSIN_LABOR_FORCECIVILIANUNEMPLOYED', 'B23001043'),
+    ('MALE35_TO_44_YEARSNOT_IN_LABOR_FORCE', 'B23001044'),
+    ('MALE45_TO_54_YEARSIN_LABOR_FORCE', 'B23001046'),
+    ('MALE45_TO_54_YEARSIN_LABOR_FORCEIN_ARMED_FORCES', 'B23001047'),
+    ('MALE45_TO_54_YEARSIN_LABOR_FORCECIVILIAN', 'B23001048'),
+    ('MALE45_TO_54_YEARSIN_LABOR_FORCECIVILIANEMPLOYED', 'B23001049'),
+    ('MALE45_TO_54_YEARSIN_LABOR_FORCECIVILIANUNEMPLOYED', 'B23001050'),
+    ('MALE45_TO_54_YEARSNOT_IN_LABOR_FORCE', 'B23001051'),
+    ('MALE55_TO_59_YEARSIN_LABOR_FORCE', 'B23001053'),
+    ('MALE55_TO_59_YEARSIN_LABOR_FORCEIN_ARMED_FORCES', 'B23001054'),
+    ('MALE55_TO_59_YEARSIN_LABOR_FORCECIVILIAN', 'B23001055'),
+    ('MALE55_TO_59_YEARSIN_LABOR_FORCECIVILIANEMPLOYED', 'B23001056'),
+    ('MALE55_TO_59_YEARSIN_LABOR_FORCECIVILIANUNEMPLOYED', 'B23001057'),
+    ('MALE55_TO_59_YEARSNOT_IN_LABOR_FORCE', 'B23001058'),
+    ('MALE60_AND_61_YEARSIN_LABOR_FORCE', 'B23001060'),
+    ('MALE60_AND_61_YEARSIN_LABOR_FORCEIN_ARMED_FORCES', 'B23001061'),
+    ('MALE60_AND_61_YEARSIN_LABOR_FORCECIVILIAN', 'B23001062'),
+    ('MALE60_AND_61_YEARSIN_LABOR_FORCECIVILIANEMPLOYED', 'B23001063'),
+    ('MALE60_AND_61_YEARSIN_LABOR_FORCECIVILIANUNEMPLOYED', 'B23001064'),
+    ('MALE60_AND_61_YEARSNOT_IN_LABOR_FORCE', 'B23001065'),
+    ('MALE62_TO_64_YEARSIN_LABOR_FORCE', 'B23001067'),
+    ('MALE62_TO_64_YEARSIN_LABOR_FORCEIN_ARMED_FORCES', 'B23001068'),
+    ('MALE62_TO_64_YEARSIN_LABOR_FORCECIVILIAN', 'B23001069'),
+    ('MALE62_TO_64_YEARSIN_LABOR_FORCECIVILIANEMPLOYED', 'B23001070'),
+    ('MALE62_TO_64_YEARSIN_LABOR_FORCECIVILIANUNEMPLOYED', 'B23001071'),
+    ('MALE62_TO_64_YEARSNOT_IN_LABOR_FORCE', 'B23001072'),
+    ('MALE65_TO_69_YEARSIN_LABOR_FORCE', 'B23001074'),
+    ('MALE65_TO_69_YEARSIN_LABOR_FORCECIVILIANEMPLOYED', 'B23001075'),
+    ('MALE65_TO_69_YEARSIN_LABOR_FORCECIVILIANUNEMPLOYED', 'B23001076'),
+    ('MALE65_TO_69_YEARSNOT_IN_LABOR_FORCE', 'B23001077'),
+    ('MALE70_TO_74_YEARSIN_LABOR_FORCE', 'B23001079'),
+    ('MALE70_TO_74_YEARSIN_LABOR_FORCECIVILIANEMPLOYED', 'B23001080'),
+    ('MALE70_TO_74_YEARSIN_LABOR_FORCECIVILIANUNEMPLOYED', 'B23001081'),
+    ('MALE70_TO_74_YEARSNOT_IN_LABOR_FORCE', 'B23001082'),
+    ('MALE75_YEARS_AND_OVER', 'B23001083'),
+    ('MALE75_YEARS_AND_OVERIN_LABOR_FORCE', 'B23001084'),
+    ('MALE75_YEARS_AND_OVERIN_LABOR_FORCECIVILIANEMPLOYED', 'B23001085'),
+    ('MALE75_YEARS_AND_OVERIN_LABOR_FORCECIVILIANUNEMPLOYED', 'B23001086'),
+    ('MALE75_YEARS_AND_OVERNOT_IN_LABOR_FORCE', 'B23001087'),
+    ('FEMALE16_TO_19_YEARSIN_LABOR_FORCE', 'B23001090'),
+    ('FEMALE16_TO_19_YEARSIN_LABOR_FORCEIN_ARMED_FORCES', 'B23001091'),
+    ('FEMALE16_TO_19_YEARSIN_LABOR_FORCECIVILIAN', 'B23001092'),
+    ('FEMALE16_TO_19_YEARSIN_LABOR_FORCECIVILIANEMPLOYED', 'B23001093'),
+    ('FEMALE16_TO_19_YEARSIN_LABOR_FORCECIVILIANUNEMPLOYED', 'B23001094'),
+    ('FEMALE16_TO_19_YEARSNOT_IN_LABOR_FORCE', 'B23001095'),
+    ('FEMALE20_AND_21_YEARSIN_LABOR_FORCE', 'B23001097'),
+    ('FEMALE20_AND_21_YEARSIN_LABOR_FORCEIN_ARMED_FORCES', 'B23001098'),
+    ('FEMALE20_AND_21_YEARSIN_LABOR_FORCECIVILIAN', 'B23001099'),
+    ('FEMALE20_AND_21_YEARSIN_LABOR_FORCECIVILIANEMPLOYED', 'B23001100'),
+    ('FEMALE20_AND_21_YEARSIN_LABOR_FORCECIVILIANUNEMPLOYED', 'B23001101'),
+    ('FEMALE20_AND_21_YEARSNOT_IN_LABOR_FORCE', 'B23001102'),
+    ('FEMALE22_TO_24_YEARSIN_LABOR_FORCE', 'B23001104'),
+    ('FEMALE22_TO_24_YEARSIN_LABOR_FORCEIN_ARMED_FORCES', 'B23001105'),
+    ('FEMALE22_TO_24_YEARSIN_LABOR_FORCECIVILIAN', 'B23001106'),
+    ('FEMALE22_TO_24_YEARSIN_LABOR_FORCECIVILIANEMPLOYED', 'B23001107'),
+    ('FEMALE22_TO_24_YEARSIN_LABOR_FORCECIVILIANUNEMPLOYED', 'B23001108'),
+    ('FEMALE22_TO_24_YEARSNOT_IN_LABOR_FORCE', 'B23001109'),
+    ('FEMALE25_TO_29_YEARSIN_LABOR_FORCE', 'B23001111'),
+    ('FEMALE25_TO_29_YEARSIN_LABOR_FORCEIN_ARMED_FORCES', 'B23001112'),
+    ('FEMALE25_TO_29_YEARSIN_LABOR_FORCECIVILIAN', 'B23001113'),
+    ('FEMALE25_TO_29_YEARSIN_LABOR_FORCECIVILIANEMPLOYED', 'B23001114'),
+    ('FEMALE25_TO_29_YEARSIN_LABOR_FORCECIVILIANUNEMPLOYED', 'B23001115'),
+    ('FEMALE25_TO_29_YEARSNOT_IN_LABOR_FORCE', 'B23001116'),
+    ('FEMALE30_TO_34_YEARSIN_LABOR_FORCE', 'B23001118'),
+    ('FEMALE30_TO_34_YEARSIN_LABOR_FORCEIN_ARMED_FORCES', 'B23001119'),
+    ('FEMALE30_TO_34_YEARSIN_LABOR_FORCECIVILIAN', 'B23001120'),
+    ('FEMALE30_TO_34_YEARSIN_LABOR_FORCECIVILIANEMPLOYED', 'B23001121'),
+    ('FEMALE30_TO_34_YEARSIN_LABOR_FORCECIVILIANUNEMPLOYED', 'B23001122'),
+    ('FEMALE30_TO_34_YEARSNOT_IN_LABOR_FORCE', 'B23001123'),
+    ('FEMALE35_TO_44_YEARSIN_LABOR_FORCE', 'B23001125'),
+    ('FEMALE35_TO_44_YEARSIN_LABOR_FORCEIN_ARMED_FORCES', 'B23001126'),
+    ('FEMALE35_TO_44_YEARSIN_LABOR_FORCECIVILIAN', 'B23001127'),
+    ('FEMALE35_TO_44_YEARSIN_LABOR_FORCECIVILIANEMPLOYED', 'B23001128'),
+    ('FEMALE35_TO_44_YEARSIN_LABOR_FORCECIVILIANUNEMPLOYED', 'B23001129'),
+    ('FEMALE35_TO_44_YEARSNOT_IN_LABOR_FORCE', 'B23001130'),
+    ('FEMALE45_TO_54_YEARSIN_LABOR_FORCE', 'B23001132'),
+    ('FEMALE45_TO_54_YEARSIN_LABOR_FORCEIN_ARMED_FORCES', 'B23001133'),
+    ('FEMALE45_TO_54_YEARSIN_LABOR_FORCECIVILIAN', 'B23001134'),
+    ('FEMALE45_TO_54_YEARSIN_LABOR_FORCECIVILIANEMPLOYED', 'B23001135'),
+    ('FEMALE45_TO_54_YEARSIN_LABOR_FORCECIVILIANUNEMPLOYED', 'B23001136'),
+    ('FEMALE45_TO_54_YEARSNOT_IN_LABOR_FORCE', 'B23001137'),
+    ('FEMALE55_TO_59_YEARSIN_LABOR_FORCE', 'B23001139'),
+    ('FEMALE55_TO_59_YEARSIN_LABOR_FORCEIN_ARMED_FORCES', 'B23001140'),
+    ('FEMALE55_TO_59_YEARSIN_LABOR_FORCECIVILIAN', 'B23001141'),
+    ('FEMALE55_TO_59_YEARSIN_LABOR_FORCECIVILIANEMPLOYED', 'B23001142'),
+    ('FEMALE55_TO_59_YEARSIN_LABOR_FORCECIVILIANUNEMPLOYED', 'B23001143'),
+    ('FEMALE55_TO_59_YEARSNOT_IN_LABOR_FORCE', 'B23001144'),
+    ('FEMALE60_AND_61_YEARSIN_LABOR_FORCE', 'B23001146'),
+    ('FEMALE60_AND_61_YEARSIN_LABOR_FORCEIN_ARMED_FORCES', 'B23001147'),
+    ('FEMALE60_AND_61_YEARSIN_LABOR_FORCECIVILIAN', 'B23001148'),
+    ('FEMALE60_AND_61_YEARSIN_LABOR_FORCECIVILIANEMPLOYED', 'B23001149'),
+    ('FEMALE60_AND_61_YEARSIN_LABOR_FORCECIVILIANUNEMPLOYED', 'B23001150'),
+    ('FEMALE60_AND_61_YEARSNOT_IN_LABOR_FORCE', 'B23001151'),
+    ('FEMALE62_TO_64_YEARSIN_LABOR_FORCE', 'B23001153'),
+    ('FEMALE62_TO_64_YEARSIN_LABOR_FORCEIN_ARMED_FORCES', 'B23001154'),
+    ('FEMALE62_TO_64_YEARSIN_LABOR_FORCECIVILIAN', 'B23001155'),
+    ('FEMALE62_TO_64_YEARSIN_LABOR_FORCECIVILIANEMPLOYED', 'B23001156'),
+    ('FEMALE62_TO_64_YEARSIN_LABOR_FORCECIVILIANUNEMPLOYED', 'B23001157'),
+    ('FEMALE62_TO_64_YEARSNOT_IN_LABOR_FORCE', 'B23001158'),
+    ('FEMALE65_TO_69_YEARSIN_LABOR_FORCE', 'B23001160'),
+    ('FEMALE65_TO_69_YEARSIN_LABOR_FORCECIVILIANEMPLOYED', 'B23001161'),
+    ('FEMALE65_TO_69_YEARSIN_LABOR_FORCECIVILIANUNEMPLOYED', 'B23001162'),
+    ('FEMALE65_TO_69_YEARSNOT_IN_LABOR_FORCE', 'B23001163'),
+    ('FEMALE70_TO_74_YEARSIN_LABOR_FORCE', 'B23001165'),
+    ('FEMALE70_TO_74_YEARSIN_LABOR_FORCECIVILIANEMPLOYED', 'B23001166'),
+    ('FEMALE70_TO_74_YEARSIN_LABOR_FORCECIVILIANUNEMPLOYED', 'B23001167'),
+    ('FEMALE70_TO_74_YEARSNOT_IN_LABOR_FORCE', 'B23001168'),
+    ('FEMALE75_YEARS_AND_OVER', 'B23001169'),
+    ('FEMALE75_YEARS_AND_OVERIN_LABOR_FORCE', 'B23001170'),
+    ('FEMALE75_YEARS_AND_OVERIN_LABOR_FORCECIVILIANEMPLOYED', 'B23001171'),
+    ('FEMALE75_YEARS_AND_OVERIN_LABOR_FORCECIVILIANUNEMPLOYED', 'B23001172'),
+    ('FEMALE75_YEARS_AND_OVERNOT_IN_LABOR_FORCE', 'B23001173'),
+    ('OWNER_OCCUPIED', 'B25009002'),
+    ('OWNER_OCCUPIED1PERSON_HOUSEHOLD', 'B25009003'),
+    ('OWNER_OCCUPIED2PERSON_HOUSEHOLD', 'B25009004'),
+    ('OWNER_OCCUPIED3PERSON_HOUSEHOLD', 'B25009005'),
+    ('OWNER_OCCUPIED4PERSON_HOUSEHOLD', 'B25009006'),
+    ('OWNER_OCCUPIED5PERSON_HOUSEHOLD', 'B25009007'),
+    ('OWNER_OCCUPIED6PERSON_HOUSEHOLD', 'B25009008'),
+    ('OWNER_OCCUPIED7ORMORE_PERSON_HOUSEHOLD', 'B25009009'),
+    ('RENTER_OCCUPIED', 'B25009010'),
+    ('RENTER_OCCUPIED1PERSON_HOUSEHOLD', 'B25009011'),
+    ('RENTER_OCCUPIED2PERSON_HOUSEHOLD', 'B25009012'),
+    ('RENTER_OCCUPIED3PERSON_HOUSEHOLD', 'B25009013'),
+    ('RENTER_OCCUPIED4PERSON_HOUSEHOLD', 'B25009014'),
+    ('RENTER_OCCUPIED5PERSON_HOUSEHOLD', 'B25009015'),
+    ('RENTER_OCCUPIED6PERSON_HOUSEHOLD', 'B25009016'),
+    ('RENTER_OCCUPIED7ORMORE_PERSON_HOUSEHOLD', 'B25009017'),
+]
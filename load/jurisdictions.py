@@ -0,0 +1,214 @@
+"""
+Loads JURISDICTION_DIM from the census data written by getCensus.py, in place
+of the LoadCensus.ktr Pentaho transformation.
+
+The rows of one state are read from the Parquet dataset getCensus.py writes
+with --format parquet (dimensionaldata/census/, a directory per entity type
+and state, so only that state's files are read), or from census.csv, and go
+to the table with a single COPY instead of row by row inserts. The columns are
+set the way LoadCensus.ktr sets them:
+
+* VERSION 1, VALID_FROM 2015-12-31 and VALID_TO 2999-12-31
+* VOTER_FILE_CODE of counties from countyLookup.csv, by state and county FIPS
+  code, and VOTER_FILE_ID from getCensus.py for everything else
+* the ACS estimates in CENSUS_COLUMNS, blank ones as NULL
+
+    python jurisdictions.py -s oh ../dimensionaldata/census
+"""
+import argparse
+import csv
+import importlib
+import io
+import json
+import os
+import re
+from contextlib import closing
+
+import pandas as pd
+
+from census_columns import CENSUS_COLUMNS
+
+VERSION = 1
+VALID_FROM = '2015-12-31'
+VALID_TO = '2999-12-31'
+
+# Database used when the loader config has no "database" entry, the postgis
+# service of the Docker Compose file. libpq environment variables (PGHOST...)
+# fill in anything missing
+DEFAULT_DATABASE = {
+    'host': 'postgis',
+    'port': 5432,
+    'dbname': 'VOTER',
+    'user': 'postgres'
+}
+
+# Oldest versions reading the census/ dataset: read_parquet(filters=) of a
+# partitioned dataset and the nullable Int64 estimates getCensus.py writes
+PARQUET_VERSIONS = (('pandas', (0, 24)), ('pyarrow', (0, 15)))
+
+COLUMNS = (['GEOID', 'FIPS', 'VOTER_FILE_CODE', 'STATE_NAME', 'STATE_FIPS',
+            'ENTITY_NAME', 'ENTITY_TYPE', 'VERSION', 'VALID_FROM', 'VALID_TO'] +
+           [column for column, _ in CENSUS_COLUMNS])
+
+
+def check_parquet_support():
+    """Raises ImportError unless pandas and pyarrow can read the census/
+    dataset, see PARQUET_VERSIONS"""
+    for name, minimum in PARQUET_VERSIONS:
+        module = importlib.import_module(name)
+        version = tuple(int(n) for n in re.findall(r'\d+', module.__version__)[:2])
+        if version < minimum:
+            raise ImportError('{} {} is older than {}'.format(
+                name, module.__version__, '.'.join(map(str, minimum))))
+
+
+def census_path(dim_dir):
+    """The Parquet dataset in dim_dir if there is one, census.csv otherwise"""
+    dataset = os.path.join(dim_dir, 'census')
+    if os.path.isdir(dataset):
+        return dataset
+    return os.path.join(dim_dir, 'census.csv')
+
+
+def read_census(path, state=None):
+    """
+    Inputs:
+        path: Parquet dataset directory or census.csv
+        state: two letter state code, None for every state
+    Outputs:
+        DataFrame with the state's rows
+    """
+    if os.path.isdir(path):
+        check_parquet_support()
+        filters = [('USPS', '=', state.upper())] if state else None
+        return pd.read_parquet(path, engine='pyarrow', filters=filters)
+    # Codes stay text, e.g. VOTER_FILE_ID can be a number or a letter
+    df = pd.read_csv(path, dtype={'FIPS': str, 'GEOID': str, 'STATEFP': str,
+                                  'VOTER_FILE_ID': str, 'USPS': str})
+    if state:
+        df = df[df['USPS'] == state.upper()]
+    return df
+
+
+def read_county_lookup(path):
+    """(STATE, TYPE, COUNTYFP) -> COUNTY_CODE from countyLookup.csv"""
+    lookup = {}
+    with open(path, newline='') as f:
+        for row in csv.DictReader(f):
+            if row['COUNTYFP'].strip().isdigit():
+                key = (row['STATE'].strip(), row['TYPE'].strip(),
+                       int(row['COUNTYFP']))
+                lookup[key] = row['COUNTY_CODE'].strip()
+    return lookup
+
+
+def _text(value):
+    if pd.isnull(value):
+        return None
+    if isinstance(value, float) and value.is_integer():
+        # Codes of a column with blanks come back as floats
+        value = int(value)
+    return str(value)
+
+
+def _integer(value):
+    if pd.isnull(value) or value == '':
+        return None
+    return int(round(float(value)))
+
+
+def jurisdiction_rows(df, county_lookup):
+    """
+    Inputs:
+        df: census rows, see read_census()
+        county_lookup: see read_county_lookup()
+    Outputs:
+        lists of values in COLUMNS order, None for NULL
+    """
+    census = [name for _, name in CENSUS_COLUMNS]
+    missing = [name for name in census if name not in df.columns]
+    if missing:
+        raise ValueError('census data lacks columns {}'.format(', '.join(missing)))
+    for record in df.to_dict('records'):
+        entity_type = _text(record.get('ENTITYTYPE'))
+        state = _text(record.get('USPS'))
+        state_fips = _text(record.get('STATEFP'))
+        geoid = _text(record.get('GEOID'))
+        if state_fips is not None:
+            state_fips = state_fips.zfill(2)
+        if entity_type == 'county':
+            code = None
+            if geoid and geoid.isdigit() and state_fips:
+                county_fp = int(geoid) - int(state_fips) * 1000
+                code = county_lookup.get((state, entity_type, county_fp))
+        else:
+            code = _text(record.get('VOTER_FILE_ID'))
+        yield ([geoid, _text(record.get('FIPS')), code, state, state_fips,
+                _text(record.get('NAME')), entity_type, VERSION, VALID_FROM,
+                VALID_TO] +
+               [_integer(record[name]) for name in census])
+
+
+def copy_rows(conn, rows):
+    """COPY rows into JURISDICTION_DIM, returns the number of rows"""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    count = 0
+    for row in rows:
+        # An unquoted empty field is NULL in COPY's csv format
+        writer.writerow(['' if value is None else value for value in row])
+        count += 1
+    buf.seek(0)
+    with conn.cursor() as cursor:
+        cursor.copy_expert(
+            'COPY jurisdiction_dim ({}) FROM STDIN WITH (FORMAT csv)'.format(
+                ', '.join(column.lower() for column in COLUMNS)),
+            buf
+        )
+    return count
+
+
+def load_jurisdictions(path, lookup_path, state=None, database=None):
+    """
+    Inputs:
+        path: census data, see census_path()
+        lookup_path: countyLookup.csv
+        state: two letter state code, None for every state
+        database: psycopg2.connect() keyword arguments, DEFAULT_DATABASE if None
+    Outputs:
+        rows loaded
+    """
+    import psycopg2
+
+    df = read_census(path, state)
+    rows = jurisdiction_rows(df, read_county_lookup(lookup_path))
+    with closing(psycopg2.connect(**(database or DEFAULT_DATABASE))) as conn:
+        with conn:
+            return copy_rows(conn, rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Load JURISDICTION_DIM from getCensus.py output'
+    )
+    parser.add_argument('path', help='census/ Parquet dataset or census.csv')
+    parser.add_argument('-s', '--state', help='two letter state code, all '
+                                              'states if left out')
+    parser.add_argument('-l', '--lookup', help='countyLookup.csv (default: '
+                                               'next to the census data)')
+    parser.add_argument('-c', '--configfile', default='load_conf.json',
+                        help='loader config with a "database" entry')
+    args = parser.parse_args()
+
+    with open(os.path.join(os.path.dirname(__file__), args.configfile)) as f:
+        conf = json.load(f)
+    lookup = args.lookup or os.path.join(
+        os.path.dirname(os.path.abspath(args.path.rstrip(os.sep))),
+        'countyLookup.csv')
+    count = load_jurisdictions(args.path, lookup, args.state,
+                               conf.get('database'))
+    print('{} rows loaded into jurisdiction_dim'.format(count))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,16 +1,21 @@
 import os
+import sys
+import copy
 import argparse
 import subprocess
 import json
 from datetime import date
 
+from scheduler import Node, Scheduler
+
 
 parser = argparse.ArgumentParser(description='Run data loading for NVF')
 
 parser.add_argument(
     'task',
     type=str,
-    choices=['dates', 'dimdata', 'precincts', 'transform', 'load', 'history'],
+    choices=['dates', 'dimdata', 'precincts', 'transform', 'load', 'history',
+             'run-all'],
     help='Designates what action will be run by the loader'
 )
 
@@ -20,7 +25,8 @@ parser.add_argument(
     required=False,
     help='''
     Indicates which state to perform the action for as its two letter abbreviation.
-    Required for all commands other than "date".
+    Required for all commands other than "date". For "run-all" this can be a
+    comma-separated list of states.
     '''
 )
 
@@ -48,6 +54,44 @@ parser.add_argument(
     help='If running load command, the key for the associated reporter'
 )
 
+parser.add_argument(
+    '--tasks',
+    default='dates,dimdata,precincts,transform,load',
+    help='''
+    For "run-all", comma-separated tasks to include in the graph
+    (default: dates,dimdata,precincts,transform,load)
+    '''
+)
+
+parser.add_argument(
+    '--history_file',
+    required=False,
+    help='For "run-all" with the history task, vote history input per state'
+)
+
+parser.add_argument(
+    '--workers',
+    type=int,
+    default=4,
+    help='For "run-all", how many tasks can run at the same time (default: 4)'
+)
+
+parser.add_argument(
+    '--force',
+    action='store_true',
+    help='For "run-all", run tasks even if their inputs are unchanged'
+)
+
+parser.add_argument(
+    '--progress_interval',
+    type=float,
+    default=60,
+    help='''
+    Seconds between progress lines of "transform" and "run-all", 0 to turn
+    them off (default: 60)
+    '''
+)
+
 
 # Docker setup for local dev
 def populate_date_dim(opts, conf):
@@ -60,6 +104,28 @@ def populate_date_dim(opts, conf):
 def load_dimensional_data(opts, conf):
     dim_dir = os.path.join(conf['nvf_path'], 'dimensionaldata')
 
+    # getCensus.py --format parquet output is loaded with a COPY, without
+    # Pentaho, when psycopg2 and recent enough pandas and pyarrow are
+    # installed (requirements.txt)
+    if os.path.isdir(os.path.join(dim_dir, 'census')):
+        try:
+            import psycopg2
+            from jurisdictions import (census_path, check_parquet_support,
+                                       load_jurisdictions)
+            check_parquet_support()
+        except ImportError as err:
+            print('{}, loading census.csv with LoadCensus.ktr instead'.format(err))
+        else:
+            count = load_jurisdictions(
+                census_path(dim_dir),
+                os.path.join(dim_dir, 'countyLookup.csv'),
+                opts.state,
+                conf.get('database')
+            )
+            print('{} rows loaded into jurisdiction_dim for {}'.format(
+                count, opts.state.upper()))
+            return
+
     subprocess.check_call([
         os.path.join(conf['pdi_path'], 'pan.sh'),
         '-file', os.path.join(conf['nvf_path'], 'src', 'main', 'pdi', 'LoadCensus.ktr'),
@@ -117,6 +183,8 @@ def run_transformer(opts, conf):
     from national_voter_file.us_states.all import load as load_states
 
     from national_voter_file.transformers.csv_transformer import CsvOutput
+    from national_voter_file.transformers.telemetry import (RunTelemetry,
+                                                            report_path)
 
     state = load_states([opts.state])[0]
     state_path = state.transformer.StatePreparer.state_path
@@ -132,8 +200,15 @@ def run_transformer(opts, conf):
                                            state_path,
                                            state.transformer,
                                            state_transformer)
-    writer = CsvOutput(state_transformer)
+    telemetry = RunTelemetry(opts.state,
+                             interval=opts.progress_interval,
+                             total_bytes=state_preparer.input_size(),
+                             total_rows=state_preparer.row_count(),
+                             progress=state_preparer.read_position)
+    writer = CsvOutput(state_transformer, telemetry=telemetry)
     writer(state_preparer.process(), output_path)
+    telemetry.write_report(report_path(output_path))
+    print('done: {}'.format(telemetry.progress_line()))
 
 
 def load_data(opts, conf):
@@ -159,6 +234,139 @@ def load_data(opts, conf):
     ])
 
 
+def state_input(template, state):
+    """
+    --input_file and --history_file can contain "{state}" for run-all,
+    e.g. --input_file=test/{state}.csv
+    """
+    return template.format(state=state) if template else None
+
+
+def run_all(opts, conf):
+    """
+    Builds a graph of every requested task for every state and runs it with
+    the scheduler. Per state the chain is
+
+        dates -> dimdata -> precincts -> load -> history
+                            transform -----^
+
+    dates is shared by all states, and states don't depend on each other.
+    """
+    from national_voter_file.us_states.all import load as load_states
+    from national_voter_file.transformers.telemetry import report_path
+
+    tasks = set(t.strip() for t in opts.tasks.split(','))
+    states = [s.strip() for s in opts.state.split(',')]
+    pdi_dir = os.path.join(conf['nvf_path'], 'src', 'main', 'pdi')
+    dim_dir = os.path.join(conf['nvf_path'], 'dimensionaldata')
+
+    scheduler = Scheduler(workers=opts.workers,
+                          state_path=os.path.join(conf['data_path'],
+                                                  '.loader_state.json'),
+                          force=opts.force,
+                          heartbeat=opts.progress_interval)
+    transform_reports = {}
+
+    def task_opts(state, **kwargs):
+        node_opts = copy.copy(opts)
+        node_opts.state = state
+        for k, v in kwargs.items():
+            setattr(node_opts, k, v)
+        return node_opts
+
+    if 'dates' in tasks:
+        scheduler.add(Node(
+            'dates',
+            lambda: populate_date_dim(opts, conf),
+            inputs=[os.path.join(pdi_dir, 'populateDateDimension.ktr')]
+        ))
+
+    for state, state_mod in zip(states, load_states(states)):
+        preparer = state_mod.transformer.StatePreparer
+        input_file = state_input(opts.input_file, state) or os.path.join(
+            preparer.state_name, state_mod.transformer.default_file
+        )
+        input_path = os.path.join(conf['data_path'], input_file)
+        output_file = os.path.join(os.path.dirname(input_file),
+                                   '{}_output.csv'.format(state))
+        output_path = os.path.join(conf['data_path'], output_file)
+        before_load = []
+
+        if 'dimdata' in tasks:
+            scheduler.add(Node(
+                'dimdata:' + state,
+                lambda o=task_opts(state): load_dimensional_data(o, conf),
+                deps=['dates'] if 'dates' in tasks else [],
+                inputs=[os.path.join(dim_dir, 'census.csv'),
+                        os.path.join(dim_dir, 'census'),
+                        os.path.join(dim_dir, 'countyLookup.csv'),
+                        os.path.join(pdi_dir, 'LoadCensus.ktr'),
+                        os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                     'jurisdictions.py')]
+            ))
+            before_load.append('dimdata:' + state)
+
+        precincts_ktr = os.path.join(pdi_dir, state, 'save_precincts.ktr')
+        if 'precincts' in tasks and os.path.exists(precincts_ktr):
+            scheduler.add(Node(
+                'precincts:' + state,
+                lambda o=task_opts(state, input_file=input_file): load_precincts(o, conf),
+                deps=before_load[:],
+                inputs=[input_path, precincts_ktr]
+            ))
+            before_load = ['precincts:' + state]
+
+        if 'transform' in tasks:
+            # Separate process so transforms of different states use separate cores
+            transform_args = [
+                sys.executable, os.path.abspath(__file__), 'transform',
+                '-s', state, '-c', opts.configfile, '--input_file', input_file,
+                '--progress_interval', str(opts.progress_interval)
+            ]
+            scheduler.add(Node(
+                'transform:' + state,
+                lambda a=transform_args: subprocess.check_call(a),
+                inputs=[input_path],
+                outputs=[output_path]
+            ))
+            before_load.append('transform:' + state)
+            transform_reports['transform:' + state] = report_path(output_path)
+
+        if 'load' in tasks:
+            scheduler.add(Node(
+                'load:' + state,
+                lambda o=task_opts(state, input_file=output_file): load_data(o, conf),
+                deps=before_load + (['dates'] if 'dates' in tasks else []),
+                inputs=[output_path,
+                        os.path.join(pdi_dir, 'ProcessPreparedVoterFile.kjb')]
+            ))
+
+        history_file = state_input(opts.history_file, state)
+        if 'history' in tasks and history_file and state in ('fl', 'ny'):
+            scheduler.add(Node(
+                'history:' + state,
+                lambda o=task_opts(state, input_file=history_file): load_voting_history(o, conf),
+                deps=['load:' + state] if 'load' in tasks else [],
+                inputs=[os.path.join(conf['data_path'], history_file)]
+            ))
+
+    ok = scheduler.run()
+    print(scheduler.summary())
+
+    # Row counts and stage times of the transforms come from their own reports
+    report = scheduler.report()
+    for name, path in transform_reports.items():
+        if scheduler.nodes[name].status == 'done' and os.path.exists(path):
+            with open(path) as f:
+                report['nodes'][name]['transform'] = json.load(f)
+    report_file = os.path.join(conf['data_path'], 'run_report.json')
+    with open(report_file, 'w') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    print('Run report written to {}'.format(report_file))
+    if not ok:
+        raise SystemExit(1)
+
+
 if __name__ == '__main__':
     opts = parser.parse_args()
 
@@ -170,7 +378,9 @@ if __name__ == '__main__':
 
     opts.state = opts.state.lower() if opts.state is not None else None
 
-    if opts.task == 'load':
+    if opts.task == 'run-all':
+        run_all(opts, conf)
+    elif opts.task == 'load':
         load_data(opts, conf)
     elif opts.task == 'transform':
         run_transformer(opts, conf)
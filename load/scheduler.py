@@ -0,0 +1,254 @@
+"""
+Small dependency graph runner for loader.py run-all
+
+Each Node wraps one loader task for one state. Nodes run on a thread pool as
+soon as everything they depend on has finished, so independent states and tasks
+overlap up to the worker budget. The heavy lifting happens in Pentaho or in
+subprocesses, so threads are enough to keep them busy.
+
+A node is skipped when the fingerprint of its input files, and of everything
+upstream of it, matches the one recorded after its last successful run.
+"""
+import hashlib
+import json
+import os
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+
+def file_fingerprint(path):
+    """
+    Cheap fingerprint from size and modification time. Directories are
+    fingerprinted by their files, missing paths fingerprint as missing.
+    """
+    if os.path.isdir(path):
+        parts = []
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for f in sorted(files):
+                parts.append(file_fingerprint(os.path.join(root, f)))
+        return hashlib.sha1('\n'.join(parts).encode('utf-8')).hexdigest()
+    try:
+        st = os.stat(path)
+    except OSError:
+        return '{}:missing'.format(path)
+    return '{}:{}:{}'.format(path, st.st_size, int(st.st_mtime * 1e6))
+
+
+class Node(object):
+
+    def __init__(self, name, func, deps=(), inputs=(), outputs=()):
+        """
+        Inputs:
+            name: unique name, e.g. "transform:oh"
+            func: callable run with no arguments
+            deps: names of nodes that have to finish first
+            inputs: files read by the node, used for fingerprinting
+            outputs: files written by the node, it is never skipped if one
+                of these is missing
+        """
+        self.name = name
+        self.func = func
+        self.deps = list(deps)
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.status = 'pending'
+        self.fingerprint = None
+        self.started = None
+        self.duration = 0.0
+        self.error = None
+
+
+class Scheduler(object):
+
+    def __init__(self, workers=4, state_path=None, force=False, heartbeat=60):
+        """
+        Inputs:
+            workers: maximum number of nodes running at once
+            state_path: json file where fingerprints of successful runs are kept
+            force: run every node even if its inputs are unchanged
+            heartbeat: seconds between lines listing the running nodes,
+                0 for none
+        """
+        self.workers = workers
+        self.state_path = state_path
+        self.force = force
+        self.heartbeat = heartbeat
+        self.started = None
+        self.duration = 0.0
+        self.nodes = {}
+        self.order = []
+
+    def add(self, node):
+        if node.name in self.nodes:
+            raise ValueError('Duplicate node {}'.format(node.name))
+        self.nodes[node.name] = node
+        self.order.append(node.name)
+        return node
+
+    def _load_state(self):
+        if self.state_path and os.path.exists(self.state_path):
+            with open(self.state_path) as f:
+                return json.load(f)
+        return {}
+
+    def _save_state(self, state):
+        if self.state_path:
+            tmp_path = self.state_path + '.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(state, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.state_path)
+
+    def _check_graph(self):
+        for node in self.nodes.values():
+            for dep in node.deps:
+                if dep not in self.nodes:
+                    raise ValueError('{} depends on unknown node {}'.format(
+                        node.name, dep))
+        # Kahn's algorithm, anything left over is part of a cycle
+        indegree = dict((n, len(self.nodes[n].deps)) for n in self.order)
+        ready = [n for n in self.order if indegree[n] == 0]
+        seen = 0
+        while ready:
+            name = ready.pop()
+            seen += 1
+            for other in self.order:
+                if name in self.nodes[other].deps:
+                    indegree[other] -= 1
+                    if indegree[other] == 0:
+                        ready.append(other)
+        if seen != len(self.nodes):
+            raise ValueError('Dependency cycle between {}'.format(
+                ', '.join(n for n in self.order if indegree[n] > 0)))
+
+    def _fingerprint(self, node):
+        parts = [node.name]
+        parts.extend(file_fingerprint(p) for p in node.inputs)
+        parts.extend(self.nodes[d].fingerprint for d in sorted(node.deps))
+        return hashlib.sha1('\n'.join(parts).encode('utf-8')).hexdigest()
+
+    def _run_node(self, node):
+        node.started = time.time()
+        try:
+            node.func()
+        finally:
+            node.duration = time.time() - node.started
+
+    def run(self):
+        """
+        Runs every node, returns True if none of them failed. Nodes downstream
+        of a failure are marked "blocked" and the rest of the graph carries on.
+        """
+        self._check_graph()
+        state = self._load_state()
+        running = {}
+        self.started = time.time()
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            while True:
+                for name in self.order:
+                    node = self.nodes[name]
+                    if node.status != 'pending':
+                        continue
+                    dep_status = [self.nodes[d].status for d in node.deps]
+                    if any(s in ('failed', 'blocked') for s in dep_status):
+                        node.status = 'blocked'
+                        print('[{}] blocked by failed dependency'.format(name))
+                        continue
+                    if not all(s in ('done', 'skipped') for s in dep_status):
+                        continue
+
+                    node.fingerprint = self._fingerprint(node)
+                    outputs_exist = all(os.path.exists(p) for p in node.outputs)
+                    if (not self.force and outputs_exist and
+                            state.get(name) == node.fingerprint):
+                        node.status = 'skipped'
+                        print('[{}] inputs unchanged, skipping'.format(name))
+                        continue
+
+                    node.status = 'running'
+                    print('[{}] starting'.format(name))
+                    running[pool.submit(self._run_node, node)] = node
+
+                if not running:
+                    if any(self.nodes[n].status == 'pending' for n in self.order):
+                        # Statuses changed without submitting anything, rescan
+                        continue
+                    break
+
+                finished, _ = wait(list(running), timeout=self.heartbeat or None,
+                                   return_when=FIRST_COMPLETED)
+                if not finished:
+                    now = time.time()
+                    print('still running: {}'.format(', '.join(
+                        '{} ({:.0f}s)'.format(n.name, now - (n.started or now))
+                        for n in running.values())))
+                for future in finished:
+                    node = running.pop(future)
+                    try:
+                        future.result()
+                    except Exception as err:
+                        node.status = 'failed'
+                        node.error = err
+                        state.pop(node.name, None)
+                        print('[{}] failed after {:.1f}s'.format(node.name,
+                                                                node.duration))
+                        traceback.print_exception(type(err), err,
+                                                  err.__traceback__)
+                    else:
+                        node.status = 'done'
+                        state[node.name] = node.fingerprint
+                        print('[{}] done in {:.1f}s'.format(node.name,
+                                                           node.duration))
+                    self._save_state(state)
+
+        self.duration = time.time() - self.started
+        return not any(n.status in ('failed', 'blocked')
+                       for n in self.nodes.values())
+
+    def critical_path(self):
+        """
+        Longest chain of dependent nodes by wall time. Skipped nodes count as
+        zero, so this is the chain that bounded this particular run.
+        """
+        best = {}
+
+        def longest(name):
+            if name not in best:
+                node = self.nodes[name]
+                upstream = max([longest(d) for d in node.deps] or [(0.0, [])],
+                               key=lambda x: x[0])
+                best[name] = (upstream[0] + node.duration, upstream[1] + [name])
+            return best[name]
+
+        if not self.nodes:
+            return 0.0, []
+        return max((longest(n) for n in self.order), key=lambda x: x[0])
+
+    def summary(self):
+        lines = ['{:<28} {:<8} {:>9}'.format('node', 'status', 'seconds')]
+        for name in self.order:
+            node = self.nodes[name]
+            lines.append('{:<28} {:<8} {:>9.1f}'.format(name, node.status,
+                                                       node.duration))
+        total, path = self.critical_path()
+        lines.append('')
+        lines.append('Critical path ({:.1f}s): {}'.format(total, ' -> '.join(path)))
+        return '\n'.join(lines)
+
+    def report(self):
+        """Machine readable version of summary()"""
+        total, path = self.critical_path()
+        return {
+            'started': self.started,
+            'wall_seconds': self.duration,
+            'workers': self.workers,
+            'nodes': dict((name, {
+                'status': node.status,
+                'seconds': node.duration,
+                'deps': node.deps,
+                'error': str(node.error) if node.error else None,
+            }) for name, node in self.nodes.items()),
+            'critical_path': {'seconds': total, 'nodes': path},
+        }
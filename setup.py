@@ -19,9 +19,11 @@ setup(
         'nose',
         'Faker',
         'future',
+        'pandas',
         'probableparsing',
         'python-crfsuite',
         'python-dateutil',
+        'requests',
         'six',
         'usaddress',
     ],
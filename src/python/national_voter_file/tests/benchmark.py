@@ -0,0 +1,219 @@
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from national_voter_file.tests.synthetic_data import (output_filename,
+                                                     write_state)
+from national_voter_file.transformers.base import DATA_DIR, BasePreparer
+from national_voter_file.transformers.csv_transformer import CsvOutput
+from national_voter_file.transformers.telemetry import RunTelemetry
+from national_voter_file.us_states.all import load as load_states
+
+"""
+# State transformer benchmarks
+
+Runs every state end to end (preparer, transform, validate and write) on
+generated inputs of increasing size and records rows/sec, peak RSS and the time
+per stage from the run telemetry. Each run happens in a fresh process so peak
+RSS belongs to that run alone.
+
+Inputs come from synthetic_data.py in each state's native layout, and are
+kept under `<datadir>/benchmark/inputs` to be reused by later runs.
+
+    python -m national_voter_file.tests.benchmark run --sizes 10000,100000
+    python -m national_voter_file.tests.benchmark compare old.json new.json
+
+compare exits with 1 if any state got slower (or bigger) than the threshold.
+"""
+
+BENCHMARK_STATES = ['co', 'de', 'fl', 'mi', 'nc', 'nj', 'ny', 'oh', 'ok', 'pa',
+                    'ut', 'vt', 'wa']
+DEFAULT_SIZES = [10000, 100000, 1000000]
+DEFAULT_THRESHOLD = 0.1
+
+
+def input_path(data_dir, state, rows):
+    return os.path.join(data_dir, 'inputs', '{}_{}_{}'.format(
+        state, rows, output_filename(state)))
+
+
+def generate_input(data_dir, state, rows):
+    """
+    Generates `rows` voters for `state` in its native layout, unless they were
+    generated before
+
+    Outputs:
+        Path of the input file
+    """
+    path = input_path(data_dir, state, rows)
+    if os.path.exists(path):
+        return path
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    print('Generating {} rows for {}'.format(rows, state))
+    write_state(state, tmp_path, rows)
+    os.rename(tmp_path, path)
+    return path
+
+
+def run_one(state, path, output_path):
+    """
+    Transforms one input, run in a fresh process
+
+    Outputs:
+        Run report of the transform (see RunTelemetry.report)
+    """
+    state_mod = load_states([state])[0]
+    state_transformer = state_mod.transformer.StateTransformer()
+    state_preparer = getattr(state_mod.transformer,
+                             'StatePreparer',
+                             BasePreparer)(path,
+                                           state,
+                                           state_mod.transformer,
+                                           state_transformer)
+    telemetry = RunTelemetry(state,
+                             total_bytes=state_preparer.input_size(),
+                             total_rows=state_preparer.row_count(),
+                             progress=state_preparer.read_position)
+    # Rows with unparseable addresses warn on stdout, keep the results readable
+    with open(os.devnull, 'w') as devnull:
+        stdout, sys.stdout = sys.stdout, devnull
+        try:
+            CsvOutput(state_transformer, telemetry=telemetry)(
+                state_preparer.process(), output_path
+            )
+        finally:
+            sys.stdout = stdout
+    os.remove(output_path)
+    return telemetry.report()
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL
+        ).decode('utf-8').strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(states, sizes, data_dir, output):
+    results = {}
+    context = multiprocessing.get_context('spawn')
+    for rows in sizes:
+        for state in states:
+            path = generate_input(data_dir, state, rows)
+            out_path = os.path.join(data_dir, '{}_{}_output.csv'.format(state, rows))
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                report = pool.submit(run_one, state, path, out_path).result()
+            key = '{}:{}'.format(state, rows)
+            results[key] = report
+            print('{:<12} {:>10,.0f} rows/s {:>9.1f} MB peak'.format(
+                key, report['rows_per_second'] or 0,
+                (report['peak_rss_bytes'] or 0) / 2.0 ** 20))
+
+    benchmark = {
+        'created': datetime.now().isoformat(),
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(benchmark, f, indent=2, sort_keys=True)
+    print('Results written to {}'.format(output))
+    return benchmark
+
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """
+    Inputs:
+        baseline, current: benchmark dicts as written by run()
+        threshold: fraction rows/sec may drop (or peak RSS grow) before it
+            counts as a regression
+    Outputs:
+        (table lines, list of regressed keys)
+    """
+    lines = ['{:<12} {:>12} {:>12} {:>8} {:>10} {:>10}'.format(
+        'run', 'base rows/s', 'rows/s', 'change', 'base MB', 'MB')]
+    regressions = []
+    old, new = baseline['results'], current['results']
+    for key in sorted(set(old) & set(new)):
+        old_rate = old[key]['rows_per_second'] or 0
+        new_rate = new[key]['rows_per_second'] or 0
+        old_rss = (old[key]['peak_rss_bytes'] or 0) / 2.0 ** 20
+        new_rss = (new[key]['peak_rss_bytes'] or 0) / 2.0 ** 20
+        change = new_rate / old_rate - 1 if old_rate else 0.0
+        flag = ''
+        if change < -threshold or (old_rss and new_rss > old_rss * (1 + threshold)):
+            regressions.append(key)
+            flag = '  REGRESSION'
+        lines.append('{:<12} {:>12,.0f} {:>12,.0f} {:>+7.1%} {:>10.1f} {:>10.1f}{}'.format(
+            key, old_rate, new_rate, change, old_rss, new_rss, flag))
+    for key in sorted(set(old) ^ set(new)):
+        lines.append('{:<12} only in {}'.format(
+            key, 'baseline' if key in old else 'current'))
+    return lines, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the state transformers')
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+
+    run_parser = commands.add_parser('run', help='run the benchmarks')
+    run_parser.add_argument('-s', '--states', default=','.join(BENCHMARK_STATES),
+                            help='comma-separated states (default: all)')
+    run_parser.add_argument('--sizes',
+                            default=','.join(str(s) for s in DEFAULT_SIZES),
+                            help='comma-separated row counts (default: {})'.format(
+                                ','.join(str(s) for s in DEFAULT_SIZES)))
+    run_parser.add_argument('-d', '--datadir', dest='data_dir',
+                            default=os.path.join(DATA_DIR, 'benchmark'),
+                            help='where generated inputs are kept '
+                                 '(default ./data/benchmark)')
+    run_parser.add_argument('-o', '--output', default=None,
+                            help='results file (default <datadir>/results_<time>.json)')
+
+    compare_parser = commands.add_parser(
+        'compare', help='compare two results files, exit 1 on regressions'
+    )
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('-t', '--threshold', type=float,
+                                default=DEFAULT_THRESHOLD,
+                                help='allowed slowdown as a fraction '
+                                     '(default {})'.format(DEFAULT_THRESHOLD))
+
+    args = parser.parse_args()
+    if args.command == 'run':
+        output = args.output or os.path.join(
+            args.data_dir,
+            'results_{}.json'.format(datetime.now().strftime('%Y%m%d_%H%M%S'))
+        )
+        run(args.states.split(','), [int(s) for s in args.sizes.split(',')],
+            args.data_dir, output)
+    else:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        with open(args.current) as f:
+            current = json.load(f)
+        lines, regressions = compare(baseline, current, args.threshold)
+        print('\n'.join(lines))
+        if regressions:
+            print('{} regression(s) over {:.0%}: {}'.format(
+                len(regressions), args.threshold, ', '.join(regressions)))
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -126,7 +126,7 @@ COLORADO_SCHEMA = {
     'ADDRESS_NON_STD': lambda: "",
     'RESIDENTIAL_ADDRESS': lambda: _empty(fake.street_address().upper()),
     'RESIDENTIAL_CITY': lambda: _empty(fake.city().upper()),
-    'RESIDENTIAL_STATE': lambda: _empty(fake.state_abbr()),
+    'RESIDENTIAL_STATE': lambda: fake.state_abbr(),
     'RESIDENTIAL_ZIP_CODE': lambda: _empty(fake.zipcode()),
     'RESIDENTIAL_ZIP_PLUS': lambda: _empty(fake.numerify(text='####')),
     'EFFECTIVE_DATE': lambda: fake.date(pattern='%m/%d/%Y'),
@@ -623,7 +623,7 @@ PENNSYLVANIA_SCHEMA = {
     'FIRST_NAME': lambda: _blank(fake.first_name().upper()),
     'MIDDLE_NAME': lambda: _blank(fake.first_name().upper()),
     'NAME_SUFFIX': lambda: _empty(fake.suffix()),
-    'GENDER': lambda: random.choice(['M', 'F', 'U', '']),
+    'GENDER': lambda: random.choice(['M', 'F', 'U']),
     'BIRTHDATE': lambda: _blank(fake.date(pattern='%m/%d/%Y')),
     'REGISTRATION_DATE': lambda: _blank(fake.date(pattern='%m/%d/%Y')),
     'REGISTRATION_STATUS': lambda: random.choice(['I', 'A']),
@@ -842,7 +842,7 @@ WASHINGTON_SCHEMA = {
 'MName': lambda:  fake.first_name().upper(),
 'LName': lambda:  fake.last_name().upper(),
 'NameSuffix': lambda:  _empty(fake.suffix().upper()),
-'Birthdate': lambda:  _empty(fake.date(pattern='%m/%d/%Y')),
+'Birthdate': lambda:  fake.date(pattern='%m/%d/%Y'),
 'Gender': lambda:  random.choice(['F', 'M', 'U']),
 'RegStNum': lambda:  _empty(fake.building_number()),
 'RegStFrac': lambda: _empty(str(randint(1, 13))) ,
@@ -853,7 +853,7 @@ WASHINGTON_SCHEMA = {
 'RegStPostDirection': lambda:  _empty(random.choice(['S', 'E', 'W', "", ])),
 'RegUnitNum': lambda:  _blank(fake.building_number()),
 'RegCity': lambda:  fake.city().upper(),
-'RegState': lambda:  _blank(fake.state_abbr().upper()),
+'RegState': lambda:  'WA',
 'RegZipCode': lambda:  _blank(fake.zipcode()),
 'CountyCode': lambda:  random.choice(['SN','CR','AS','PI']),
 'PrecinctCode': lambda: str(randint(1, 999999)) ,
@@ -868,7 +868,7 @@ WASHINGTON_SCHEMA = {
 'MailZip': lambda:  _blank(fake.zipcode()),
 'MailState': lambda:  _blank(fake.state_abbr().upper()),
 'MailCountry': lambda:  ' ',
-'Registrationdate': lambda:  _empty(fake.date(pattern='%m/%d/%Y')),
+'Registrationdate': lambda:  fake.date(pattern='%m/%d/%Y'),
 'AbsenteeType': lambda:  random.choice(['N', 'P', ' ', 'V']),
 'LastVoted': lambda:  _empty(fake.date(pattern='%m/%d/%Y')),
 'StatusCode': lambda:  random.choice(['A', 'I']),
@@ -889,63 +889,65 @@ for d in range(1,40):
 
 
 def make_state_data(state_name, state_schema,
-                    sep=',', has_header=True, input_fields=None):
-    state_rows = []
-    while len(state_rows) < NUM_ROWS:
-        r  = {}
-        for k in state_schema.keys():
-            r[k] = state_schema[k]()
-        state_rows.append(r)
-
+                    sep=',', has_header=True, input_fields=None,
+                    num_rows=NUM_ROWS, output_path=None):
+    if output_path is None:
+        output_path = os.path.join(TEST_DATA_DIR, state_name + '.csv')
     if input_fields is None:
-        input_fields = state_rows[0].keys()
+        input_fields = list(state_schema.keys())
 
-    with open(os.path.join(TEST_DATA_DIR, state_name + '.csv'), 'w') as f:
+    with open(output_path, 'w') as f:
         w = csv.DictWriter(f, fieldnames=input_fields, delimiter=sep)
         if has_header:
             w.writeheader()
-        w.writerows(state_rows)
+        for _ in range(num_rows):
+            r  = {}
+            for k in state_schema.keys():
+                r[k] = state_schema[k]()
+            w.writerow(r)
 
 
-if __name__ == '__main__':
-    states = {'de': ([DELAWARE_SCHEMA],
-                       {}),
+# Schema and make_state_data arguments for each state
+STATE_DATA = {'de': ([DELAWARE_SCHEMA],
+                     {}),
               'co': ([COLORADO_SCHEMA],
-                       {}),
+                     {}),
               'oh': ([OHIO_SCHEMA],
-                       {}),
+                     {}),
               'ok': ([OKLAHOMA_SCHEMA],
-                       {'has_header': False,
-                        'input_fields': OKLAHOMA_FIELDS}),
+                     {'input_fields': OKLAHOMA_FIELDS}),
               'fl': ([FLORIDA_SCHEMA],
-                          {'sep': '\t',
-                           'has_header': False,
-                           'input_fields': FLORIDA_FIELDS}),
+                     {'sep': '\t',
+                      'has_header': False,
+                      'input_fields': FLORIDA_FIELDS}),
               'nj': ([NEW_JERSEY_SCHEMA],
-                          {'sep' : '|',
-                           'has_header' : False,
-                           'input_fields' : NEW_JERSEY_FIELDS}),
+                     {'sep' : '|',
+                      'has_header' : False,
+                      'input_fields' : NEW_JERSEY_FIELDS}),
               'ny': ([NEW_YORK_SCHEMA],
-                           {'has_header': False,
-                            'input_fields': NEW_YORK_FIELDS}),
+                     {'has_header': False,
+                      'input_fields': NEW_YORK_FIELDS}),
               'nc': ([NORTH_CAROLINA_SCHEMA],
-                                 {'sep':'\t'}),
+                     {'sep':'\t'}),
               'pa': ([PENNSYLVANIA_SCHEMA],
-                               {'sep':'\t',
-                                'has_header': False,
-                                'input_fields': PA.transformer.StateTransformer.input_fields}),
+                     {'sep':'\t',
+                      'has_header': False,
+                      'input_fields': PA.transformer.StateTransformer.input_fields}),
               'mi': ([MICHIGAN_SCHEMA],
-                           {'input_fields': MI.transformer.StateTransformer.input_fields +
-                            ['ELECTION_DATE', 'ELECTION_TYPE', 'ABSENTEE_TYPE']}),
+                     {'input_fields': MI.transformer.StateTransformer.input_fields +
+                      ['ELECTION_DATE', 'ELECTION_TYPE', 'ABSENTEE_TYPE']}),
               'ut': ([UTAH_SCHEMA], {}),
               'vt': ([VERMONT_SCHEMA],
-                                 {'sep':'|'}),
+                     {'sep':'|'}),
               'wa': ([WASHINGTON_SCHEMA],
-                                {'sep':'\t'}),
-    }
-    keys = states.keys()
+                     {'sep':'\t'}),
+}
+
+
+if __name__ == '__main__':
+    keys = STATE_DATA.keys()
     if len(sys.argv) > 1:
         keys = sys.argv[1:]
     for state in keys:
-        args, kwargs = states[state]
+        args, kwargs = STATE_DATA[state]
         make_state_data(state, *args, **kwargs)
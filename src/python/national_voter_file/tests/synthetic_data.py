@@ -0,0 +1,911 @@
+import argparse
+import copy
+import csv
+import gzip
+import io
+import json
+import os
+import random
+import re
+import shutil
+import sys
+import tempfile
+import time
+import zipfile
+from array import array
+from bisect import bisect
+from contextlib import contextmanager
+from itertools import accumulate
+
+from national_voter_file.tests import faker_data
+from national_voter_file.tests.faker_data import STATE_DATA
+from national_voter_file.transformers.base import DATA_DIR
+from national_voter_file.us_states.all import load_dict as load_states
+
+"""
+# Synthetic voter files at scale
+
+faker_data.py calls Faker for every field of every row, which is fine for test
+fixtures but far too slow for the multi-GB files needed for load testing. This
+generator calls each faker_data schema function POOL_SIZE times up front, then
+renders random combinations of those values into fragments of a few columns
+each. Rows are assembled in bulk by joining one fragment per column group,
+which keeps most of the per-row work in C. Voter IDs are sequential, so every
+row is a distinct voter.
+
+Voters live in households, and households in sites: a house, or a unit of an
+apartment building (see Households). The residential address columns are
+picked by site, the mailing columns by household and everything else by voter,
+so voters of a household share their address, neighbours in a building differ
+only by unit, and the same voter renders the same row in every file. House
+numbers come from the site, so distinct sites are distinct addresses.
+
+Households cost about half the throughput. Each row looks up the voter's site,
+household and unit, and the files are shuffled so households don't sit in
+consecutive rows. On one core, 2M NC rows take about 17s (roughly 120k rows a
+second), where rows picked independently by voter ran at 240-280k rows a
+second.
+
+With --churn the generator writes a pair of monthly snapshots instead, where a
+known share of voters moved, registered or were removed between the two, and
+lists them in `churn.json`.
+
+Output is seeded and written in each state's native layout:
+
+* Michigan: fixed width `entire_state_v.lst` inside a zip
+* Pennsylvania: `Statewide.zip` with a FVE and a Zone Types file per county
+* Colorado: a zip of zipped voter list parts and gzipped vote history parts
+* everyone else: the delimited file (tab separated for FL, WA and NC) with the
+  state's default file name
+
+    python -m national_voter_file.tests.synthetic_data -s mi,pa -n 1000000 -o ./data
+    python -m national_voter_file.tests.synthetic_data -s nc -n 100000 --churn
+"""
+
+POOL_SIZE = 2000
+FRAGMENT_POOL_SIZE = 4096
+# Fragments picked by site or household, more of them so that few sites share
+# a street
+KEYED_FRAGMENT_POOL_SIZE = 65536
+FRAGMENT_COLUMNS = 16
+BATCH_ROWS = 50000
+# Independent fragment picks per row, see RowFactory.rows()
+INDEX_SLOTS = 3
+MAX_HOUSE_NUMBER = 9999
+# Knuth's multiplicative hash, spreads sites over PA's counties
+SITE_HASH = 2654435761
+# Fast deflate for the zipped layouts, ZipFile only takes a level from 3.7
+ZIP_OPTIONS = {'compresslevel': 1} if sys.version_info >= (3, 7) else {}
+
+# Registered voters per household, and how common each size is
+HOUSEHOLD_SIZES = [1, 2, 3, 4, 5, 6]
+HOUSEHOLD_SIZE_WEIGHTS = [40, 37, 12, 7, 3, 1]
+# Share of households living in apartment buildings, and the sizes of buildings
+APARTMENT_SHARE = 0.3
+BUILDING_UNITS = [4, 6, 8, 12, 16, 24, 48, 100, 200]
+
+# Monthly churn, as shares of the voters in the first snapshot
+MOVES = 0.02
+ADDITIONS = 0.015
+REMOVALS = 0.01
+# New registrations who join an existing household instead of a new one
+JOINING_SHARE = 0.5
+CHURN_MANIFEST = 'churn.json'
+
+# Input column holding the state voter ID, filled with sequential IDs
+STATE_ID_FIELDS = {
+    'co': 'VOTER_ID',
+    'de': 'UNIQUE-ID',
+    'fl': 'Voter ID',
+    'mi': 'STATE_VOTER_REF',
+    'nc': 'voter_reg_num',
+    'nj': 'VOTER ID',
+    'ny': 'SBOEID',
+    'oh': 'SOS_VOTERID',
+    'ok': 'VoterID',
+    'pa': 'STATE_VOTER_REF',
+    'ut': 'Voter ID',
+    'vt': 'VoterID',
+    'wa': 'StateVoterID',
+}
+
+# States whose native layout isn't their default_file
+NATIVE_FILES = {
+    'co': 'co_voters.zip',
+    'mi': 'mi_voters.zip',
+}
+
+PA_COUNTY_COUNT = 67
+PA_ZONE_TYPES = [('1', 'PR', 'Precinct'),
+                 ('3', 'SD', 'School District'),
+                 ('9', 'CO', 'County')]
+
+CO_PART_ROWS = 1000000
+CO_HISTORY_PER_VOTER = 2
+CO_HISTORY_FIELDS = ['VOTER_ID', 'COUNTY_NAME', 'ELECTION_DATE', 'ELECTION_NAME',
+                     'ELECTION_TYPE', 'VOTING_METHOD', 'PARTY', 'COUNTY_ID']
+CO_HISTORY_SCHEMA = {
+    'VOTER_ID': lambda: faker_data.fake.numerify(text='#######'),
+    'COUNTY_NAME': lambda: faker_data.fake.city().upper(),
+    'ELECTION_DATE': lambda: faker_data.fake.date(pattern='%m/%d/%Y'),
+    'ELECTION_NAME': lambda: '{} {} ELECTION'.format(
+        faker_data.fake.year(), random.choice(['GENERAL', 'PRIMARY', 'COORDINATED'])),
+    'ELECTION_TYPE': lambda: random.choice(['General', 'Primary', 'Coordinated',
+                                            'Municipal']),
+    'VOTING_METHOD': lambda: random.choice(['Mail Ballot', 'In Person',
+                                            'Early Voting', 'Absentee']),
+    'PARTY': lambda: random.choice(['DEM', 'REP', 'UAF', 'LBR', 'GRN']),
+    'COUNTY_ID': lambda: str(random.randint(1, 64)),
+}
+
+# Address columns of each state. `number` is the house number column, or
+# `street_address` a full street address that gets its number from the site.
+# `site` columns are shared by everyone in a building, `unit` and `unit_type`
+# tell its units apart (a unit column that is the street_address column is
+# appended to it), and `mailing` columns are shared by a household.
+ADDRESS_FIELDS = {
+    'co': {
+        'number': 'HOUSE_NUM',
+        'site': ['HOUSE_SUFFIX', 'PRE_DIR', 'STREET_NAME', 'STREET_TYPE',
+                 'POST_DIR', 'RESIDENTIAL_ADDRESS', 'RESIDENTIAL_CITY',
+                 'RESIDENTIAL_STATE', 'RESIDENTIAL_ZIP_CODE',
+                 'RESIDENTIAL_ZIP_PLUS'],
+        'unit': 'UNIT_NUM',
+        'unit_type': 'UNIT_TYPE',
+        'mailing': ['MAIL_ADDR1', 'MAIL_ADDR2', 'MAIL_ADDR3', 'MAILING_CITY',
+                    'MAILING_STATE', 'MAILING_ZIP_CODE', 'MAILING_ZIP_PLUS',
+                    'MAILING_COUNTRY'],
+    },
+    'de': {
+        'number': 'HOME-NO',
+        'site': ['HOME-STREET', 'HOME-DEV', 'HOME-CITY', 'HOME-ZIPCODE'],
+        'unit': 'HOME-APT',
+        'unit_format': 'APT {}',
+        'mailing': ['MAIL-NO', 'MAIL-APT', 'MAIL-STR', 'MAIL-CITY',
+                    'MAIL-STATE', 'MAIL-ZIP'],
+    },
+    'fl': {
+        'street_address': 'Residence Address Line 1',
+        'site': ['Residence City (USPS)', 'Residence State',
+                 'Residence Zipcode'],
+        'unit': 'Residence Address Line 2',
+        'unit_format': 'APT {}',
+        'mailing': ['Mailing Address Line 1', 'Mailing Address Line 2',
+                    'Mailing Address Line 3', 'Mailing City', 'Mailing State',
+                    'Mailing Zipcode', 'Mailing Country'],
+    },
+    'mi': {
+        'number': 'RESIDENCE_STREET_NUMBER',
+        'site': ['HOUSE_NUM_CHARACTER', 'HOUSE_SUFFIX', 'PRE_DIRECTION',
+                 'STREET_NAME', 'STREET_TYPE', 'SUFFIX_DIRECTION', 'CITY',
+                 'STATE', 'ZIP'],
+        'unit': 'RESIDENCE_EXTENSION',
+        'unit_format': 'APT {}',
+        'mailing': ['MAIL_ADDR_1', 'MAIL_ADDR_2', 'MAIL_ADDR_3', 'MAIL_ADDR_4',
+                    'MAIL_ADDR_5'],
+    },
+    'nc': {
+        'street_address': 'res_street_address',
+        'site': ['res_city_desc', 'state_cd', 'zip_code'],
+        'unit': 'res_street_address',
+        'unit_format': 'APT {}',
+        'mailing': ['mail_addr1', 'mail_addr2', 'mail_addr3', 'mail_addr4',
+                    'mail_city', 'mail_state', 'mail_zipcode'],
+    },
+    'nj': {
+        'number': 'STREET NUMBER',
+        'site': ['SUFF A', 'SUFF B', 'STREET NAME', 'CITY', 'MUNICIPALITY',
+                 'ZIP'],
+        'unit': 'APT/UNIT NO',
+    },
+    'ny': {
+        'number': 'RADDNUMBER',
+        'site': ['RHALFCODE', 'RPREDIRECTION', 'RSTREETNAME', 'RPOSTDIRECTION',
+                 'RCITY', 'RZIP5', 'RZIP4'],
+        'unit': 'RAPARTMENT',
+        'mailing': ['MAILADD1', 'MAILADD2', 'MAILADD3', 'MAILADD4'],
+    },
+    'oh': {
+        'street_address': 'RESIDENTIAL_ADDRESS1',
+        'site': ['RESIDENTIAL_CITY', 'RESIDENTIAL_STATE', 'RESIDENTIAL_ZIP',
+                 'RESIDENTIAL_ZIP_PLUS4', 'RESIDENTIAL_COUNTRY',
+                 'RESIDENTIAL_POSTCODE'],
+        'unit': 'RESIDENTIAL_SECONDARY_ADDR',
+        'unit_format': 'APT {}',
+        'mailing': ['MAILING_ADDRESS1', 'MAILING_SECONDARY_ADDRESS',
+                    'MAILING_CITY', 'MAILING_STATE', 'MAILING_ZIP',
+                    'MAILING_ZIP_PLUS4', 'MAILING_COUNTRY',
+                    'MAILING_POSTAL_CODE'],
+    },
+    'ok': {
+        'number': 'StreetNum',
+        'site': ['StreetDir', 'StreetName', 'StreetType', 'City', 'Zip'],
+        'unit': 'BldgNum',
+        'unit_format': 'APT {}',
+        'mailing': ['MailStreet1', 'MailStreet2', 'MailCity', 'MailState',
+                    'MailZip'],
+    },
+    'pa': {
+        'number': 'ADDRESS_NUMBER',
+        'site': ['ADDRESS_NUMBER_SUFFIX', 'STREET_NAME', '_ADDRESS_LINE2',
+                 '_REGISTRATION_CITY', 'STATE_NAME', 'ZIP_CODE'],
+        'unit': '_ADDRESS_APARTMENT_NUM',
+        'mailing': ['MAIL_ADDRESS_LINE1', 'MAIL_ADDRESS_LINE2', 'MAIL_CITY',
+                    'MAIL_STATE', 'MAIL_ZIP_CODE', 'MAIL_COUNTRY'],
+    },
+    'ut': {
+        'number': 'House Number',
+        'site': ['House Number Suffix', 'Direction Prefix', 'Street',
+                 'Direction Suffix', 'Street Type', 'City', 'Zip'],
+        'unit': 'Unit Number',
+        'unit_type': 'Unit Type',
+        'mailing': ['Mailing Address', 'Mailing city, state  zip'],
+    },
+    'vt': {
+        'street_address': 'Legal Address Line 1',
+        'site': ['Legal Address City', 'Legal Address State',
+                 'Legal Address Zip'],
+        'unit': 'Legal Address Line 2',
+        'unit_format': 'APT {}',
+        'mailing': ['Mailing Address City', 'Mailing Address Line 1',
+                    'Mailing Address Line 2', 'Mailing Address State',
+                    'Mailing Address Zip', 'Mailing Address in care of'],
+    },
+    'wa': {
+        'number': 'RegStNum',
+        'site': ['RegStFrac', 'RegStName', 'RegStType', 'RegStPreDirection',
+                 'RegStPostDirection', 'RegCity', 'RegState', 'RegZipCode'],
+        'unit': 'RegUnitNum',
+        'unit_type': 'RegUnitType',
+        'mailing': ['Mail1', 'Mail2', 'Mail3', 'Mail4', 'MailCity', 'MailZip',
+                    'MailState', 'MailCountry'],
+    },
+}
+
+
+def seed_all(seed):
+    random.seed(seed)
+    fake = faker_data.fake
+    if hasattr(fake, 'seed_instance'):
+        fake.seed_instance(seed)
+    else:
+        fake.seed(seed)
+
+
+def choices(rng, population, k, cum_weights=None):
+    """
+    rng.choices(population, cum_weights=cum_weights, k=k), which Python 3.4
+    and 3.5 lack
+    """
+    random_ = rng.random
+    if cum_weights is None:
+        n = len(population)
+        return [population[int(random_() * n)] for _ in range(k)]
+    total, hi = cum_weights[-1] + 0.0, len(cum_weights) - 1
+    return [population[bisect(cum_weights, random_() * total, 0, hi)]
+            for _ in range(k)]
+
+
+@contextmanager
+def zip_member(z, name, encoding):
+    """
+    Text file written to `name` in the ZipFile z. Streamed into the zip where
+    ZipFile.open() can write (Python 3.6), through a temporary file next to
+    the zip before that.
+    """
+    if sys.version_info >= (3, 6):
+        with z.open(name, 'w', force_zip64=True) as raw:
+            with io.TextIOWrapper(raw, encoding=encoding, newline='') as f:
+                yield f
+        return
+    fd, tmp_path = tempfile.mkstemp(
+        dir=os.path.dirname(os.path.abspath(z.filename)))
+    try:
+        with open(fd, 'w', encoding=encoding, newline='') as f:
+            yield f
+        z.write(tmp_path, name)
+    finally:
+        os.remove(tmp_path)
+
+
+def output_filename(state):
+    if state in NATIVE_FILES:
+        return NATIVE_FILES[state]
+    return load_states([state])[state].transformer.default_file
+
+
+class Households(object):
+    """
+    Where voters live. Voters are numbered from 1, each belongs to a household,
+    and each household to a site: a house of its own, or one unit of an
+    apartment building shared with other households. Buildings fill up one
+    unit at a time as households are added.
+
+    site, household and unit are indexed by voter number (unit is 0 outside of
+    apartment buildings), and order is the order voters appear in the file.
+    """
+
+    def __init__(self, rng, apartment_share=APARTMENT_SHARE,
+                 building_units=BUILDING_UNITS, sizes=HOUSEHOLD_SIZES,
+                 size_weights=HOUSEHOLD_SIZE_WEIGHTS):
+        self.rng = rng
+        self.apartment_share = apartment_share
+        self.building_units = building_units
+        self.sizes = sizes
+        self.cum_weights = list(accumulate(size_weights))
+        # Voter number 0 isn't used
+        self.site = array('q', [0])
+        self.household = array('q', [0])
+        self.unit = array('l', [0])
+        self.order = []
+        self.sites = 0
+        self.households = 0
+        self._building = 0
+        self._units_left = 0
+        self._next_unit = 0
+
+    @classmethod
+    def generate(cls, voters, rng, **kwargs):
+        """`voters` voters in new households, in random order"""
+        households = cls(rng, **kwargs)
+        households.order = households.add_voters(voters)
+        rng.shuffle(households.order)
+        return households
+
+    def _new_home(self):
+        """
+        Outputs:
+            (site, unit) of a new household, unit 0 for a house
+        """
+        self.households += 1
+        if self.rng.random() >= self.apartment_share:
+            self.sites += 1
+            return self.sites, 0
+        return self._new_unit()
+
+    def _new_unit(self):
+        """(site, unit) of the next unit of an apartment building"""
+        if not self._units_left:
+            self.sites += 1
+            self._building = self.sites
+            self._units_left = self.rng.choice(self.building_units)
+            self._next_unit = 0
+        self._units_left -= 1
+        self._next_unit += 1
+        return self._building, self._next_unit
+
+    def _add_voter(self, site, household, unit):
+        self.site.append(site)
+        self.household.append(household)
+        self.unit.append(unit)
+        return len(self.site) - 1
+
+    def add_voters(self, count):
+        """
+        Adds `count` voters in new households
+
+        Outputs:
+            Numbers of the new voters
+        """
+        first = len(self.site)
+        remaining = count
+        # _new_home() inlined and the arrays extended once, this loop runs
+        # once per household
+        random_, share = self.rng.random, self.apartment_share
+        sites, households, units = [], [], []
+        while remaining > 0:
+            for size in choices(self.rng, self.sizes, remaining // 2 + 1,
+                                self.cum_weights):
+                size = min(size, remaining)
+                self.households += 1
+                if random_() >= share:
+                    self.sites += 1
+                    site, unit = self.sites, 0
+                else:
+                    site, unit = self._new_unit()
+                sites += [site] * size
+                households += [self.households] * size
+                units += [unit] * size
+                remaining -= size
+                if not remaining:
+                    break
+        self.site.fromlist(sites)
+        self.household.fromlist(households)
+        self.unit.fromlist(units)
+        return list(range(first, first + count))
+
+    def addresses(self):
+        """Distinct residential addresses (site and unit) of the voters"""
+        return len(set((self.site[v], self.unit[v]) for v in self.order))
+
+    def churn(self, rng, moves=MOVES, additions=ADDITIONS, removals=REMOVALS):
+        """
+        The households a month later. Removed voters are dropped, whole
+        households move to new homes until `moves` of the voters have moved,
+        and new voters register, some of them in existing households. The
+        file keeps its order, with new voters at random places.
+
+        Inputs:
+            rng: random.Random for the changes
+            moves, additions, removals: shares of the current voters
+        Outputs:
+            (Households, dict of 'moved', 'added' and 'removed' voter numbers)
+        """
+        after = copy.copy(self)
+        after.rng = rng
+        after.site = array('q', self.site)
+        after.household = array('q', self.household)
+        after.unit = array('l', self.unit)
+
+        voters = len(self.order)
+        removed = set(rng.sample(self.order, int(round(voters * removals))))
+        remaining = [v for v in self.order if v not in removed]
+
+        members = {}
+        for v in remaining:
+            members.setdefault(self.household[v], []).append(v)
+        movers = list(members)
+        rng.shuffle(movers)
+        moved = []
+        target = int(round(voters * moves))
+        for household in movers:
+            if len(moved) >= target:
+                break
+            site, unit = after._new_home()
+            for v in members[household]:
+                after.site[v] = site
+                after.household[v] = after.households
+                after.unit[v] = unit
+                moved.append(v)
+
+        new_voters = int(round(voters * additions))
+        joining = int(new_voters * JOINING_SHARE) if remaining else 0
+        added = []
+        for _ in range(joining):
+            host = rng.choice(remaining)
+            added.append(after._add_voter(after.site[host],
+                                          after.household[host],
+                                          after.unit[host]))
+        added.extend(after.add_voters(new_voters - joining))
+
+        positions = sorted(rng.randrange(len(remaining) + 1) for _ in added)
+        after.order = []
+        previous = 0
+        for position, v in zip(positions, added):
+            after.order.extend(remaining[previous:position])
+            after.order.append(v)
+            previous = position
+        after.order.extend(remaining[previous:])
+        return after, {'moved': sorted(moved), 'added': added,
+                       'removed': sorted(removed)}
+
+
+class RowFactory(object):
+    """
+    Renders rows of one file layout from pools of pre-generated values.
+
+    Columns are split into groups at the ID column, constant columns and the
+    house number and unit columns. Each group has a pool of rendered fragments
+    made of values picked independently from the column pools, and a row is
+    the ID, constants, house number and unit plus one fragment per group.
+    Fragments are picked by hashing the voter number, or for address columns
+    the site or household, so rows depend only on who the voter is and where
+    they live.
+    """
+
+    def __init__(self, schema, fields, rng, id_field=None, constant_fields=(),
+                 sep=',', widths=None, pool_size=POOL_SIZE, address=None):
+        """
+        Inputs:
+            schema: faker_data style dict of column -> function
+            fields: columns in file order, missing from schema means empty
+            rng: random.Random used for the fragments and their picks
+            id_field: column filled with the ids passed to rows()
+            constant_fields: columns filled from the constants passed to rows()
+            sep: delimiter, ignored when widths is given
+            widths: column widths for fixed width files
+            address: the state's ADDRESS_FIELDS, without it every column is
+                picked by voter
+        """
+        self.sep = '' if widths else sep
+        self.widths = dict(zip(fields, widths)) if widths else None
+        self.id_field = id_field
+        address = address or {}
+        self.unit_format = address.get('unit_format', '{}')
+        # Rendered house numbers, and unit columns by format, see unit_values()
+        self.house_numbers = [str(n) for n in range(1, MAX_HOUSE_NUMBER + 1)]
+        self.unit_strings = {}
+        self.multipliers = [rng.randrange(1 << 31, 1 << 32) | 1
+                            for _ in range(INDEX_SLOTS + 2)]
+
+        pools = dict((f, [schema[f]() for _ in range(pool_size)])
+                     for f in fields if f in schema)
+        self.id_prefix, self.id_width = self._id_format(pools.get(id_field))
+
+        kinds = dict((f, 'site') for f in address.get('site', ()))
+        kinds.update((f, 'household') for f in address.get('mailing', ()))
+        kinds.update((f, 'constant') for f in constant_fields)
+        for kind in ('unit_type', 'unit', 'number', 'street_address'):
+            if address.get(kind):
+                kinds[address[kind]] = kind
+        kinds[id_field] = 'id'
+        self.keys = set(kinds.get(f, 'voter') for f in fields)
+
+        self.streets = None
+        if 'street_address' in self.keys:
+            # The street without its number, leaving out values that need quoting
+            field = address['street_address']
+            self.streets = [' ' + re.sub(r'^\d+\s*', '', v) for v in pools[field]
+                            if not re.search(r'["\n]', v) and sep not in v]
+            self.append_unit = address.get('unit') == field
+
+        # Split the columns into runs picked by the same key and single slots
+        self.layout = []
+        run, run_key = [], None
+        slots = {'voter': 0, 'site': 0, 'household': 0}
+        for f in list(fields) + [None]:
+            key = kinds.get(f, 'voter') if f is not None else None
+            if run and (key != run_key or len(run) == FRAGMENT_COLUMNS):
+                size = (FRAGMENT_POOL_SIZE if run_key == 'voter'
+                        else KEYED_FRAGMENT_POOL_SIZE)
+                columns = [choices(rng, pools[c], size) if c in pools
+                           else [''] * size for c in run]
+                fragments = self.render_many(zip(*columns), run)
+                self.layout.append((run_key, slots[run_key] % INDEX_SLOTS,
+                                    fragments))
+                slots[run_key] += 1
+                run = []
+            if f is None:
+                break
+            if key in slots:
+                run.append(f)
+                run_key = key
+            else:
+                self.layout.append((key, f))
+
+    @staticmethod
+    def _id_format(samples):
+        match = re.match(r'^(\D*)(\d+)$', samples[0]) if samples else None
+        if match:
+            return match.group(1), len(match.group(2))
+        return '', 9
+
+    def unit_values(self, units, template):
+        """template filled in with each unit number, '' for 0 (a house)"""
+        strings = self.unit_strings.setdefault(template, [''])
+        strings.extend(template.format(u)
+                       for u in range(len(strings), max(units, default=0) + 1))
+        return list(map(strings.__getitem__, units))
+
+    def format_ids(self, numbers):
+        prefix, width = self.id_prefix, self.id_width
+        return [prefix + str(n).zfill(width) for n in numbers]
+
+    def render(self, values, fields):
+        if self.widths is not None:
+            return ''.join(
+                str(v).encode('ascii', 'ignore').decode('ascii')
+                      .ljust(self.widths[f])[:self.widths[f]]
+                for v, f in zip(values, fields)
+            )
+        out = io.StringIO()
+        csv.writer(out, delimiter=self.sep, lineterminator='').writerow(values)
+        return out.getvalue()
+
+    def render_many(self, rows, fields):
+        if self.widths is not None:
+            return [self.render(values, fields) for values in rows]
+        # Faker values never hold a record separator
+        out = io.StringIO()
+        csv.writer(out, delimiter=self.sep, lineterminator='\x1e').writerows(rows)
+        return out.getvalue().split('\x1e')[:-1]
+
+    def header(self, fields):
+        return self.render(fields, fields)
+
+    def _pad(self, field, values):
+        if self.widths is None:
+            return values
+        width = self.widths[field]
+        return [v.ljust(width)[:width] for v in values]
+
+    def rows(self, voters, households, constants=None, ids=None):
+        """
+        Inputs:
+            voters: voter numbers, one per row
+            households: Households the voters belong to
+            constants: dict of constant column -> value
+            ids: voter numbers for the id column when it isn't `voters`
+        Outputs:
+            List of rendered rows, without line endings
+        """
+        keys = {'voter': voters}
+        if self.keys & set(['site', 'number', 'street_address']):
+            keys['site'] = list(map(households.site.__getitem__, voters))
+        if 'household' in self.keys:
+            keys['household'] = list(map(households.household.__getitem__,
+                                         voters))
+        if self.keys & set(['unit', 'unit_type', 'street_address']):
+            units = list(map(households.unit.__getitem__, voters))
+
+        # A handful of hashes per key, each shared by several groups, so two
+        # voters only get the same row if all of them collide
+        picks = {}
+        columns = []
+        for part in self.layout:
+            kind = part[0]
+            if len(part) == 3:
+                _, slot, fragments = part
+                index = picks.get((kind, slot))
+                if index is None:
+                    m, size = self.multipliers[slot], len(fragments)
+                    index = picks[(kind, slot)] = [(k * m >> 16) % size
+                                                   for k in keys[kind]]
+                columns.append(list(map(fragments.__getitem__, index)))
+                continue
+
+            field = part[1]
+            if kind == 'id':
+                # IDs are plain digits and letters, nothing to quote
+                values = self.format_ids(voters if ids is None else ids)
+            elif kind == 'constant':
+                values = [self.render([constants[field]], [field])] * len(voters)
+            elif kind == 'number':
+                m, numbers = self.multipliers[INDEX_SLOTS], self.house_numbers
+                values = [numbers[(s * m >> 16) % MAX_HOUSE_NUMBER]
+                          for s in keys['site']]
+            elif kind == 'street_address':
+                m, n = self.multipliers[INDEX_SLOTS], self.multipliers[INDEX_SLOTS + 1]
+                numbers, streets = self.house_numbers, self.streets
+                count = len(streets)
+                values = [numbers[(s * m >> 16) % MAX_HOUSE_NUMBER] +
+                          streets[(s * n >> 16) % count] for s in keys['site']]
+                if self.append_unit:
+                    values = list(map(str.__add__, values, self.unit_values(
+                        units, ' ' + self.unit_format)))
+            elif kind == 'unit':
+                values = self.unit_values(units, self.unit_format)
+            else:
+                values = self.unit_values(units, 'APT')
+            columns.append(self._pad(field, values))
+        return list(map(self.sep.join, zip(*columns)))
+
+
+def write_rows(outfile, factory, voters, households, constants=None):
+    """Writes the rows of `voters` in batches"""
+    for start in range(0, len(voters), BATCH_ROWS):
+        rows = factory.rows(voters[start:start + BATCH_ROWS], households,
+                            constants)
+        outfile.write('\n'.join(rows))
+        outfile.write('\n')
+
+
+def state_factory(state, rng, pool_size=POOL_SIZE, **kwargs):
+    (schema,), options = STATE_DATA[state]
+    fields = options.get('input_fields') or list(schema.keys())
+    return RowFactory(schema, fields, rng, id_field=STATE_ID_FIELDS[state],
+                      sep=options.get('sep', ','), pool_size=pool_size,
+                      address=ADDRESS_FIELDS.get(state), **kwargs), fields, options
+
+
+def write_delimited(state, path, households, rng, pool_size=POOL_SIZE):
+    factory, fields, options = state_factory(state, rng, pool_size)
+    with open(path, 'w', newline='') as f:
+        if options.get('has_header', True):
+            f.write(factory.header(fields) + '\n')
+        write_rows(f, factory, households.order, households)
+    return factory
+
+
+def write_mi(path, households, rng, pool_size=POOL_SIZE):
+    mi = load_states(['mi'])['mi'].transformer
+    fields = mi.StateTransformer.input_fields
+    indices = mi.StatePreparer.col_indices
+    # Some of Michigan's columns overlap, each one ends where the next starts
+    widths = [min(end, next_start) - start for (start, end), (next_start, _)
+              in zip(indices, list(indices[1:]) + [(indices[-1][1], None)])]
+    (schema,), _ = STATE_DATA['mi']
+    factory = RowFactory(schema, fields, rng, id_field=STATE_ID_FIELDS['mi'],
+                         widths=widths, pool_size=pool_size,
+                         address=ADDRESS_FIELDS['mi'])
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED, **ZIP_OPTIONS) as z:
+        with zip_member(z, 'entire_state_v.lst', 'ascii') as f:
+            write_rows(f, factory, households.order, households)
+    return factory
+
+
+def write_pa(path, households, rng, pool_size=POOL_SIZE,
+             counties=PA_COUNTY_COUNT):
+    factory, fields, _ = state_factory('pa', rng, pool_size,
+                                       constant_fields=['COUNTYCODE'])
+    # Counties go by site, so a voter only changes county by moving
+    by_county = [[] for _ in range(counties)]
+    for v in households.order:
+        by_county[(households.site[v] * SITE_HASH >> 16) % counties].append(v)
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED, **ZIP_OPTIONS) as z:
+        for i, voters in enumerate(by_county):
+            county = 'COUNTY{:02d}'.format(i + 1)
+            fve = '{} FVE 20170102.txt'.format(county)
+            with zip_member(z, fve, 'utf-8') as f:
+                write_rows(f, factory, voters, households,
+                           {'COUNTYCODE': county})
+            z.writestr('{} Zone Types 20170102.txt'.format(county), ''.join(
+                '\t'.join((county,) + zone) + '\n' for zone in PA_ZONE_TYPES
+            ))
+    return factory
+
+
+def write_co(path, households, rng, pool_size=POOL_SIZE,
+             part_rows=CO_PART_ROWS, history_per_voter=CO_HISTORY_PER_VOTER):
+    factory, fields, _ = state_factory('co', rng, pool_size)
+    history = RowFactory(CO_HISTORY_SCHEMA, CO_HISTORY_FIELDS, rng,
+                         id_field='VOTER_ID', pool_size=pool_size)
+    history.id_prefix, history.id_width = factory.id_prefix, factory.id_width
+    tmp_dir = tempfile.mkdtemp(prefix='nvf_synthetic_',
+                               dir=os.path.dirname(os.path.abspath(path)))
+    order = households.order
+    try:
+        with zipfile.ZipFile(path, 'w', zipfile.ZIP_STORED) as z:
+            for part, start in enumerate(range(0, len(order), part_rows), 1):
+                voters = order[start:start + part_rows]
+                name = 'Registered_Voters_List_ Part{}'.format(part)
+                inner_path = os.path.join(tmp_dir, name + '.zip')
+                with zipfile.ZipFile(inner_path, 'w', zipfile.ZIP_DEFLATED,
+                                     **ZIP_OPTIONS) as inner:
+                    with zip_member(inner, name + '.txt', 'utf-8') as f:
+                        f.write(factory.header(fields) + '\n')
+                        write_rows(f, factory, voters, households)
+                z.write(inner_path, name + '.zip')
+                os.remove(inner_path)
+
+                name = 'Master_Voting_History_List_ Part{}'.format(part)
+                gz_path = os.path.join(tmp_dir, name + '.gz')
+                with gzip.open(gz_path, 'wt', compresslevel=1, newline='') as f:
+                    f.write(history.header(CO_HISTORY_FIELDS) + '\n')
+                    remaining = len(voters) * history_per_voter
+                    while remaining:
+                        n = min(remaining, BATCH_ROWS)
+                        # Picked by row, so a voter's elections differ
+                        rows = history.rows(list(range(remaining - n, remaining)),
+                                            None, ids=choices(rng, voters, n))
+                        f.write('\n'.join(rows))
+                        f.write('\n')
+                        remaining -= n
+                z.write(gz_path, name + '.gz')
+                os.remove(gz_path)
+    finally:
+        shutil.rmtree(tmp_dir)
+    return factory
+
+
+def write_state(state, path, rows, seed=0, pool_size=POOL_SIZE,
+                apartment_share=APARTMENT_SHARE, households=None):
+    """
+    Writes `rows` voters for `state` to `path` in the state's native layout
+
+    Inputs:
+        state: postal initials
+        path: output file, see output_filename() for the usual name
+        rows: number of voters
+        seed: seed for Faker and the row assembly
+        apartment_share: share of households in apartment buildings
+        households: Households to write instead of `rows` new voters
+    Outputs:
+        The RowFactory of the voter file
+    """
+    if households is None:
+        households = Households.generate(rows, random.Random(seed),
+                                         apartment_share=apartment_share)
+    seed_all(seed)
+    rng = random.Random(seed)
+    if state == 'mi':
+        return write_mi(path, households, rng, pool_size)
+    elif state == 'pa':
+        return write_pa(path, households, rng, pool_size)
+    elif state == 'co':
+        return write_co(path, households, rng, pool_size)
+    return write_delimited(state, path, households, rng, pool_size)
+
+
+def write_snapshot_pair(state, directory, rows, seed=0, pool_size=POOL_SIZE,
+                        apartment_share=APARTMENT_SHARE, moves=MOVES,
+                        additions=ADDITIONS, removals=REMOVALS):
+    """
+    Writes two monthly snapshots of `state` to `snapshot_1` and `snapshot_2`
+    under `directory`, and what changed between them to `churn.json`. Voters
+    who didn't move have the same row in both.
+
+    Outputs:
+        The churn.json dict: voters, households and addresses per snapshot,
+        and the IDs of the voters who moved, registered and were removed
+    """
+    before = Households.generate(rows, random.Random(seed),
+                                 apartment_share=apartment_share)
+    after, changes = before.churn(random.Random(seed + 1), moves, additions,
+                                  removals)
+    paths = []
+    for name, households in (('snapshot_1', before), ('snapshot_2', after)):
+        path = os.path.join(directory, name, output_filename(state))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        factory = write_state(state, path, rows, seed=seed, pool_size=pool_size,
+                              households=households)
+        paths.append(path)
+
+    manifest = {
+        'state': state,
+        'seed': seed,
+        'snapshots': paths,
+        'rates': {'moves': moves, 'additions': additions, 'removals': removals},
+        'voters': [len(before.order), len(after.order)],
+        'households': [len(set(map(h.household.__getitem__, h.order)))
+                       for h in (before, after)],
+        'addresses': [before.addresses(), after.addresses()],
+    }
+    for change, voters in changes.items():
+        manifest[change] = factory.format_ids(voters)
+    with open(os.path.join(directory, CHURN_MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Generate large synthetic voter files in native layouts'
+    )
+    parser.add_argument('-s', '--states', default=','.join(sorted(STATE_DATA)),
+                        help='comma-separated states (default: all)')
+    parser.add_argument('-n', '--rows', type=int, default=1000000,
+                        help='voters per state (default 1000000)')
+    parser.add_argument('-o', '--outputdir', dest='output_path', default=DATA_DIR,
+                        help='files go in <outputdir>/<state>/ (default ./data/)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--pool-size', dest='pool_size', type=int,
+                        default=POOL_SIZE,
+                        help='faker calls per column (default {})'.format(POOL_SIZE))
+    parser.add_argument('--apartment-share', dest='apartment_share', type=float,
+                        default=APARTMENT_SHARE,
+                        help='share of households in apartment buildings '
+                             '(default {})'.format(APARTMENT_SHARE))
+    parser.add_argument('--churn', action='store_true',
+                        help='write two monthly snapshots and churn.json to '
+                             '<outputdir>/<state>/ instead of one file')
+    parser.add_argument('--moves', type=float, default=MOVES,
+                        help='share of voters moving between snapshots '
+                             '(default {})'.format(MOVES))
+    parser.add_argument('--additions', type=float, default=ADDITIONS,
+                        help='new registrations as a share of voters '
+                             '(default {})'.format(ADDITIONS))
+    parser.add_argument('--removals', type=float, default=REMOVALS,
+                        help='share of voters removed (default {})'.format(REMOVALS))
+    args = parser.parse_args()
+
+    for state in args.states.split(','):
+        state_dir = os.path.join(args.output_path, state)
+        os.makedirs(state_dir, exist_ok=True)
+        started = time.time()
+        if args.churn:
+            manifest = write_snapshot_pair(
+                state, state_dir, args.rows, seed=args.seed,
+                pool_size=args.pool_size,
+                apartment_share=args.apartment_share, moves=args.moves,
+                additions=args.additions, removals=args.removals
+            )
+            print('{}: {:,} -> {:,} voters, {:,} moved, {:,} added, {:,} '
+                  'removed in {:.1f}s -> {}'.format(
+                      state, manifest['voters'][0], manifest['voters'][1],
+                      len(manifest['moved']), len(manifest['added']),
+                      len(manifest['removed']), time.time() - started,
+                      state_dir))
+            continue
+        path = os.path.join(state_dir, output_filename(state))
+        write_state(state, path, args.rows, seed=args.seed,
+                    pool_size=args.pool_size,
+                    apartment_share=args.apartment_share)
+        seconds = time.time() - started
+        print('{}: {:,} rows in {:.1f}s ({:,.0f} rows/s, {:.1f} MB) -> {}'.format(
+            state, args.rows, seconds, args.rows / seconds,
+            os.path.getsize(path) / 2.0 ** 20, path))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,298 @@
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from unittest import mock
+
+import pandas as pd
+
+from utils.censusreporter import censusreporter_api as api
+from utils.censusreporter import download_cache
+
+# load/ isn't a package, its modules import each other by name
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', '..', '..', '..', 'load'))
+import jurisdictions  # noqa: E402
+from census_columns import CENSUS_COLUMNS  # noqa: E402
+
+TABLES = ['B01001']
+DATA = {'data': {'04000US26': {'B01001': {'estimate': {'B01001001': 10}}}}}
+MISSING = {'error': "The acs2015_5yr release doesn't include GeoID(s) "
+                    "04000US99 / x."}
+
+
+class FakeResponse(object):
+
+    def __init__(self, status_code, data=None, content=b''):
+        self.status_code = status_code
+        self.data = data
+        self.content = content
+        self.headers = {'ETag': '"1"'} if status_code == 200 else {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def json(self):
+        return self.data
+
+    def iter_content(self, chunk_size=None):
+        yield self.content
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise AssertionError('HTTP {}'.format(self.status_code))
+
+
+class FakeSession(object):
+    """Answers GETs with the (status, data) pairs given, the last one over
+    and over"""
+
+    def __init__(self, *answers):
+        self.answers = list(answers)
+        self.urls = []
+
+    def get(self, url, timeout=None):
+        self.urls.append(url)
+        status_code, data = self.answers[min(len(self.urls), len(self.answers)) - 1]
+        return FakeResponse(status_code, data)
+
+
+cache_dir = None
+settings = None
+
+
+def setup():
+    global cache_dir, settings
+    cache_dir = tempfile.mkdtemp()
+    settings = (api.CACHE_DIR, api.CACHE_TTL, api.OFFLINE, api.BACKOFF_SECONDS,
+                download_cache.DOWNLOAD_DIR, download_cache.OFFLINE)
+    api.BACKOFF_SECONDS = 0
+
+
+def teardown():
+    api.configure_cache(*settings[:3])
+    api.BACKOFF_SECONDS = settings[3]
+    download_cache.configure_downloads(*settings[4:])
+    shutil.rmtree(cache_dir)
+
+
+def fresh_cache(name, **kwargs):
+    path = os.path.join(cache_dir, name)
+    api.configure_cache(path, **kwargs)
+    return path
+
+
+def test_response_cache():
+    fresh_cache('responses', ttl=60)
+    session = FakeSession((200, DATA))
+    with mock.patch.object(api, 'session', return_value=session):
+        assert api.get_url_response(TABLES, ['04000US26'], 'acs2015_5yr') == DATA
+        # Table and geoid order don't matter
+        assert api.get_url_response(['b01001'], ['04000US26'], 'acs2015_5yr') == DATA
+    assert len(session.urls) == 1
+
+    # Once older than the TTL the response is fetched again
+    path = api._cache_path(TABLES, ['04000US26'], 'acs2015_5yr')
+    with open(path) as f:
+        cached = json.load(f)
+    cached['fetched'] = time.time() - 120
+    with open(path, 'w') as f:
+        json.dump(cached, f)
+    with mock.patch.object(api, 'session', return_value=session):
+        api.get_url_response(TABLES, ['04000US26'], 'acs2015_5yr')
+    assert len(session.urls) == 2
+
+
+def test_concurrent_cache_writes():
+    # The fetch threads of one run share a pid, and may write the same entry
+    fresh_cache('threads')
+    path = api._cache_path(TABLES, ['04000US26'], 'acs2015_5yr')
+    errors = []
+
+    def write():
+        try:
+            for _ in range(50):
+                api._write_cache(path, 'url', DATA)
+        except OSError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=write) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    assert os.listdir(os.path.dirname(path)) == [os.path.basename(path)]
+    with open(path) as f:
+        assert json.load(f)['response'] == DATA
+
+
+def test_offline_replay():
+    path = fresh_cache('offline')
+    session = FakeSession((200, DATA))
+    with mock.patch.object(api, 'session', return_value=session):
+        api.get_url_response(TABLES, ['04000US26'], 'acs2015_5yr')
+
+    api.configure_cache(path, ttl=0.001, offline=True)
+    time.sleep(0.01)
+    with mock.patch.object(api, 'session', return_value=session):
+        # Offline, stale responses are replayed too
+        assert api.get_url_response(TABLES, ['04000US26'], 'acs2015_5yr') == DATA
+        try:
+            api.get_url_response(TABLES, ['04000US36'], 'acs2015_5yr')
+        except api.CacheMiss:
+            pass
+        else:
+            raise AssertionError('offline request that is not cached')
+    assert len(session.urls) == 1
+
+
+def test_retries():
+    fresh_cache('retries')
+    session = FakeSession((503, {'error': 'unavailable'}), (200, DATA))
+    with mock.patch.object(api, 'session', return_value=session):
+        assert api.get_url_response(TABLES, ['04000US26'], 'acs2015_5yr') == DATA
+    assert len(session.urls) == 2
+
+    # Rate limits that outlast the retries are returned, but never cached
+    limited = {'error': 'Too many requests'}
+    session = FakeSession((429, limited))
+    with mock.patch.object(api, 'session', return_value=session):
+        assert api.get_url_response(TABLES, ['04000US36'], 'acs2015_5yr') == limited
+        assert api.get_url_response(TABLES, ['04000US36'], 'acs2015_5yr') == limited
+    assert len(session.urls) == 2 * api.MAX_TRIES
+    assert not os.path.exists(api._cache_path(TABLES, ['04000US36'], 'acs2015_5yr'))
+
+    # Geoids the release lacks are an answer, and are kept
+    session = FakeSession((400, MISSING))
+    with mock.patch.object(api, 'session', return_value=session):
+        api.get_url_response(TABLES, ['04000US99'], 'acs2015_5yr')
+        assert api.get_url_response(TABLES, ['04000US99'], 'acs2015_5yr') == MISSING
+    assert len(session.urls) == 1
+
+
+def test_missing_geoids_expire():
+    path = fresh_cache('geoids', ttl=60)
+    session = FakeSession((400, MISSING), (200, DATA))
+    with mock.patch.object(api, 'session', return_value=session):
+        responses = list(api.iter_responses(TABLES, ['04000US26', '04000US99'],
+                                            'latest'))
+    assert responses == [DATA]
+    api.save_geoid_indexes()
+
+    # A later run leaves the missing geoid out up front
+    api.configure_cache(path, ttl=60)
+    index = api.geoid_index('latest')
+    assert index.filter(['04000US26', '04000US99']) == ['04000US26']
+
+    # Once it's older than the TTL it's asked for again, 'latest' may have
+    # moved on to a release that has it
+    index.missing['04000US99'] -= 120
+    assert index.filter(['04000US26', '04000US99']) == ['04000US26', '04000US99']
+    index.add(valid=['04000US99'])
+    api.save_geoid_indexes()
+    with open(os.path.join(path, 'latest', 'geoids.json')) as f:
+        saved = json.load(f)
+    assert saved == {'valid': ['04000US26', '04000US99'], 'missing': {}}
+
+
+def test_offline_downloads():
+    # What getCensus.py does online, then the same offline
+    download_dir = os.path.join(cache_dir, 'downloads')
+    year_url = 'http://x/2026_Gazetteer/'
+    missing_url = 'http://x/2027_Gazetteer/'
+    zip_url = 'http://x/2026_Gazetteer/counties.zip'
+
+    def head(url, **kwargs):
+        return FakeResponse(404 if url == missing_url else 200)
+
+    def get(url, **kwargs):
+        return FakeResponse(200, content=b'zip')
+
+    download_cache.configure_downloads(download_dir)
+    with mock.patch.object(download_cache.requests, 'head', side_effect=head), \
+            mock.patch.object(download_cache.requests, 'get', side_effect=get):
+        assert download_cache.url_exists(year_url)
+        assert not download_cache.url_exists(missing_url)
+        path = download_cache.cached_download(zip_url)
+
+    download_cache.configure_downloads(download_dir, offline=True)
+    with mock.patch.object(download_cache.requests, 'head') as offline_head, \
+            mock.patch.object(download_cache.requests, 'get') as offline_get:
+        assert download_cache.url_exists(year_url)
+        assert not download_cache.url_exists(missing_url)
+        assert download_cache.cached_download(zip_url) == path
+        try:
+            download_cache.url_exists('http://x/2028_Gazetteer/')
+        except download_cache.NotCached:
+            pass
+        else:
+            raise AssertionError('offline check of a URL never checked')
+    assert not offline_head.called and not offline_get.called
+    with open(path, 'rb') as f:
+        assert f.read() == b'zip'
+
+
+def test_parquet_support():
+    def versions(pandas, pyarrow):
+        return mock.patch.dict(sys.modules, {
+            'pandas': mock.Mock(__version__=pandas),
+            'pyarrow': mock.Mock(__version__=pyarrow)})
+
+    with versions('0.24.2', '0.15.1'):
+        jurisdictions.check_parquet_support()
+    # What load/requirements.txt pinned before, which can't read the dataset
+    for old in [('0.20.3', '0.15.1'), ('0.24.2', '0.7.1')]:
+        with versions(*old):
+            try:
+                jurisdictions.check_parquet_support()
+            except ImportError:
+                pass
+            else:
+                raise AssertionError('pandas {} and pyarrow {} accepted'.format(*old))
+
+
+def test_jurisdiction_rows():
+    lookup_path = os.path.join(cache_dir, 'countyLookup.csv')
+    with open(lookup_path, 'w') as f:
+        f.write('COUNTY_NAME,COUNTY_CODE,COUNTYFP,CLASSFP,STATE,TYPE\n'
+                'Alamance County,1,1,H1,NC,county\n'
+                'Alexander County,2,3,H1,NC,county\n')
+    lookup = jurisdictions.read_county_lookup(lookup_path)
+
+    estimates = [name for _, name in CENSUS_COLUMNS]
+    columns = {
+        'FIPS': ['05000US37003', '05000US37999', '50000US3701'],
+        'GEOID': ['37003', '37999', '3701'],
+        'STATEFP': ['37', '37', 37],
+        'USPS': ['NC', 'NC', 'NC'],
+        'NAME': ['Alexander County', 'Nowhere County', 'Congressional 1'],
+        'ENTITYTYPE': ['county', 'county', 'congress'],
+        'VOTER_FILE_ID': ['3', None, '1'],
+    }
+    columns.update((name, [n, None, 2.0]) for n, name in enumerate(estimates))
+    df = pd.DataFrame(columns)
+    rows = list(jurisdictions.jurisdiction_rows(df, lookup))
+    names = jurisdictions.COLUMNS
+    assert all(len(row) == len(names) for row in rows)
+
+    county, unknown, congress = [dict(zip(names, row)) for row in rows]
+    # Counties take the voter file code of GEOID - STATEFP * 1000
+    assert county['VOTER_FILE_CODE'] == '2'
+    assert unknown['VOTER_FILE_CODE'] is None
+    # Anything else passes VOTER_FILE_ID through
+    assert congress['VOTER_FILE_CODE'] == '1'
+    assert congress['STATE_FIPS'] == '37'
+    assert (county['VERSION'], county['VALID_FROM'], county['VALID_TO']) == \
+        (1, '2015-12-31', '2999-12-31')
+    # Blank estimates are NULL, the rest integers
+    assert county[CENSUS_COLUMNS[1][0]] == 1
+    assert unknown[CENSUS_COLUMNS[0][0]] is None
+    assert unknown[CENSUS_COLUMNS[1][0]] is None
+    assert congress[CENSUS_COLUMNS[1][0]] == 2
@@ -0,0 +1,122 @@
+import csv
+import os
+import shutil
+import tempfile
+import tracemalloc
+
+from national_voter_file.tests.synthetic_data import output_filename, write_state
+from national_voter_file.transformers.base import BasePreparer
+from national_voter_file.us_states.all import load as load_states
+from utils.ocdidreporter import pull_ocdid_data
+
+"""
+Peak memory of the preparers. Each one reads a small and a large generated
+input under tracemalloc, and streaming means the peak stays under a fixed
+bound and doesn't grow with the input.
+"""
+
+MEMORY_STATES = ['co', 'de', 'fl', 'mi', 'nc', 'nj', 'ny', 'oh', 'ok', 'pa',
+                 'ut', 'vt', 'wa']
+MEMORY_HISTORY_STATES = ['co']
+SMALL_ROWS = 5000
+LARGE_ROWS = 20000
+# Faker calls per column, the inputs only need to be big
+POOL_SIZE = 200
+
+# Python memory a preparer may hold at once while streaming
+PEAK_BOUND = 4 * 2 ** 20
+# Extra peak allowed for the input four times as large
+GROWTH_BOUND = 256 * 1024
+
+INPUT_DIR = None
+
+
+def setup():
+    global INPUT_DIR
+    INPUT_DIR = tempfile.mkdtemp(prefix='nvf_memory_')
+
+
+def teardown():
+    shutil.rmtree(INPUT_DIR)
+
+
+def input_path(state, rows):
+    path = os.path.join(INPUT_DIR, '{}_{}_{}'.format(state, rows,
+                                                     output_filename(state)))
+    if not os.path.exists(path):
+        write_state(state, path, rows, pool_size=POOL_SIZE)
+    return path
+
+
+def traced_peak(func):
+    """
+    Outputs:
+        (return value of func, peak bytes traced while it ran)
+    """
+    tracemalloc.start()
+    try:
+        result = func()
+        return result, tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def assert_streams(name, small_peak, large_peak):
+    assert large_peak < PEAK_BOUND, \
+        '{} peaked at {} bytes'.format(name, large_peak)
+    assert large_peak - small_peak < GROWTH_BOUND, \
+        '{} peak grew from {} to {} bytes'.format(name, small_peak, large_peak)
+
+
+def preparer_peak(state, rows, history=False):
+    state_mod = load_states([state])[0]
+    preparer = getattr(state_mod.transformer,
+                       'StatePreparer',
+                       BasePreparer)(input_path(state, rows),
+                                     state,
+                                     state_mod.transformer,
+                                     state_mod.transformer.StateTransformer(),
+                                     history=history)
+    count, peak = traced_peak(lambda: sum(1 for _ in preparer.process()))
+    if not history:
+        assert count == rows, '{} read {} of {} rows'.format(state, count, rows)
+    return peak
+
+
+def run_preparer_memory(state, history=False):
+    small = preparer_peak(state, SMALL_ROWS, history)
+    large = preparer_peak(state, LARGE_ROWS, history)
+    assert_streams(state, small, large)
+
+
+def test_preparer_memory():
+    for state in MEMORY_STATES:
+        yield (run_preparer_memory, state)
+
+
+def test_preparer_history_memory():
+    for state in MEMORY_HISTORY_STATES:
+        yield (run_preparer_memory, state, True)
+
+
+def ocdid_peak(rows):
+    csv_path = os.path.join(INPUT_DIR, 'country-us_{}.csv'.format(rows))
+    with open(csv_path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['id', 'name'])
+        for i in range(rows):
+            writer.writerow([
+                'ocd-division/country:us/state:s{}/county:c{}/place:p{}'.format(
+                    i % 50, i % 700, i),
+                'Place {}'.format(i)
+            ])
+    database = os.path.join(INPUT_DIR, 'ocd-id_{}.sqlite.db'.format(rows))
+    with open(csv_path, newline='') as f:
+        _, peak = traced_peak(lambda: pull_ocdid_data.load(f, database))
+    return peak
+
+
+def test_ocdid_memory():
+    small = ocdid_peak(SMALL_ROWS)
+    large = ocdid_peak(LARGE_ROWS)
+    assert_streams('pull_ocdid_data', small, large)
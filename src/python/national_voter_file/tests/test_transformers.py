@@ -1,12 +1,35 @@
 import os
 import csv
+import io
+import shutil
+import tempfile
 
+import usaddress
+
+from national_voter_file.transformers import base as transformer_base
+from national_voter_file.transformers.address_pool import AddressParserPool
 from national_voter_file.transformers.base import (DATA_DIR,
                                                    BasePreparer,
-                                                   BaseTransformer)
+                                                   BaseTransformer,
+                                                   parse_address)
 from national_voter_file.us_states.all import load as load_states
 
 from national_voter_file.transformers.csv_transformer import CsvOutput
+from national_voter_file.transformers.fast_tagger import tag as rule_tag
+from national_voter_file.transformers.dimensions import (HOUSEHOLD_KEY,
+                                                         MAILING_ADDRESS_KEY,
+                                                         dimension_paths)
+from national_voter_file.transformers.districts import (PolygonLayer,
+                                                        points_in_rings)
+from national_voter_file.transformers.geocoder import (INTERPOLATED,
+                                                       NOT_GEOCODED,
+                                                       STREET_MATCH,
+                                                       AddressRangeIndex)
+from national_voter_file.transformers.line_index import LineIndex, scan
+from national_voter_file.transformers.standardize import (SUFFIX_ABBREVIATIONS,
+                                                          standardize_components,
+                                                          standardize_value)
+from national_voter_file.transformers.tagger_agreement import compare
 
 # Need to add test data
 
@@ -28,7 +51,8 @@ TEST_HISTORY = {'Michigan': 'MI', 'Ohio': 'OH'}
 # Because tests assert for existence of files, remove any _test.csv before tests
 def setup():
     test_files = [f for f in os.listdir(TEST_DATA_DIR)
-                  if f.endswith('_test.csv') or f.endswith('_test_hist.csv')]
+                  if f.endswith('_test.csv') or f.endswith('_test_hist.csv')
+                  or '_test_' in f]
     for t in test_files:
         os.remove(os.path.join(TEST_DATA_DIR, t))
 
@@ -105,3 +129,448 @@ def test_all_transformers():
 def test_all_transformers_history():
     for state_test in load_states([x.lower() for x in TEST_HISTORY.values()]):
         yield (run_transformer_history, state_test)
+
+
+def run_dimension_output(state_test, max_in_memory):
+    state_path = state_test.transformer.StatePreparer.state_path
+    input_path = os.path.join(TEST_DATA_DIR, '{}.csv'.format(state_path))
+    output_path = os.path.join(TEST_DATA_DIR,
+                               '{}_dim{}_test.csv'.format(state_path, max_in_memory))
+
+    state_transformer = state_test.transformer.StateTransformer()
+    state_preparer = state_test.transformer.StatePreparer(input_path,
+                                                          state_path,
+                                                          state_test.transformer,
+                                                          state_transformer)
+    writer = CsvOutput(state_transformer, dimensions=True,
+                       dimension_memory=max_in_memory)
+    writer(state_preparer.process(), output_path)
+
+    with open(output_path) as f:
+        voters = list(csv.DictReader(f))
+    dims = []
+    for path in dimension_paths(output_path):
+        with open(path) as f:
+            dims.append(list(csv.DictReader(f)))
+    households, mailing_addresses = dims
+
+    assert 'RAW_ADDR1' not in voters[0] and 'MAIL_CITY' not in voters[0]
+    report = writer.telemetry.report()
+    assert report['rows'] == len(voters)
+    assert report['caches']['households']['misses'] == len(households)
+    assert report['caches']['households']['hits'] == len(voters) - len(households)
+    for rows, key in ((households, HOUSEHOLD_KEY),
+                      (mailing_addresses, MAILING_ADDRESS_KEY)):
+        hashes = [r['HASHCODE'] for r in rows]
+        assert len(hashes) == len(set(hashes))
+        assert set(hashes) == set(v[key] for v in voters)
+    return len(households), len(mailing_addresses)
+
+
+def test_dimension_output():
+    # A memory limit of 2 forces nearly every address through the spill files
+    state_test = load_states(['nj'])[0]
+    assert run_dimension_output(state_test, 2) == \
+        run_dimension_output(state_test, 10000)
+
+
+def run_address_batch(state_test, address_batch, address_workers=0,
+                      fast_tagger=False):
+    state_path = state_test.transformer.StatePreparer.state_path
+    input_path = os.path.join(TEST_DATA_DIR, '{}.csv'.format(state_path))
+    output_path = os.path.join(TEST_DATA_DIR, '{}_address_batch_{}_{}_test.csv'.format(
+        state_path, address_batch, address_workers))
+
+    state_transformer = state_test.transformer.StateTransformer()
+    state_transformer.fast_tagger = fast_tagger
+    state_preparer = state_test.transformer.StatePreparer(input_path,
+                                                          state_path,
+                                                          state_test.transformer,
+                                                          state_transformer)
+    writer = CsvOutput(state_transformer, address_batch=address_batch,
+                       address_workers=address_workers)
+    writer(state_preparer.process(), output_path)
+    assert state_transformer.address_batch is None
+    with open(output_path) as f:
+        rows = list(csv.DictReader(f))
+    if fast_tagger:
+        return rows, writer.telemetry.caches.get('fast_tagger')
+    return rows, writer.telemetry.caches.get('addresses')
+
+
+def test_address_batches():
+    # NJ mailing addresses are built from the residence columns, so every
+    # mailing string of a batch is a repeat
+    state_test = load_states(['nj'])[0]
+    rows, addresses = run_address_batch(state_test, 7)
+    unbatched_rows, no_addresses = run_address_batch(state_test, 0)
+    assert rows == unbatched_rows
+    assert no_addresses is None
+    assert addresses['hits'] + addresses['misses'] == 2 * len(rows)
+    assert addresses['hits'] >= len(rows)
+
+    # Outside of batches a string equal to the last one after normalizing
+    # isn't parsed again
+    state_transformer = state_test.transformer.StateTransformer()
+    tagged = state_transformer.tag_address('12 Main St')
+    last_address = state_transformer.last_address
+    assert state_transformer.tag_address(' 12  Main St') == tagged
+    assert state_transformer.last_address is last_address
+
+
+def count_parses(state_transformer, address_strs):
+    """Tags address_strs in order, returns how many went to usaddress"""
+    parse_address = transformer_base.parse_address
+    parsed = []
+
+    def counted(address_str):
+        parsed.append(address_str)
+        return parse_address(address_str)
+    transformer_base.parse_address = counted
+    try:
+        tagged = [state_transformer.tag_address(address_str)
+                  for address_str in address_strs]
+    finally:
+        transformer_base.parse_address = parse_address
+    return len(parsed), tagged
+
+
+# Columns of the city, state and ZIP code of the residence
+CITY_STATE_ZIP_COLUMNS = {'mi': ('CITY', 'STATE', 'ZIP'),
+                          'ut': ('City', None, 'Zip')}
+
+
+def reused_parses(state_test):
+    """
+    Tags the residence string of every test row, the same string again, the
+    residence followed by its city, state and ZIP code and the mailing
+    string, checking each against a parse of its own.
+
+    Outputs:
+        (strings equal to the one before after normalizing, strings that
+        didn't go to usaddress)
+    """
+    state_path = state_test.transformer.StatePreparer.state_path
+    input_path = os.path.join(TEST_DATA_DIR, '{}.csv'.format(state_path))
+    state_transformer = state_test.transformer.StateTransformer()
+    state_preparer = state_test.transformer.StatePreparer(input_path,
+                                                          state_path,
+                                                          state_test.transformer,
+                                                          state_transformer)
+    city, state, zip_code = CITY_STATE_ZIP_COLUMNS[state_path]
+    address_strs = []
+    for input_dict in state_preparer.process():
+        residence = state_transformer.registration_address_str(input_dict)
+        address_strs.extend([residence, residence, '{} {} {} {}'.format(
+            residence, input_dict[city],
+            input_dict[state] if state else state_path.upper(),
+            input_dict[zip_code]
+        ), state_transformer.mailing_address_str(input_dict)])
+    # Strings usaddress can't tag raise either way
+    address_strs = [a for a in address_strs if a is not None and
+                    not isinstance(parse_address(a), usaddress.RepeatedLabelError)]
+    parses, tagged = count_parses(state_test.transformer.StateTransformer(),
+                                  address_strs)
+    assert tagged == [usaddress.tag(a) for a in address_strs]
+    keys = [transformer_base.normalize_address(a) for a in address_strs]
+    repeats = sum(1 for last, key in zip(keys, keys[1:]) if key == last)
+    return repeats, len(address_strs) - parses
+
+
+def test_equivalent_addresses():
+    # Only a string equal to the last one is reused. usaddress tags a street
+    # differently once a city, state and ZIP code follow it, so an MI mailing
+    # line that is the residence plus those is parsed again
+    for state_test in load_states(['mi', 'ut']):
+        repeats, reused = reused_parses(state_test)
+        assert repeats > 0
+        assert reused == repeats
+
+        rows, _ = run_address_batch(state_test, 7)
+        unbatched_rows, _ = run_address_batch(state_test, 0)
+        assert rows == unbatched_rows
+
+    # UT has the mailing street line in a column of its own
+    ut = load_states(['ut'])[0]
+    row = {'House Number': '45', 'House Number Suffix': '',
+           'Direction Prefix': 'N', 'Street': 'Oak', 'Direction Suffix': '',
+           'Street Type': 'Ave', 'Unit Type': '', 'Unit Number': '',
+           'Mailing Address': '45 N Oak Ave'}
+    state_transformer = ut.transformer.StateTransformer()
+    parses, _ = count_parses(state_transformer, [
+        state_transformer.registration_address_str(row),
+        state_transformer.mailing_address_str(row)])
+    assert parses == 1
+    row['Mailing Address'] = ''
+    assert state_transformer.mailing_address_str(row) is None
+
+
+def test_address_pool():
+    state_test = load_states(['nj'])[0]
+    rows, addresses = run_address_batch(state_test, 7)
+    pool_rows, pool_addresses = run_address_batch(state_test, 7, address_workers=2)
+    assert pool_rows == rows
+    assert pool_addresses == addresses
+
+    address_strs = ['123 Main St', '123 Main St 456 Oak Ave Apt 3 Apt 4', '']
+    with AddressParserPool(2, chunk_size=2) as pool:
+        parsed = pool.parse(address_strs)
+    # Exceptions don't compare equal, so the parses are checked one by one
+    assert parsed[0] == parse_address(address_strs[0])
+    assert isinstance(parsed[1], usaddress.RepeatedLabelError)
+    assert parsed[2] == parse_address('')
+
+
+def test_fast_tagger():
+    simple = ['123 Main St', '9 W 12TH ST APT 3C', '12-14 ELM DR SE',
+              '44 Martin Luther King Blvd #2', '7 OAK AVENUE UNIT B-2']
+    for address_str in simple:
+        assert rule_tag(address_str) == parse_address(address_str)
+    # A city after the street, a number suffix, a street type in the name,
+    # or no street type at all is left to usaddress
+    for address_str in ('12 MAIN ST SPRINGFIELD', '123 1/2 MAIN ST',
+                        '10 OAK PARK AVE', '100 BROADWAY', 'PO BOX 12'):
+        assert rule_tag(address_str) is None
+
+    result = compare(simple + ['100 BROADWAY'])
+    assert (result['strings'], result['tagged'], result['agreed']) == (6, 5, 5)
+
+    state_test = load_states(['nj'])[0]
+    rows, _ = run_address_batch(state_test, 7)
+    fast_rows, fast_tagged = run_address_batch(state_test, 7, fast_tagger=True)
+    assert fast_rows == rows
+    assert fast_tagged['hits'] > 0
+
+
+def test_standardize_addresses():
+    assert standardize_value('North', {'NORTH': 'N'}) == 'N'
+    assert standardize_value(' Main  st. ') == 'MAIN ST'
+    assert standardize_components(
+        usaddress.tag('123 North Main Street Apartment 4')[0]) == \
+        standardize_components(usaddress.tag('123 N MAIN ST APT 4')[0])
+
+    # Every NJ row again with the street upper cased and its suffix
+    # abbreviated: most pairs end up in one household once standardized
+    state_test = load_states(['nj'])[0]
+    tmp_dir = tempfile.mkdtemp(prefix='nvf_standardize_')
+    try:
+        input_path = os.path.join(tmp_dir, 'nj.csv')
+        with open(os.path.join(TEST_DATA_DIR, 'nj.csv')) as f, \
+                open(input_path, 'w') as out:
+            for line in f:
+                cols = line.split('|')
+                words = cols[10].upper().split()
+                words[-1] = SUFFIX_ABBREVIATIONS.get(words[-1], words[-1])
+                cols[10] = ' '.join(words)
+                out.write(line + '|'.join(cols))
+
+        households = []
+        for standardize in (False, True):
+            state_transformer = state_test.transformer.StateTransformer()
+            state_transformer.standardize_addresses = standardize
+            state_preparer = state_test.transformer.StatePreparer(
+                input_path, 'nj', state_test.transformer, state_transformer)
+            writer = CsvOutput(state_transformer, dimensions=True)
+            writer(state_preparer.process(),
+                   os.path.join(tmp_dir, 'nj_{}.csv'.format(standardize)))
+            households.append(writer.telemetry.caches['households']['misses'])
+        assert households[1] < households[0] * 0.7
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+def test_geocoder():
+    # Main St runs north, odd numbers on its left (west) side
+    index = AddressRangeIndex()
+    index.add_range('08540', 'N Main St', 1, 101, ((-75.0, 40.0), (-75.0, 40.01)))
+    index.add_range('08540', 'N Main St', 0, 100, ((-75.0, 40.0), (-75.0, 40.01)),
+                    side=-1)
+    household = {'ADDRESS_NUMBER': '51', 'STREET_NAME_PRE_DIRECTIONAL': 'North',
+                 'STREET_NAME': 'Main', 'STREET_NAME_POST_TYPE': 'Street',
+                 'ZIP_CODE': '08540-1234'}
+    lon, lat, status = index.locate('08540', 'N MAIN ST', 51)
+    assert status == INTERPOLATED
+    assert abs(lat - 40.005) < 0.0001 and lon < -75.0
+    assert index.locate('08540', 'N MAIN ST', 50)[0] > -75.0
+    assert index.locate('08540', 'N MAIN ST', 250)[2] == STREET_MATCH
+    assert index.locate('08541', 'N MAIN ST', 51) is None
+    assert index.geocode(household)[1] == INTERPOLATED
+    assert index.geocode(dict(household, ADDRESS_NUMBER='12-34')) == \
+        ('', NOT_GEOCODED)
+
+    # One edge for every other NJ residence, written the way ogr2ogr does
+    state_test = load_states(['nj'])[0]
+    tmp_dir = tempfile.mkdtemp(prefix='nvf_geocoder_')
+    try:
+        ranges_path = os.path.join(tmp_dir, 'addrfeat.csv')
+        with open(os.path.join(TEST_DATA_DIR, 'nj.csv')) as f, \
+                open(ranges_path, 'w', newline='') as out:
+            writer = csv.writer(out)
+            writer.writerow(['WKT', 'FULLNAME', 'LFROMHN', 'LTOHN', 'ZIPL',
+                             'RFROMHN', 'RTOHN', 'ZIPR'])
+            for i, line in enumerate(f):
+                cols = line.split('|')
+                if i % 2 or not cols[14].strip():
+                    continue
+                number = int(cols[7])
+                writer.writerow(['LINESTRING ({} 40,{} 40.001)'.format(-74 - i * 0.01, -74 - i * 0.01),
+                                 ' '.join(c for c in cols[8:11] if c.strip()),
+                                 number - 10, number + 10,
+                                 cols[14], '', '', ''])
+
+        # NJ has no precinct splits, east and west of -74.5 stand in for them
+        splits = PolygonLayer('PRECINCT_SPLIT', [
+            ('EAST', [[(-74.5, 39), (-73, 39), (-73, 41), (-74.5, 41)]]),
+            ('WEST', [[(-76, 39), (-74.5, 39), (-74.5, 41), (-76, 41)]]),
+        ])
+
+        state_transformer = state_test.transformer.StateTransformer()
+        state_preparer = state_test.transformer.StatePreparer(
+            os.path.join(TEST_DATA_DIR, 'nj.csv'), 'nj', state_test.transformer,
+            state_transformer)
+        output_path = os.path.join(tmp_dir, 'nj_output.csv')
+        writer = CsvOutput(state_transformer, dimensions=True,
+                           geocoder=AddressRangeIndex.from_files([ranges_path]),
+                           districts=[splits])
+        writer(state_preparer.process(), output_path)
+        with open(dimension_paths(output_path)[0]) as f:
+            households = list(csv.DictReader(f))
+        with open(output_path) as f:
+            voters = list(csv.DictReader(f))
+        interpolated = [h for h in households
+                        if h['GEOCODE_STATUS'] == str(INTERPOLATED)]
+        assert len(interpolated) > len(households) // 4
+        assert all(h['GEOM'].startswith('SRID=4326;POINT(-7') for h in interpolated)
+        assert writer.telemetry.caches['geocoder']['misses'] == sum(
+            1 for h in households if h['GEOCODE_STATUS'] == str(NOT_GEOCODED))
+
+        points = dict((h['HASHCODE'], float(h['GEOM'][16:].split()[0]))
+                      for h in households if h['GEOM'])
+        for voter in voters:
+            lon = points.get(voter[HOUSEHOLD_KEY])
+            if lon is None:
+                assert voter['PRECINCT_SPLIT'] == ''
+            else:
+                assert voter['PRECINCT_SPLIT'] == ('EAST' if lon > -74.5 else 'WEST')
+        assert writer.telemetry.extra['districts']['PRECINCT_SPLIT']['filled'] == \
+            len(points)
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+def test_districts():
+    square = [(0, 0), (4, 0), (4, 4), (0, 4), (0, 0)]
+    hole = [(1, 1), (3, 1), (3, 3), (1, 3), (1, 1)]
+    points = sorted([(0.5, 0.5), (2, 2), (3.5, 3.9), (5, 2), (2, -1)],
+                    key=lambda p: p[1])
+    assert points_in_rings([square, hole], points) == \
+        [False, True, False, False, True]
+
+    # A checkerboard of 100 unit squares, the hole filled by its own polygon
+    features = [('{},{}'.format(x, y),
+                 [[(x, y), (x + 1, y), (x + 1, y + 1), (x, y + 1)]])
+                for x in range(10) for y in range(10)]
+    layer = PolygonLayer('PRECINCT', features + [('HOLE', [hole])])
+    located = layer.locate([(0.5, 0.5), (9.99, 9.01), (4.5, 7.5), (10.5, 2)])
+    assert located == ['0,0', '9,9', '4,7', None]
+    assert layer.locate([(1.5, 1.5)]) in (['1,1'], ['HOLE'])
+
+
+def test_structured_address():
+    ny = load_states(['ny'])[0].transformer.StateTransformer()
+    row = {'RADDNUMBER': '322', 'RHALFCODE': '1/2', 'RPREDIRECTION': 'S',
+           'RSTREETNAME': 'Ashley Lodge', 'RPOSTDIRECTION': 'W',
+           'RAPARTMENT': '377'}
+    address = ny.structured_address(row)
+    tagged = ny.convert_usaddress_dict(
+        ny.usaddress_tag(ny.registration_address_str(row))[0])
+    assert address == tagged
+    assert address['STREET_NAME_POST_TYPE'] == 'Lodge'
+    assert address['OCCUPANCY_TYPE'] == 'Apt'
+
+    # No house number, or a directional that isn't one, goes to usaddress
+    for column, value in (('RADDNUMBER', ' '), ('RPREDIRECTION', 'X')):
+        assert ny.structured_address(dict(row, **{column: value})) is None
+
+    mi = load_states(['mi'])[0].transformer.StateTransformer()
+    address = mi.structured_address({
+        'HOUSE_NUM_CHARACTER': ' ', 'RESIDENCE_STREET_NUMBER': '035',
+        'HOUSE_SUFFIX': ' ', 'PRE_DIRECTION': 'N', 'STREET_NAME': 'HOOD',
+        'STREET_TYPE': 'ST', 'SUFFIX_DIRECTION': ' ',
+        'RESIDENCE_EXTENSION': 'LOT 12'
+    })
+    assert address['ADDRESS_NUMBER'] == '035'
+    assert address['ADDRESS_NUMBER_PREFIX'] is None
+    assert address['STREET_NAME'] == 'HOOD'
+    assert address['STREET_NAME_POST_TYPE'] == 'ST'
+    assert (address['OCCUPANCY_TYPE'], address['OCCUPANCY_IDENTIFIER']) == \
+        ('LOT', '12')
+
+
+def test_profile_extracts():
+    state_test = load_states(['nj'])[0]
+    input_path = os.path.join(TEST_DATA_DIR, 'nj.csv')
+    output_path = os.path.join(TEST_DATA_DIR, 'nj_profile_test.csv')
+
+    state_transformer = state_test.transformer.StateTransformer()
+    profiler = state_transformer.enable_profiling(sample_every=3)
+    state_preparer = state_test.transformer.StatePreparer(input_path, 'nj',
+                                                          state_test.transformer,
+                                                          state_transformer)
+    writer = CsvOutput(state_transformer)
+    writer(state_preparer.process(), output_path)
+
+    rows = writer.telemetry.rows
+    assert profiler.rows == rows
+    for name in ('extract_registration_address', 'fix_missing_mailing_addr',
+                 'validate_output_row'):
+        assert profiler.calls[name] == rows
+        assert profiler.sampled_calls[name] == (rows + 2) // 3
+
+
+def test_line_index():
+    rows = [['ID', 'NAME', 'NOTE']]
+    rows.extend([str(i), 'Voter {}'.format(i),
+                 'line one\nline "two"' if i % 7 == 0 else 'plain']
+                for i in range(1000))
+    buf = io.StringIO(newline='')
+    csv.writer(buf, lineterminator='\n').writerows(rows)
+    data = buf.getvalue().encode('utf-8')
+
+    # Blocks small enough to split records and quoted fields
+    for stride in (1, 5, 64):
+        for block_size in (7, 100, len(data)):
+            _, records = scan(io.BytesIO(data), stride, block_size=block_size)
+            assert records == len(rows)
+
+    tmp_dir = tempfile.mkdtemp(prefix='nvf_line_index_')
+    try:
+        path = os.path.join(tmp_dir, 'voters.csv')
+        with open(path, 'wb') as f:
+            f.write(data)
+        assert LineIndex.load(path) is None
+        LineIndex.for_file(path, stride=16)
+        index = LineIndex.load(path)
+        assert index.records == len(rows)
+
+        with open(path, 'rb') as f:
+            for record in (0, 1, 7, 16, 500, 1000):
+                index.seek(f, record)
+                line = index.read_record(f).decode('utf-8')
+                assert next(csv.reader([line])) == rows[record]
+            chunks = index.chunks(f, 4, first=1)
+            assert chunks[0][0] == 1 and chunks[-1][1] == len(rows)
+            assert chunks[-1][3] == len(data)
+            for (_, end, _, end_off), (first, _, start_off, _) in \
+                    zip(chunks, chunks[1:]):
+                assert end == first and end_off == start_off
+            f.seek(chunks[1][2])
+            text = f.read(chunks[1][3] - chunks[1][2]).decode('utf-8')
+            assert list(csv.reader(io.StringIO(text, newline=''))) == \
+                rows[chunks[1][0]:chunks[1][1]]
+
+        with open(path, 'ab') as f:
+            f.write(b'1000,Late,plain\n')
+        assert LineIndex.load(path) is None
+    finally:
+        shutil.rmtree(tmp_dir)
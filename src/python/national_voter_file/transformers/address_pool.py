@@ -0,0 +1,75 @@
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import cpu_count
+
+from national_voter_file.transformers.base import parse_address
+
+"""
+# Address parsing worker pool
+
+usaddress tags one string at a time on a CRF model, and it is where the
+transformers spend most of their CPU. An AddressParserPool runs the tagging in
+worker processes, each loading the model once when it imports usaddress with
+this module, before its first chunk. Strings are sent
+in chunks of `chunk_size`, so one round trip carries hundreds of addresses
+instead of one.
+
+CsvOutput hands the pool the distinct address strings of the next batch of rows
+(see BaseTransformer.address_batches) while it transforms the current one, so
+the main process only waits on parses that haven't finished yet.
+"""
+
+# Address strings sent to a worker at a time
+CHUNK_SIZE = 250
+
+
+def parse_addresses(address_strs):
+    """
+    Outputs:
+        parse_address() of every string, in order
+    """
+    return [parse_address(address_str) for address_str in address_strs]
+
+
+class AddressParserPool(object):
+
+    def __init__(self, workers=None, chunk_size=CHUNK_SIZE):
+        """
+        Inputs:
+            workers: worker processes (default: number of CPUs)
+            chunk_size: address strings sent to a worker at a time
+        """
+        self.workers = workers or cpu_count()
+        self.chunk_size = chunk_size
+        self.executor = ProcessPoolExecutor(max_workers=self.workers)
+
+    def submit(self, address_strs):
+        """
+        Starts parsing address_strs in the workers
+
+        Outputs:
+            Futures of the parse_address() outputs, one per chunk, see
+            results()
+        """
+        return [self.executor.submit(parse_addresses,
+                                     address_strs[i:i + self.chunk_size])
+                for i in range(0, len(address_strs), self.chunk_size)]
+
+    @staticmethod
+    def results(futures):
+        """The parses of submit(), in the order of the strings"""
+        parsed = []
+        for future in futures:
+            parsed.extend(future.result())
+        return parsed
+
+    def parse(self, address_strs):
+        return self.results(self.submit(address_strs))
+
+    def close(self):
+        self.executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,140 @@
+import re
+
+from usaddress import DIRECTIONS, STREET_NAMES
+
+"""
+# Address word tables
+
+Words usaddress recognizes in street addresses, upper cased, for checking
+address columns that states already split up (see
+BaseTransformer.structured_address). The directionals and street types come
+from usaddress itself, so an address accepted here looks like one it would tag
+the same way.
+"""
+
+# N, NE, NORTH, NORTHEAST...
+DIRECTIONALS = frozenset(d.upper() for d in DIRECTIONS)
+
+# Street suffixes, USPS abbreviations and common spellings: ST, STREET, AVE...
+STREET_TYPES = frozenset(t.upper() for t in STREET_NAMES)
+
+# USPS secondary unit designator -> abbreviation (Publication 28, C2)
+UNIT_ABBREVIATIONS = {
+    'APARTMENT': 'APT', 'BASEMENT': 'BSMT', 'BUILDING': 'BLDG',
+    'DEPARTMENT': 'DEPT', 'FLOOR': 'FL', 'FRONT': 'FRNT', 'HANGAR': 'HNGR',
+    'KEY': 'KEY', 'LOBBY': 'LBBY', 'LOT': 'LOT', 'LOWER': 'LOWR',
+    'OFFICE': 'OFC', 'PENTHOUSE': 'PH', 'PIER': 'PIER', 'REAR': 'REAR',
+    'ROOM': 'RM', 'SIDE': 'SIDE', 'SLIP': 'SLIP', 'SPACE': 'SPC', 'STOP': 'STOP',
+    'SUITE': 'STE', 'TRAILER': 'TRLR', 'UNIT': 'UNIT', 'UPPER': 'UPPR',
+}
+
+# USPS secondary unit designators, abbreviated and spelled out
+UNIT_DESIGNATORS = frozenset(UNIT_ABBREVIATIONS) | \
+    frozenset(UNIT_ABBREVIATIONS.values())
+
+# Directional -> abbreviation
+DIRECTIONAL_ABBREVIATIONS = {
+    'NORTH': 'N', 'SOUTH': 'S', 'EAST': 'E', 'WEST': 'W',
+    'NORTHEAST': 'NE', 'NORTHWEST': 'NW', 'SOUTHEAST': 'SE',
+    'SOUTHWEST': 'SW',
+}
+
+# Street suffix -> USPS abbreviation (Publication 28, C1): the primary names
+# and the most common other spellings of them
+SUFFIX_ABBREVIATIONS = {
+    'ALLEY': 'ALY', 'ALLEE': 'ALY', 'ALLY': 'ALY', 'ANNEX': 'ANX',
+    'ANEX': 'ANX', 'ANNX': 'ANX', 'ARCADE': 'ARC', 'AVENUE': 'AVE',
+    'AV': 'AVE', 'AVEN': 'AVE', 'AVENU': 'AVE', 'AVN': 'AVE', 'AVNUE': 'AVE',
+    'BAYOU': 'BYU', 'BAYOO': 'BYU', 'BEACH': 'BCH', 'BEND': 'BND',
+    'BLUFF': 'BLF', 'BLUF': 'BLF', 'BLUFFS': 'BLFS', 'BOTTOM': 'BTM',
+    'BOT': 'BTM', 'BOTTM': 'BTM', 'BOULEVARD': 'BLVD', 'BOUL': 'BLVD',
+    'BOULV': 'BLVD', 'BRANCH': 'BR', 'BRNCH': 'BR', 'BRIDGE': 'BRG',
+    'BRDGE': 'BRG', 'BROOK': 'BRK', 'BROOKS': 'BRKS', 'BURG': 'BG',
+    'BURGS': 'BGS', 'BYPASS': 'BYP', 'BYPA': 'BYP', 'BYPAS': 'BYP',
+    'BYPS': 'BYP', 'CAMP': 'CP', 'CMP': 'CP', 'CANYON': 'CYN', 'CANYN': 'CYN',
+    'CNYN': 'CYN', 'CAPE': 'CPE', 'CAUSEWAY': 'CSWY', 'CAUSWA': 'CSWY',
+    'CENTER': 'CTR', 'CEN': 'CTR', 'CENT': 'CTR', 'CENTR': 'CTR',
+    'CENTRE': 'CTR', 'CNTER': 'CTR', 'CNTR': 'CTR', 'CENTERS': 'CTRS',
+    'CIRCLE': 'CIR', 'CIRC': 'CIR', 'CIRCL': 'CIR', 'CRCL': 'CIR',
+    'CRCLE': 'CIR', 'CIRCLES': 'CIRS', 'CLIFF': 'CLF', 'CLIFFS': 'CLFS',
+    'CLUB': 'CLB', 'COMMON': 'CMN', 'COMMONS': 'CMNS', 'CORNER': 'COR',
+    'CORNERS': 'CORS', 'COURSE': 'CRSE', 'COURT': 'CT', 'CRT': 'CT',
+    'COURTS': 'CTS', 'COVE': 'CV', 'COVES': 'CVS', 'CREEK': 'CRK',
+    'CRESCENT': 'CRES', 'CRSENT': 'CRES', 'CRSNT': 'CRES', 'CREST': 'CRST',
+    'CROSSING': 'XING', 'CRSSNG': 'XING', 'CROSSROAD': 'XRD',
+    'CROSSROADS': 'XRDS', 'CURVE': 'CURV', 'DALE': 'DL', 'DAM': 'DM',
+    'DIVIDE': 'DV', 'DIV': 'DV', 'DVD': 'DV', 'DRIVE': 'DR', 'DRIV': 'DR',
+    'DRV': 'DR', 'DRIVES': 'DRS', 'ESTATE': 'EST', 'ESTATES': 'ESTS',
+    'EXPRESSWAY': 'EXPY', 'EXP': 'EXPY', 'EXPR': 'EXPY', 'EXPRESS': 'EXPY',
+    'EXPW': 'EXPY', 'EXTENSION': 'EXT', 'EXTN': 'EXT', 'EXTNSN': 'EXT',
+    'EXTENSIONS': 'EXTS', 'FALLS': 'FLS', 'FERRY': 'FRY', 'FRRY': 'FRY',
+    'FIELD': 'FLD', 'FIELDS': 'FLDS', 'FLAT': 'FLT', 'FLATS': 'FLTS',
+    'FORD': 'FRD', 'FORDS': 'FRDS', 'FOREST': 'FRST', 'FORESTS': 'FRST',
+    'FORGE': 'FRG', 'FORG': 'FRG', 'FORGES': 'FRGS', 'FORK': 'FRK',
+    'FORKS': 'FRKS', 'FORT': 'FT', 'FRT': 'FT', 'FREEWAY': 'FWY',
+    'FREEWY': 'FWY', 'FRWAY': 'FWY', 'FRWY': 'FWY', 'GARDEN': 'GDN',
+    'GARDN': 'GDN', 'GRDEN': 'GDN', 'GRDN': 'GDN', 'GARDENS': 'GDNS',
+    'GRDNS': 'GDNS', 'GATEWAY': 'GTWY', 'GATEWY': 'GTWY', 'GATWAY': 'GTWY',
+    'GTWAY': 'GTWY', 'GLEN': 'GLN', 'GLENS': 'GLNS', 'GREEN': 'GRN',
+    'GREENS': 'GRNS', 'GROVE': 'GRV', 'GROV': 'GRV', 'GROVES': 'GRVS',
+    'HARBOR': 'HBR', 'HARB': 'HBR', 'HARBR': 'HBR', 'HRBOR': 'HBR',
+    'HARBORS': 'HBRS', 'HAVEN': 'HVN', 'HEIGHTS': 'HTS', 'HT': 'HTS',
+    'HIGHWAY': 'HWY', 'HIGHWY': 'HWY', 'HIWAY': 'HWY', 'HIWY': 'HWY',
+    'HWAY': 'HWY', 'HILL': 'HL', 'HILLS': 'HLS', 'HOLLOW': 'HOLW',
+    'HLLW': 'HOLW', 'HOLLOWS': 'HOLW', 'HOLWS': 'HOLW', 'INLET': 'INLT',
+    'ISLAND': 'IS', 'ISLND': 'IS', 'ISLANDS': 'ISS', 'ISLNDS': 'ISS',
+    'ISLES': 'ISLE', 'JUNCTION': 'JCT', 'JCTION': 'JCT', 'JCTN': 'JCT',
+    'JUNCTN': 'JCT', 'JUNCTON': 'JCT', 'JUNCTIONS': 'JCTS', 'JCTNS': 'JCTS',
+    'KEY': 'KY', 'KEYS': 'KYS', 'KNOLL': 'KNL', 'KNOL': 'KNL',
+    'KNOLLS': 'KNLS', 'LAKE': 'LK', 'LAKES': 'LKS', 'LANDING': 'LNDG',
+    'LNDNG': 'LNDG', 'LANE': 'LN', 'LIGHT': 'LGT', 'LIGHTS': 'LGTS',
+    'LOAF': 'LF', 'LOCK': 'LCK', 'LOCKS': 'LCKS', 'LODGE': 'LDG',
+    'LDGE': 'LDG', 'LODG': 'LDG', 'LOOPS': 'LOOP', 'MANOR': 'MNR',
+    'MANORS': 'MNRS', 'MEADOW': 'MDW', 'MEADOWS': 'MDWS',
+    'MEDOWS': 'MDWS', 'MILL': 'ML', 'MILLS': 'MLS', 'MISSION': 'MSN',
+    'MISSN': 'MSN', 'MSSN': 'MSN', 'MOTORWAY': 'MTWY', 'MOUNT': 'MT',
+    'MNT': 'MT', 'MOUNTAIN': 'MTN', 'MNTAIN': 'MTN', 'MNTN': 'MTN',
+    'MOUNTIN': 'MTN', 'MTIN': 'MTN', 'MOUNTAINS': 'MTNS', 'MNTNS': 'MTNS',
+    'NECK': 'NCK', 'ORCHARD': 'ORCH', 'ORCHRD': 'ORCH', 'OVL': 'OVAL',
+    'OVERPASS': 'OPAS', 'PRK': 'PARK', 'PARKS': 'PARK', 'PARKWAY': 'PKWY',
+    'PARKWY': 'PKWY', 'PKWAY': 'PKWY', 'PKY': 'PKWY', 'PARKWAYS': 'PKWY',
+    'PKWYS': 'PKWY', 'PASSAGE': 'PSGE', 'PATHS': 'PATH', 'PIKES': 'PIKE',
+    'PINE': 'PNE', 'PINES': 'PNES', 'PLACE': 'PL', 'PLAIN': 'PLN',
+    'PLAINS': 'PLNS', 'PLAZA': 'PLZ', 'PLZA': 'PLZ', 'POINT': 'PT',
+    'POINTS': 'PTS', 'PORT': 'PRT', 'PORTS': 'PRTS', 'PRAIRIE': 'PR',
+    'PRR': 'PR', 'RADIAL': 'RADL', 'RAD': 'RADL', 'RADIEL': 'RADL',
+    'RANCH': 'RNCH', 'RANCHES': 'RNCH', 'RNCHS': 'RNCH', 'RAPID': 'RPD',
+    'RAPIDS': 'RPDS', 'REST': 'RST', 'RIDGE': 'RDG', 'RDGE': 'RDG',
+    'RIDGES': 'RDGS', 'RIVER': 'RIV', 'RVR': 'RIV', 'RIVR': 'RIV',
+    'ROAD': 'RD', 'ROADS': 'RDS', 'ROUTE': 'RTE', 'SHOAL': 'SHL',
+    'SHOALS': 'SHLS', 'SHORE': 'SHR', 'SHOAR': 'SHR', 'SHORES': 'SHRS',
+    'SHOARS': 'SHRS', 'SKYWAY': 'SKWY', 'SPRING': 'SPG', 'SPNG': 'SPG',
+    'SPRNG': 'SPG', 'SPRINGS': 'SPGS', 'SPNGS': 'SPGS', 'SPRNGS': 'SPGS',
+    'SPURS': 'SPUR', 'SQUARE': 'SQ', 'SQR': 'SQ', 'SQRE': 'SQ', 'SQU': 'SQ',
+    'SQUARES': 'SQS', 'SQRS': 'SQS', 'STATION': 'STA', 'STATN': 'STA',
+    'STN': 'STA', 'STRAVENUE': 'STRA', 'STRAV': 'STRA', 'STRAVEN': 'STRA',
+    'STRAVN': 'STRA', 'STRVN': 'STRA', 'STRVNUE': 'STRA', 'STREAM': 'STRM',
+    'STREME': 'STRM', 'STREET': 'ST', 'STRT': 'ST', 'STR': 'ST',
+    'STREETS': 'STS', 'SUMMIT': 'SMT', 'SUMIT': 'SMT', 'SUMITT': 'SMT',
+    'TERRACE': 'TER', 'TERR': 'TER', 'THROUGHWAY': 'TRWY', 'TRACE': 'TRCE',
+    'TRACES': 'TRCE', 'TRACK': 'TRAK', 'TRACKS': 'TRAK', 'TRK': 'TRAK',
+    'TRKS': 'TRAK', 'TRAFFICWAY': 'TRFY', 'TRAIL': 'TRL', 'TRAILS': 'TRL',
+    'TRLS': 'TRL', 'TRAILER': 'TRLR', 'TRLRS': 'TRLR', 'TUNNEL': 'TUNL',
+    'TUNEL': 'TUNL', 'TUNLS': 'TUNL', 'TUNNELS': 'TUNL', 'TUNNL': 'TUNL',
+    'TURNPIKE': 'TPKE', 'TRNPK': 'TPKE', 'TURNPK': 'TPKE',
+    'UNDERPASS': 'UPAS', 'UNION': 'UN', 'UNIONS': 'UNS', 'VALLEY': 'VLY',
+    'VALLY': 'VLY', 'VLLY': 'VLY', 'VALLEYS': 'VLYS', 'VIADUCT': 'VIA',
+    'VDCT': 'VIA', 'VIADCT': 'VIA', 'VIEW': 'VW', 'VIEWS': 'VWS',
+    'VILLAGE': 'VLG', 'VILL': 'VLG', 'VILLAG': 'VLG', 'VILLG': 'VLG',
+    'VILLIAGE': 'VLG', 'VILLAGES': 'VLGS', 'VILLE': 'VL', 'VISTA': 'VIS',
+    'VIST': 'VIS', 'VST': 'VIS', 'VSTA': 'VIS', 'WALKS': 'WALK',
+    'WY': 'WAY', 'WELL': 'WL', 'WELLS': 'WLS',
+}
+
+# 123, 123A, 123-125, 0035
+ADDRESS_NUMBER_RE = re.compile(r'^\d+[A-Z]?(-\d+[A-Z]?)?$', re.IGNORECASE)
+# 1/2, A
+ADDRESS_NUMBER_SUFFIX_RE = re.compile(r'^(\d/\d|[A-Z])$', re.IGNORECASE)
+# 12, 12B, B, #12
+OCCUPANCY_IDENTIFIER_RE = re.compile(r'^#?\s*[A-Z0-9][A-Z0-9\-]*$',
+                                     re.IGNORECASE)
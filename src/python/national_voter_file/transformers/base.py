@@ -5,11 +5,26 @@ from collections import defaultdict
 from io import TextIOWrapper
 import zipfile
 from functools import wraps
+from itertools import islice
 
 import usaddress
 
+from national_voter_file.transformers.address_tables import (
+    ADDRESS_NUMBER_RE, ADDRESS_NUMBER_SUFFIX_RE, DIRECTIONALS,
+    OCCUPANCY_IDENTIFIER_RE, STREET_TYPES, UNIT_DESIGNATORS)
+from national_voter_file.transformers.fast_tagger import tag as rule_tag
+from national_voter_file.transformers.line_index import LineIndex
+from national_voter_file.transformers.standardize import (COLUMN_TABLES,
+                                                          standardize_components)
+from national_voter_file.transformers.telemetry import (SAMPLE_EVERY,
+                                                        ExtractProfiler,
+                                                        clock)
+
 DATA_DIR = os.path.join(os.path.abspath(os.getcwd()), 'data')
 
+# Rows whose address strings are collected and de-duplicated before parsing
+ADDRESS_BATCH_SIZE = 1000
+
 """
 # Raw voter data -> standardized data frame
 
@@ -37,6 +52,25 @@ from each extract method fits the correct type.
 You only need to modify methods beginning with `extract`
 """
 
+def normalize_address(address_str):
+    """
+    Collapses runs of whitespace, which usaddress ignores, so strings built
+    from blank columns match the same address without them
+    """
+    return ' '.join(address_str.split())
+
+
+def parse_address(address_str):
+    """
+    Outputs:
+        The output of usaddress.tag, or the RepeatedLabelError it raised
+    """
+    try:
+        return usaddress.tag(address_str)
+    except usaddress.RepeatedLabelError as e:
+        return e
+
+
 class BasePreparer(object):
     """
     This is the state file that knows how to take input files and iterate
@@ -96,14 +130,84 @@ class BasePreparer(object):
         # based on what each state spits out
         if mode == 'r' and isinstance(path_or_handle, zipfile.ZipExtFile):
             # see pa.py for an example of needing zipfile support
-            return TextIOWrapper(path_or_handle,
-                                 encoding='utf8',
-                                 errors='ignore', line_buffering=True)
+            handle = TextIOWrapper(path_or_handle,
+                                   encoding='utf8',
+                                   errors='ignore', line_buffering=True)
         elif hasattr(path_or_handle, 'mode'): #py2/3 file/buffer type
-            return path_or_handle
+            handle = path_or_handle
+        else:
+            handle = open(path_or_handle, mode, errors='ignore')
+        if mode == 'r':
+            # Most recently opened input, for read_position()
+            self._input_handle = handle
+        return handle
+
+    def input_size(self):
+        """
+        Outputs:
+            Size in bytes of input_path (all files under it for a directory),
+            None if it can't be determined
+        """
+        path = getattr(self, 'input_path', None)
+        if not isinstance(path, str):
+            return None
+        if os.path.isdir(path):
+            return sum(os.path.getsize(os.path.join(root, f))
+                       for root, _, files in os.walk(path) for f in files)
+        if os.path.isfile(path):
+            return os.path.getsize(path)
+        return None
+
+    def read_position(self):
+        """
+        Rough progress through the input for telemetry. Files are opened
+        with read-ahead, so the position runs a little ahead of the rows.
+
+        Outputs:
+            (bytes consumed, name of the file or zip member being read),
+            either is None when unknown
+        """
+        handle = getattr(self, '_input_handle', None)
+        if handle is None:
+            return None, None
+        raw = getattr(handle, 'buffer', handle)
+        member = getattr(raw, 'name', None)
+        if isinstance(raw, zipfile.ZipExtFile):
+            # Position in the archive itself, which is what input_size() measures
+            raw = getattr(raw, '_fileobj', None)
+        elif isinstance(member, str):
+            member = os.path.basename(member)
         else:
-            return open(path_or_handle, mode, errors='ignore')
+            member = None
+        try:
+            return (raw.tell() if raw is not None else None), member
+        except (OSError, ValueError, AttributeError):
+            return None, member
 
+    def line_index(self):
+        """
+        Outputs:
+            LineIndex saved next to input_path (see line_index.py), None if
+            there isn't a current one
+        """
+        path = getattr(self, 'input_path', None)
+        if isinstance(path, str) and os.path.isfile(path):
+            return LineIndex.load(path)
+        return None
+
+    def row_count(self):
+        """
+        Outputs:
+            Exact number of rows process() will yield, from the line index,
+            None without one
+        """
+        index = self.line_index()
+        if index is None:
+            return None
+        # Files read with input_fields have no header line
+        transformer = getattr(self, 'transformer', None)
+        has_header = getattr(transformer, 'input_fields', None) is None
+        return max(index.records - int(has_header), 0)
 
     def process(self):
         return self.dict_iterator(self.open(self.input_path))
@@ -147,6 +251,23 @@ class BaseTransformer(object):
 
     """
 
+    # ExtractProfiler set by enable_profiling()
+    profiler = None
+    # Normalized address string -> parse_address() output, for the rows of
+    # the batch being processed, see address_batches()
+    address_batch = None
+    # Tag simple address strings with fast_tagger.tag() and only the rest
+    # with usaddress, see tagger_agreement.py before turning it on
+    fast_tagger = False
+    # Method name prefix -> bound methods, see row_funcs()
+    _row_funcs = None
+    # (normalized address string, parse) of the last string tag_address()
+    # parsed outside of a batch
+    last_address = None
+    # Upper case parsed address components and abbreviate directionals,
+    # street types and unit designators the USPS way, see standardize.py
+    standardize_addresses = False
+
     # Acceptable column output types
     col_type_dict = {
         'TITLE': set([str, type(None)]),
@@ -315,6 +436,27 @@ class BaseTransformer(object):
         'ZipCode': 'ZIP_CODE',
     }
 
+    # Standard address column -> input column, for states whose files split
+    # the residential address up. 'OCCUPANCY' is a column with the unit
+    # designator and number together. See structured_address().
+    structured_address_columns = None
+
+    # Residential columns glued into the mailing lines by
+    # fix_missing_mailing_addr
+    mail_address_line1_fields = (
+        'ADDRESS_NUMBER_PREFIX',
+        'ADDRESS_NUMBER',
+        'ADDRESS_NUMBER_SUFFIX',
+        'STREET_NAME_PRE_DIRECTIONAL',
+        'STREET_NAME_PRE_MODIFIER',
+        'STREET_NAME_PRE_TYPE',
+        'STREET_NAME',
+        'STREET_NAME_POST_DIRECTIONAL',
+        'STREET_NAME_POST_MODIFIER',
+        'STREET_NAME_POST_TYPE'
+    )
+    mail_address_line2_fields = ('OCCUPANCY_TYPE', 'OCCUPANCY_IDENTIFIER')
+
     date_format = ''
     col_map = {}
     input_fields = []
@@ -369,15 +511,186 @@ class BaseTransformer(object):
             method_str = 'hist_'
         else:
             method_str = 'extract'
+        if self.profiler is not None:
+            self.profiler.start_row()
         output_dict = {}
-        # Build a list of all instance methods that begin with method string
-        extract_funcs = [
-            getattr(self, x) for x in dir(self) if x.startswith(method_str)
-        ]
-        for func in extract_funcs:
+        for func in self.row_funcs(method_str):
             output_dict.update(func(input_dict))
         return output_dict
 
+    def row_funcs(self, method_str):
+        """
+        All instance methods that begin with method_str. Looked up once per
+        transformer instead of with dir() on every row.
+        """
+        if self._row_funcs is None:
+            self._row_funcs = {}
+        if method_str not in self._row_funcs:
+            self._row_funcs[method_str] = [
+                getattr(self, x) for x in dir(self) if x.startswith(method_str)
+            ]
+        return self._row_funcs[method_str]
+
+    def enable_profiling(self, sample_every=SAMPLE_EVERY):
+        """
+        Counts calls to every extract and hist_ method, fix_missing_mailing_addr
+        and validate_output_row, and times them on one row in sample_every.
+
+        Outputs:
+            The ExtractProfiler, also kept as self.profiler
+        """
+        self.profiler = ExtractProfiler(sample_every)
+        for method_str in ('extract', 'hist_'):
+            funcs = self.row_funcs(method_str)
+            self._row_funcs[method_str] = [
+                self.profiler.wrap(func.__name__, func) for func in funcs
+            ]
+        for name in ('fix_missing_mailing_addr', 'validate_output_row'):
+            setattr(self, name, self.profiler.wrap(name, getattr(self, name)))
+        return self.profiler
+
+    #### Address batches ######################################################
+
+    def registration_address_str(self, input_dict):
+        """
+        The string extract_registration_address tags, so it can be parsed
+        ahead with the rest of its batch. None if it doesn't tag one.
+        """
+        return None
+
+    def mailing_address_str(self, input_dict):
+        """
+        The string extract_mailing_address tags, None if it doesn't tag one
+        """
+        return None
+
+    def batch_address_strs(self, input_dicts):
+        """
+        Inputs:
+            input_dicts: list of rows from the preparer
+        Outputs:
+            (address strings in the rows, list of the distinct normalized
+            ones in the order they came up)
+        """
+        distinct = {}
+        strings = 0
+        for input_dict in input_dicts:
+            # Pre-split addresses aren't tagged, see structured_address()
+            structured = self.structured_address(input_dict) is not None
+            for address_str in (
+                    None if structured else self.registration_address_str(input_dict),
+                    self.mailing_address_str(input_dict)):
+                if address_str is None:
+                    continue
+                strings += 1
+                distinct.setdefault(normalize_address(address_str), None)
+        return strings, list(distinct)
+
+    def rule_tag_batch(self, keys):
+        """
+        Inputs:
+            keys: distinct normalized address strings
+        Outputs:
+            ({key: tag output} of the strings fast_tagger.tag() read, list
+            of the keys left for usaddress), every key is left when
+            fast_tagger is off
+        """
+        if not self.fast_tagger:
+            return {}, keys
+        tagged = {}
+        rest = []
+        for key in keys:
+            parsed = rule_tag(key)
+            if parsed is None:
+                rest.append(key)
+            else:
+                tagged[key] = parsed
+        return tagged, rest
+
+    def parse_address_batch(self, input_dicts):
+        """
+        Tags every distinct address string of a batch of rows once. Files are
+        often sorted by precinct or street, so the same address comes up
+        many times in a row. tag_address() answers from the batch until the
+        next one is parsed.
+
+        Inputs:
+            input_dicts: list of rows from the preparer
+        Outputs:
+            (address strings in the batch, distinct strings parsed, how many
+            of those fast_tagger.tag() read)
+        """
+        strings, keys = self.batch_address_strs(input_dicts)
+        self.address_batch, rest = self.rule_tag_batch(keys)
+        self.address_batch.update((key, parse_address(key)) for key in rest)
+        return strings, len(keys), len(keys) - len(rest)
+
+    def address_batches(self, input_iter, batch_size=ADDRESS_BATCH_SIZE,
+                        telemetry=None, pool=None):
+        """
+        Yields the rows of input_iter, parsing the distinct addresses of every
+        batch_size rows before they are processed
+
+        Inputs:
+            input_iter: rows from the preparer
+            batch_size: rows per batch
+            telemetry: RunTelemetry getting the time spent parsing (or waiting
+                on the pool) as the `addresses` stage, the strings that
+                didn't need a parse as cache hits and, with fast_tagger on,
+                the strings it read as `fast_tagger` hits
+            pool: AddressParserPool (see address_pool.py) parsing the next
+                batch while the rows of this one are processed, addresses
+                are parsed here when not given
+        """
+        iterator = iter(input_iter)
+        strings = parsed = ruled = 0
+        pending = None
+        try:
+            while True:
+                batch = list(islice(iterator, batch_size))
+                since = clock()
+                if pool is None:
+                    if not batch:
+                        break
+                    batch_strings, batch_parsed, batch_ruled = \
+                        self.parse_address_batch(batch)
+                    ready = batch
+                else:
+                    # Send this batch off, then wait for the one before it
+                    submitted = None
+                    if batch:
+                        batch_strings, keys = self.batch_address_strs(batch)
+                        tagged, rest = self.rule_tag_batch(keys)
+                        submitted = (batch, tagged, rest, pool.submit(rest))
+                        batch_parsed = len(keys)
+                        batch_ruled = len(tagged)
+                    if pending is None:
+                        ready = None
+                    else:
+                        ready, tagged, rest, futures = pending
+                        tagged.update(zip(rest, pool.results(futures)))
+                        self.address_batch = tagged
+                    pending = submitted
+                    if not batch and ready is None:
+                        break
+                if batch:
+                    strings += batch_strings
+                    parsed += batch_parsed
+                    ruled += batch_ruled
+                if telemetry is not None:
+                    telemetry.lap('addresses', since)
+                for input_dict in ready or ():
+                    yield input_dict
+        finally:
+            if pending is not None:
+                for future in pending[3]:
+                    future.cancel()
+            self.address_batch = None
+        if telemetry is not None:
+            telemetry.cache('addresses', strings - parsed, parsed)
+            if self.fast_tagger:
+                telemetry.cache('fast_tagger', ruled, parsed - ruled)
+
     #### Use the registerd address if no mailing address provided
     def fix_missing_mailing_addr(self, orig_dict):
         """
@@ -389,23 +702,10 @@ class BaseTransformer(object):
             if(orig_dict['STREET_NAME']):
                 copied_addr = {
                     'MAIL_ADDRESS_LINE1': self.construct_val(
-                        orig_dict,
-                        [
-                            'ADDRESS_NUMBER_PREFIX',
-                            'ADDRESS_NUMBER',
-                            'ADDRESS_NUMBER_SUFFIX',
-                            'STREET_NAME_PRE_DIRECTIONAL',
-                            'STREET_NAME_PRE_MODIFIER',
-                            'STREET_NAME_PRE_TYPE',
-                            'STREET_NAME',
-                            'STREET_NAME_POST_DIRECTIONAL',
-                            'STREET_NAME_POST_MODIFIER',
-                            'STREET_NAME_POST_TYPE'
-                        ]
+                        orig_dict, self.mail_address_line1_fields
                     ),
                     'MAIL_ADDRESS_LINE2': self.construct_val(
-                        orig_dict,
-                        ['OCCUPANCY_TYPE', 'OCCUPANCY_IDENTIFIER']
+                        orig_dict, self.mail_address_line2_fields
                     ),
                     'MAIL_CITY': orig_dict['PLACE_NAME'],
                     'MAIL_STATE': orig_dict['STATE_NAME'],
@@ -428,8 +728,12 @@ class BaseTransformer(object):
     def construct_val(self, aDir, fields):
         result = ""
         for aField in fields:
-            if(aDir[aField]):
-                result = result + (aDir[aField].strip()+" " if aDir[aField].strip() else '')
+            value = aDir[aField]
+            if value:
+                # Stripped once, not twice
+                value = value.strip()
+                if value:
+                    result += value + " "
         return result
 
     def constructEmptyResidentialAddress(self):
@@ -565,7 +869,7 @@ class BaseTransformer(object):
             Dictionary containing tagged parts of addresses
         """
         try:
-            usaddress_dict, usaddress_type = usaddress.tag(address_str)
+            usaddress_dict, usaddress_type = self.tag_address(address_str)
 
             # if contains a PO Box ID consider it a PO Box, else a Street Address
             if 'USPSBoxID' in usaddress_dict:
@@ -580,6 +884,90 @@ class BaseTransformer(object):
             return None, None
 
 
+    def tag_address(self, address_str):
+        """
+        usaddress.tag, taken from the current address batch when the string
+        was parsed ahead, or from fast_tagger.tag() when fast_tagger is on and
+        it can read the string. Outside of batches the last string parsed is
+        kept, so a mailing address equal to the residence (after
+        normalize_address) is only parsed once. Raises
+        usaddress.RepeatedLabelError the same way.
+        """
+        key = normalize_address(address_str)
+        tagged = self.address_batch.get(key) if self.address_batch else None
+        if tagged is None:
+            last = self.last_address
+            if last is not None and last[0] == key:
+                # A mailing address that's the residence, or the next voter
+                # of the household
+                tagged = last[1]
+            else:
+                if self.fast_tagger:
+                    tagged = rule_tag(key)
+                if tagged is None:
+                    tagged = parse_address(key)
+                self.last_address = (key, tagged)
+        if isinstance(tagged, usaddress.RepeatedLabelError):
+            raise tagged
+        usaddress_dict, usaddress_type = tagged
+        # Rows of the batch share the parse, callers may change their copy
+        return usaddress_dict.copy(), usaddress_type
+
+    def structured_address(self, input_dict):
+        """
+        Maps the pre-split address columns of structured_address_columns
+        straight to the standard columns, without tagging a string. When
+        there is no STREET_NAME_POST_TYPE column, a street type at the end of
+        the street name is split off.
+
+        Inputs:
+            input_dict: dictionary of form {colname: value} from raw data
+        Outputs:
+            Dictionary like convert_usaddress_dict() returns, None when the
+            state has no structured columns or they don't fit together (no
+            number or street, a directional that isn't one...) and the
+            address has to be tagged instead
+        """
+        columns = self.structured_address_columns
+        if not columns:
+            return None
+        values = dict((k, (input_dict.get(c) or '').strip())
+                      for k, c in columns.items())
+
+        number = values.get('ADDRESS_NUMBER')
+        street = values.get('STREET_NAME')
+        if not number or not street or not ADDRESS_NUMBER_RE.match(number):
+            return None
+        suffix = values.get('ADDRESS_NUMBER_SUFFIX')
+        if suffix and not ADDRESS_NUMBER_SUFFIX_RE.match(suffix):
+            return None
+        for key in ('STREET_NAME_PRE_DIRECTIONAL',
+                    'STREET_NAME_POST_DIRECTIONAL'):
+            if values.get(key) and values[key].upper() not in DIRECTIONALS:
+                return None
+
+        if 'STREET_NAME_POST_TYPE' not in columns:
+            words = street.rsplit(None, 1)
+            if len(words) == 2 and words[1].upper() in STREET_TYPES:
+                values['STREET_NAME'], values['STREET_NAME_POST_TYPE'] = words
+
+        unit = values.pop('OCCUPANCY', None)
+        if unit:
+            words = unit.split(None, 1)
+            if words[0].upper() in UNIT_DESIGNATORS:
+                values['OCCUPANCY_TYPE'] = words[0]
+                values['OCCUPANCY_IDENTIFIER'] = words[1] if len(words) > 1 else ''
+            else:
+                values['OCCUPANCY_IDENTIFIER'] = unit
+        identifier = values.get('OCCUPANCY_IDENTIFIER')
+        if identifier and not OCCUPANCY_IDENTIFIER_RE.match(identifier):
+            return None
+
+        address_dict = dict.fromkeys(self.usaddress_to_standard_colnames_dict.values())
+        for k, v in values.items():
+            address_dict[k] = v or None
+        return address_dict
+
     def convert_usaddress_dict(self, usaddress_dict):
         """
         Used for extract_registration_address. We use the usaddress package to
@@ -597,7 +985,20 @@ class BaseTransformer(object):
         address_dict = {}
         for k, v in self.usaddress_to_standard_colnames_dict.items():
             address_dict[v] = usaddress_dict.get(k, None)
-        return address_dict
+        return self.standardize_address(address_dict)
+
+    def standardize_address(self, address_dict):
+        """
+        Inputs:
+            address_dict: dictionary of form {standardized_colname: value},
+                or None
+        Outputs:
+            address_dict with standardized values when standardize_addresses
+            is set, unchanged otherwise
+        """
+        if not self.standardize_addresses or address_dict is None:
+            return address_dict
+        return standardize_components(address_dict, COLUMN_TABLES)
 
     def construct_mail_address_1(self, usaddress_dict, usaddress_type):
         """
@@ -608,6 +1009,8 @@ class BaseTransformer(object):
         Outputs:
             String suitable for 'MAIL_ADDRESS_LINE1'
         """
+        if self.standardize_addresses:
+            usaddress_dict = standardize_components(usaddress_dict)
         if usaddress_type == 'Street Address':
             cols = [
                 'AddressNumberPrefix',
@@ -647,6 +1050,8 @@ class BaseTransformer(object):
         Outputs:
             String suitable for 'MAIL_ADDRESS_LINE2'
         """
+        if self.standardize_addresses:
+            usaddress_dict = standardize_components(usaddress_dict)
         cols = ['OccupancyType', 'OccupancyIdentifier']
         output_vals = [
             usaddress_dict[x] for x in cols if x in usaddress_dict
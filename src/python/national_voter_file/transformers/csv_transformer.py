@@ -1,12 +1,36 @@
 import csv
 import os
+import sys
+import time
 import zipfile
 import argparse
 import traceback
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import cpu_count, current_process
 
-from national_voter_file.transformers.base import (DATA_DIR,
+from national_voter_file.transformers.address_pool import AddressParserPool
+from national_voter_file.transformers.base import (ADDRESS_BATCH_SIZE,
+                                                   DATA_DIR,
                                                    BasePreparer,
                                                    BaseTransformer)
+from national_voter_file.transformers.dimensions import (DEFAULT_MAX_IN_MEMORY,
+                                                         DimensionSplitter,
+                                                         dimension_paths,
+                                                         voter_fieldnames)
+from national_voter_file.transformers.districts import (DistrictAssigner,
+                                                        format_stats,
+                                                        load_layers,
+                                                        parse_layer_spec)
+from national_voter_file.transformers.geocoder import (INTERPOLATED,
+                                                       NOT_GEOCODED,
+                                                       AddressRangeIndex,
+                                                       geocode_file)
+from national_voter_file.transformers.telemetry import (SAMPLE_EVERY,
+                                                        RunTelemetry,
+                                                        clock,
+                                                        report_path)
 from national_voter_file.us_states.all import load as load_states
 
 parser = argparse.ArgumentParser(description='Process some integers.')
@@ -24,11 +48,100 @@ parser.add_argument('--history',
                     dest='history',
                     action='store_true',
                     help='Flag for setting whether to run vote history processing')
+parser.add_argument('--dimensions',
+                    dest='dimensions',
+                    action='store_true',
+                    help='Write distinct households and mailing addresses to '
+                         'their own files, keyed by hash from the voter file')
+parser.add_argument('--dimension-memory',
+                    dest='dimension_memory', type=int,
+                    default=DEFAULT_MAX_IN_MEMORY, metavar='ROWS',
+                    help='distinct addresses held in memory before de-duplication '
+                         'spills to disk (default {})'.format(DEFAULT_MAX_IN_MEMORY))
+parser.add_argument('--geocode',
+                    dest='geocode', nargs='+', default=None,
+                    metavar='RANGES_CSV',
+                    help='fill GEOM and GEOCODE_STATUS of the households file '
+                         'from TIGER ADDRFEAT address ranges saved as CSV '
+                         '(needs --dimensions)')
+parser.add_argument('--districts',
+                    dest='districts', action='append', default=None,
+                    metavar='COLUMN:PROPERTY=GEOJSON',
+                    help='fill in blank values of a precinct or district '
+                         'column, and check the others, from the boundary '
+                         'polygons holding each geocoded household, '
+                         'repeatable (needs --geocode)')
+parser.add_argument('--address-batch',
+                    dest='address_batch', type=int,
+                    default=ADDRESS_BATCH_SIZE, metavar='ROWS',
+                    help='rows whose distinct address strings are parsed '
+                         'together, 0 to parse row by row '
+                         '(default {})'.format(ADDRESS_BATCH_SIZE))
+parser.add_argument('--address-workers',
+                    dest='address_workers', type=int, default=0, metavar='N',
+                    help='processes tagging addresses for each state, so the '
+                         'next batch is parsed while this one is transformed '
+                         '(default 0: parse in the state\'s own process)')
+parser.add_argument('--fast-tagger',
+                    dest='fast_tagger', action='store_true',
+                    help='tag simple street addresses with rules and only the '
+                         'rest with usaddress, check the state with '
+                         'tagger_agreement.py first')
+parser.add_argument('--standardize-addresses',
+                    dest='standardize_addresses', action='store_true',
+                    help='upper case parsed address components and use USPS '
+                         'abbreviations for directionals, street types and '
+                         'unit designators')
+parser.add_argument('-w', '--workers',
+                    dest='workers', type=int, default=None, metavar='N',
+                    help='maximum number of states transformed at the same time '
+                         '(default: number of CPUs)')
+parser.add_argument('--progress-interval',
+                    dest='progress_interval', type=float, default=30,
+                    metavar='SECONDS',
+                    help='seconds between progress lines, 0 to turn them off '
+                         '(default 30)')
+parser.add_argument('--profile-extracts',
+                    dest='profile_extracts', type=int, nargs='?',
+                    const=SAMPLE_EVERY, default=None, metavar='EVERY',
+                    help='count calls to each extract/hist_ method and time '
+                         'them on one row in EVERY (default {}), printing a '
+                         'ranked table per state'.format(SAMPLE_EVERY))
 
 class CsvOutput(object):
 
-    def __init__(self, state_transformer):
+    def __init__(self, state_transformer, dimensions=False,
+                 dimension_memory=DEFAULT_MAX_IN_MEMORY, telemetry=None,
+                 address_batch=ADDRESS_BATCH_SIZE, address_workers=0,
+                 geocoder=None, districts=None):
+        """
+        Inputs:
+            state_transformer: StateTransformer instance
+            dimensions: also write `_households.csv` and `_mailing_addresses.csv`
+                next to the output, leaving only hash keys in the voter file
+            dimension_memory: distinct addresses kept in memory per dimension
+                before de-duplication spills to disk
+            telemetry: RunTelemetry collecting rows, stage times and progress,
+                one without progress lines is used if not given
+            address_batch: rows whose distinct address strings are parsed
+                once before the rows are transformed, 0 to parse every row
+                on its own
+            address_workers: processes of an AddressParserPool parsing the
+                next batch of addresses while one is transformed, 0 for none
+            geocoder: AddressRangeIndex locating the households once the
+                dimension files are written, None to leave GEOM empty
+            districts: PolygonLayers filling in and checking the precinct
+                and district columns of the voter file from the geocoded
+                households
+        """
         self.state_transformer = state_transformer
+        self.dimensions = dimensions
+        self.dimension_memory = dimension_memory
+        self.telemetry = telemetry
+        self.address_batch = address_batch
+        self.address_workers = address_workers
+        self.geocoder = geocoder
+        self.districts = districts
 
     def __call__(self, input_iter, output_path, history=False):
         """
@@ -37,46 +150,169 @@ class CsvOutput(object):
         Should not be overwritten in the subclass, this method enforces a
         similar check on all data created
         """
+        if self.telemetry is None:
+            self.telemetry = RunTelemetry(os.path.basename(output_path))
+        telemetry = self.telemetry
+
         fieldnames = sorted(BaseTransformer.col_type_dict.keys())
         if history:
             fieldnames = sorted(BaseTransformer.history_type_dict.keys())
 
-        with self.open(output_path, 'w') as outfile:
-            writer = csv.DictWriter(outfile, fieldnames=fieldnames)
+        splitter = None
+        if self.dimensions and not history:
+            splitter = DimensionSplitter(output_path,
+                                         max_in_memory=self.dimension_memory)
+            fieldnames = voter_fieldnames(fieldnames)
+
+        with self.open(output_path, 'w') as outfile, \
+                self.address_pool(history) as pool:
+            # The split off address columns are left out of the voter file
+            writer = csv.DictWriter(outfile, fieldnames=fieldnames,
+                                    extrasaction='ignore' if splitter else 'raise')
             writer.writeheader()
-            for input_dict in input_iter:
+            rows = telemetry.timed(input_iter)
+            if self.address_batch and not history:
+                rows = self.state_transformer.address_batches(
+                    rows, self.address_batch, telemetry, pool
+                )
+            for input_dict in rows:
                 try:
+                    since = clock()
                     if not history:
                         output_dict = self.state_transformer.process_row(input_dict)
                         output_dict = self.state_transformer.fix_missing_mailing_addr(output_dict)
+                        since = telemetry.lap('transform', since)
 
                         self.state_transformer.validate_output_row(output_dict)
+                        since = telemetry.lap('validate', since)
+                        if splitter is not None:
+                            output_dict = splitter.split(output_dict)
+                            since = telemetry.lap('dimensions', since)
                     else:
                         output_dict = self.state_transformer.process_row(
                             input_dict, history=True
                         )
+                        since = telemetry.lap('transform', since)
                         self.state_transformer.validate_output_row(
                             output_dict, history=True
                         )
+                        since = telemetry.lap('validate', since)
                     writer.writerow(output_dict)
+                    telemetry.lap('write', since)
+                    # VALIDATION_STATUS 1 means usaddress couldn't parse the address
+                    telemetry.row(rejected=output_dict.get('VALIDATION_STATUS') == '1')
                 except Exception as err:
                     print("Exception processing row")
                     print(input_dict)
                     raise err
 
+        if splitter is not None:
+            since = clock()
+            splitter.close()
+            telemetry.lap('dimensions', since)
+            for name, dim in (('households', splitter.households),
+                              ('mailing_addresses', splitter.mailing_addresses)):
+                telemetry.cache(name, dim.duplicates, dim.distinct)
+            print('{} distinct households, {} distinct mailing addresses '
+                  'from {} rows'.format(splitter.households.distinct,
+                                        splitter.mailing_addresses.distinct,
+                                        splitter.households.rows))
+            if self.geocoder is not None:
+                since = clock()
+                counts = geocode_file(dimension_paths(output_path)[0],
+                                      self.geocoder)
+                telemetry.lap('geocode', since)
+                geocoded = sum(counts.values()) - counts[NOT_GEOCODED]
+                telemetry.cache('geocoder', geocoded, counts[NOT_GEOCODED])
+                print('{} of {} households geocoded, {} interpolated in '
+                      'a range'.format(geocoded, sum(counts.values()),
+                                       counts[INTERPOLATED]))
+            if self.geocoder is not None and self.districts:
+                since = clock()
+                assigner = DistrictAssigner(self.districts)
+                assigner.assign_households(dimension_paths(output_path)[0])
+                stats = assigner.fill_voters(output_path)
+                telemetry.lap('districts', since)
+                telemetry.extra['districts'] = stats
+                print(format_stats(stats))
+        telemetry.finish()
+
+    @contextmanager
+    def address_pool(self, history=False):
+        """AddressParserPool for address_workers, None without them"""
+        if self.address_batch and self.address_workers and not history:
+            if current_process().daemon:
+                # A state of run_states() before Python 3.9, whose pool
+                # workers can't start processes of their own
+                print('--address-workers ignored in a daemonic worker '
+                      'process, parsing addresses in this one')
+                yield None
+                return
+            with AddressParserPool(self.address_workers) as pool:
+                yield pool
+        else:
+            yield None
+
     open = BasePreparer.open
 
 
-def main():
-    args = parser.parse_args()
-    states = args.states.split(',')
-    state_mods = load_states(states)
-    for i, s in enumerate(state_mods):
-        state = states[i]
+class StatePrefixedStream(object):
+    """
+    Prefixes every line written with the state, so the output of states
+    transformed at the same time can be told apart
+    """
+
+    def __init__(self, stream, state):
+        self.stream = stream
+        self.prefix = '[{}] '.format(state)
+        self.line_start = True
+
+    def write(self, text):
+        lines = text.split('\n')
+        out = []
+        for i, line in enumerate(lines):
+            if line and self.line_start:
+                out.append(self.prefix)
+            out.append(line)
+            if i < len(lines) - 1:
+                out.append('\n')
+                self.line_start = True
+            elif line:
+                self.line_start = False
+        self.stream.write(''.join(out))
+        return len(text)
+
+    def flush(self):
+        self.stream.flush()
+
+
+def transform_state(state, args):
+    """
+    Transforms a single state, run in its own process when several states
+    are requested
+
+    Inputs:
+        state: postal initials of the state
+        args: parsed command line arguments
+    Outputs:
+        (state, seconds, traceback string or None)
+    """
+    started = time.time()
+    stdout, stderr = sys.stdout, sys.stderr
+    sys.stdout = StatePrefixedStream(stdout, state)
+    sys.stderr = StatePrefixedStream(stderr, state)
+    try:
+        s = load_states([state])[0]
         input_path = args.input_path
         output_path = args.output_path
 
         state_transformer = s.transformer.StateTransformer()
+        if args.profile_extracts:
+            state_transformer.enable_profiling(args.profile_extracts)
+        if args.fast_tagger:
+            state_transformer.fast_tagger = True
+        if args.standardize_addresses:
+            state_transformer.standardize_addresses = True
         state_preparer = getattr(s.transformer,
                                  'StatePreparer',
                                  BasePreparer)(input_path,
@@ -92,8 +328,119 @@ def main():
                 output_file = '{}_history_output.csv'.format(state)
             output_path = os.path.join(output_path, output_file)
 
-        writer = CsvOutput(state_transformer)
+        geocoder = None
+        if args.geocode:
+            geocoder = AddressRangeIndex.from_files(args.geocode)
+            print('{} address ranges loaded from {} edges'.format(
+                len(geocoder), geocoder.edges))
+        districts = load_layers(args.districts) if args.districts else None
+
+        telemetry = RunTelemetry(state,
+                                 interval=args.progress_interval,
+                                 total_bytes=state_preparer.input_size(),
+                                 total_rows=state_preparer.row_count(),
+                                 progress=state_preparer.read_position)
+        writer = CsvOutput(state_transformer,
+                           dimensions=args.dimensions,
+                           dimension_memory=args.dimension_memory,
+                           telemetry=telemetry,
+                           address_batch=args.address_batch,
+                           address_workers=args.address_workers,
+                           geocoder=geocoder,
+                           districts=districts)
         writer(state_preparer.process(), output_path, history=args.history)
+        if state_transformer.profiler is not None:
+            telemetry.extra['profile'] = state_transformer.profiler.report()
+            print(state_transformer.profiler.table())
+        telemetry.write_report(report_path(output_path))
+        print('done: {}'.format(telemetry.progress_line()))
+    except Exception:
+        error = traceback.format_exc()
+        print(error, end='')
+    else:
+        error = None
+    finally:
+        sys.stdout.flush()
+        sys.stdout, sys.stderr = stdout, stderr
+    return state, time.time() - started, error
+
+
+def run_states(states, args, workers):
+    """
+    Transforms states in worker processes, at most workers at a time
+
+    A worker that dies (e.g. killed for running out of memory) breaks the whole
+    pool and fails every state still in it. The states that didn't finish are
+    then run again one process each, so only the one that dies on its own is
+    reported failed.
+
+    Outputs:
+        list of (state, seconds, traceback string or None)
+    """
+    results = []
+    pending = list(states)
+    isolated = False
+    while pending:
+        batch = pending[:1] if isolated else pending
+        started = time.time()
+        with ProcessPoolExecutor(max_workers=1 if isolated else workers) as pool:
+            futures = dict((pool.submit(transform_state, state, args), state)
+                           for state in batch)
+            broken = []
+            for future in as_completed(futures):
+                state = futures[future]
+                try:
+                    result = future.result()
+                except BrokenProcessPool as err:
+                    if not isolated:
+                        broken.append(state)
+                        continue
+                    result = (state, time.time() - started,
+                              'worker process died: {!r}'.format(err))
+                except Exception:
+                    result = (state, time.time() - started,
+                              traceback.format_exc())
+                state, seconds, error = result
+                print('[{}] {} after {:.1f}s'.format(
+                    state, 'failed' if error else 'finished', seconds))
+                results.append(result)
+        if broken:
+            print('A worker process died, running {} again one at a '
+                  'time'.format(', '.join(sorted(broken))))
+            isolated = True
+        pending = [state for state in pending
+                   if state not in set(r[0] for r in results)]
+    return results
+
+
+def main():
+    args = parser.parse_args()
+    if args.geocode and not args.dimensions:
+        parser.error('--geocode writes to the households file of --dimensions')
+    if args.districts:
+        if not args.geocode:
+            parser.error('--districts needs the points of --geocode')
+        for spec in args.districts:
+            try:
+                column = parse_layer_spec(spec)[0]
+            except ValueError as err:
+                parser.error(str(err))
+            if column not in BaseTransformer.col_type_dict:
+                parser.error('--districts: {} is not a voter file '
+                             'column'.format(column))
+    states = args.states.split(',')
+    workers = min(len(states), args.workers or cpu_count())
+
+    if workers <= 1:
+        results = [transform_state(state, args) for state in states]
+    else:
+        # One process per state, so a failure in one doesn't stop the others
+        results = run_states(states, args, workers)
+
+    failed = [state for state, _, error in results if error]
+    if failed:
+        print('Failed states: {}'.format(', '.join(sorted(failed))))
+        sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,247 @@
+import csv
+import hashlib
+import os
+import shutil
+import struct
+import tempfile
+
+"""
+# Household and mailing address dimension files
+
+Every transformed voter row carries a full copy of its residential and mailing
+address. When CsvOutput is asked for dimension files, each address is written
+once to a `households` or `mailing_addresses` file keyed by a 64 bit HASHCODE,
+and the voter file only keeps the two hash keys.
+
+De-duplication holds up to `max_in_memory` hashes in a set. Past that, new rows
+are spilled into hash-partitioned bucket files and each bucket is de-duplicated
+on its own when the writer is closed, so memory stays bounded for any input size.
+"""
+
+# Columns of HOUSEHOLD_DIM that come out of the transformers
+HOUSEHOLD_FIELDS = [
+    'ADDRESS_NUMBER',
+    'ADDRESS_NUMBER_PREFIX',
+    'ADDRESS_NUMBER_SUFFIX',
+    'BUILDING_NAME',
+    'CORNER_OF',
+    'INTERSECTION_SEPARATOR',
+    'LANDMARK_NAME',
+    'NOT_ADDRESS',
+    'OCCUPANCY_TYPE',
+    'OCCUPANCY_IDENTIFIER',
+    'PLACE_NAME',
+    'STATE_NAME',
+    'STREET_NAME',
+    'STREET_NAME_PRE_DIRECTIONAL',
+    'STREET_NAME_PRE_MODIFIER',
+    'STREET_NAME_PRE_TYPE',
+    'STREET_NAME_POST_DIRECTIONAL',
+    'STREET_NAME_POST_MODIFIER',
+    'STREET_NAME_POST_TYPE',
+    'SUBADDRESS_IDENTIFIER',
+    'SUBADDRESS_TYPE',
+    'USPS_BOX_GROUP_ID',
+    'USPS_BOX_GROUP_TYPE',
+    'USPS_BOX_ID',
+    'USPS_BOX_TYPE',
+    'ZIP_CODE',
+    'RAW_ADDR1',
+    'RAW_ADDR2',
+    'RAW_CITY',
+    'RAW_ZIP',
+    'VALIDATION_STATUS',
+]
+
+# Parsed columns identifying a household, everything before the raw columns.
+# The raw columns are used instead when none of the street level components
+# could be parsed, otherwise every unparsed row in a state would collapse into
+# a single household.
+HOUSEHOLD_KEY_FIELDS = HOUSEHOLD_FIELDS[:HOUSEHOLD_FIELDS.index('RAW_ADDR1')]
+HOUSEHOLD_PARSED_FIELDS = ['ADDRESS_NUMBER', 'STREET_NAME', 'USPS_BOX_ID',
+                           'BUILDING_NAME', 'LANDMARK_NAME']
+HOUSEHOLD_RAW_KEY_FIELDS = ['RAW_ADDR1', 'RAW_ADDR2', 'RAW_CITY', 'RAW_ZIP',
+                            'STATE_NAME']
+
+# Transformer output column -> MAILING_ADDRESS_DIM column
+MAILING_ADDRESS_FIELDS = [
+    ('MAIL_ADDRESS_LINE1', 'ADDRESS_LINE1'),
+    ('MAIL_ADDRESS_LINE2', 'ADDRESS_LINE2'),
+    ('MAIL_CITY', 'CITY'),
+    ('MAIL_STATE', 'STATE'),
+    ('MAIL_ZIP_CODE', 'ZIP_CODE'),
+    ('MAIL_COUNTRY', 'COUNTRY'),
+]
+
+HOUSEHOLD_KEY = 'HOUSEHOLD_HASHCODE'
+MAILING_ADDRESS_KEY = 'MAILING_ADDRESS_HASHCODE'
+
+DEFAULT_MAX_IN_MEMORY = 2000000
+SPILL_BUCKETS = 64
+
+
+def hashcode(values):
+    """
+    Inputs:
+        values: iterable of column values, None is treated as empty
+    Outputs:
+        Signed 64 bit integer, suitable for a BIGINT HASHCODE column
+    """
+    key = '\x1f'.join('' if v is None else str(v).strip().upper() for v in values)
+    digest = hashlib.md5(key.encode('utf-8')).digest()
+    return struct.unpack('>q', digest[:8])[0]
+
+
+def household_hashcode(output_dict):
+    if any(output_dict.get(c) for c in HOUSEHOLD_PARSED_FIELDS):
+        return hashcode(output_dict.get(c) for c in HOUSEHOLD_KEY_FIELDS)
+    return hashcode(output_dict.get(c) for c in HOUSEHOLD_RAW_KEY_FIELDS)
+
+
+def mailing_address_hashcode(output_dict):
+    return hashcode(output_dict.get(c) for c, _ in MAILING_ADDRESS_FIELDS)
+
+
+def dimension_paths(output_path):
+    """
+    Inputs:
+        output_path: path of the voter output file
+    Outputs:
+        (households_path, mailing_addresses_path) next to output_path
+    """
+    base = os.path.splitext(output_path)[0]
+    return ('{}_households.csv'.format(base),
+            '{}_mailing_addresses.csv'.format(base))
+
+
+def voter_fieldnames(fieldnames):
+    """Slim voter columns: everything but the dimension columns, plus the keys"""
+    dim_cols = set(HOUSEHOLD_FIELDS) | set(c for c, _ in MAILING_ADDRESS_FIELDS)
+    dim_cols.discard('STATE_NAME')
+    return [f for f in fieldnames if f not in dim_cols] + [HOUSEHOLD_KEY,
+                                                           MAILING_ADDRESS_KEY]
+
+
+class DistinctWriter(object):
+    """
+    Writes each HASHCODE once to a csv file.
+
+    Rows are written straight through while fewer than max_in_memory distinct
+    hashes have been seen. After that the in-memory set is frozen and new rows
+    are appended to one of SPILL_BUCKETS temporary files chosen by hash, which
+    close() de-duplicates one bucket at a time.
+    """
+
+    def __init__(self, path, fieldnames, max_in_memory=DEFAULT_MAX_IN_MEMORY):
+        self.path = path
+        self.fieldnames = list(fieldnames) + ['HASHCODE']
+        self.max_in_memory = max_in_memory
+        self.seen = set()
+        self.rows = 0
+        self.distinct = 0
+        self.spill_dir = None
+        self.spill_files = None
+
+        self.outfile = open(path, 'w', newline='')
+        self.writer = csv.DictWriter(self.outfile, fieldnames=self.fieldnames,
+                                     extrasaction='ignore')
+        self.writer.writeheader()
+
+    @property
+    def duplicates(self):
+        """Exact once the writer is closed"""
+        return self.rows - self.distinct
+
+    def add(self, key, row):
+        """
+        Inputs:
+            key: HASHCODE of the row
+            row: dict with (at least) the writer's fieldnames
+        """
+        self.rows += 1
+        if key in self.seen:
+            return
+        row['HASHCODE'] = key
+        if self.spill_files is None:
+            self.seen.add(key)
+            self.writer.writerow(row)
+            self.distinct += 1
+            if len(self.seen) >= self.max_in_memory:
+                self._start_spill()
+        else:
+            self.spill_files[key % SPILL_BUCKETS].writerow(row)
+
+    def _start_spill(self):
+        self.spill_dir = tempfile.mkdtemp(
+            prefix='nvf_dim_', dir=os.path.dirname(os.path.abspath(self.path))
+        )
+        self._spill_handles = []
+        self.spill_files = []
+        for i in range(SPILL_BUCKETS):
+            handle = open(os.path.join(self.spill_dir, '{}.csv'.format(i)),
+                          'w', newline='')
+            self._spill_handles.append(handle)
+            self.spill_files.append(csv.DictWriter(
+                handle, fieldnames=self.fieldnames, extrasaction='ignore'
+            ))
+
+    def close(self):
+        if self.spill_files is not None:
+            for handle in self._spill_handles:
+                handle.close()
+            for i in range(SPILL_BUCKETS):
+                bucket_seen = set()
+                with open(os.path.join(self.spill_dir, '{}.csv'.format(i)),
+                          newline='') as bucket:
+                    reader = csv.DictReader(bucket, fieldnames=self.fieldnames)
+                    for row in reader:
+                        key = int(row['HASHCODE'])
+                        if key not in bucket_seen:
+                            bucket_seen.add(key)
+                            self.writer.writerow(row)
+                            self.distinct += 1
+            shutil.rmtree(self.spill_dir)
+            self.spill_files = None
+        self.outfile.close()
+
+
+class DimensionSplitter(object):
+    """
+    Splits validated voter rows into a slim voter row plus household and
+    mailing address rows written through DistinctWriters.
+    """
+
+    def __init__(self, output_path, max_in_memory=DEFAULT_MAX_IN_MEMORY):
+        households_path, mailing_path = dimension_paths(output_path)
+        self.households = DistinctWriter(households_path, HOUSEHOLD_FIELDS,
+                                         max_in_memory=max_in_memory)
+        self.mailing_addresses = DistinctWriter(
+            mailing_path, [c for _, c in MAILING_ADDRESS_FIELDS],
+            max_in_memory=max_in_memory
+        )
+
+    def split(self, output_dict):
+        """
+        Inputs:
+            output_dict: validated row from a StateTransformer
+        Outputs:
+            The voter row, with dimension columns replaced by hash keys
+        """
+        household_key = household_hashcode(output_dict)
+        self.households.add(household_key,
+                            dict((c, output_dict[c]) for c in HOUSEHOLD_FIELDS))
+
+        mailing_key = mailing_address_hashcode(output_dict)
+        self.mailing_addresses.add(
+            mailing_key,
+            dict((dim_col, output_dict[c]) for c, dim_col in MAILING_ADDRESS_FIELDS)
+        )
+
+        voter_dict = dict(output_dict)
+        voter_dict[HOUSEHOLD_KEY] = household_key
+        voter_dict[MAILING_ADDRESS_KEY] = mailing_key
+        return voter_dict
+
+    def close(self):
+        self.households.close()
+        self.mailing_addresses.close()
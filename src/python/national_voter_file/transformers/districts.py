@@ -0,0 +1,351 @@
+import argparse
+import csv
+import json
+import math
+import os
+import re
+from bisect import bisect_left
+
+from national_voter_file.transformers.dimensions import (HOUSEHOLD_KEY,
+                                                         dimension_paths)
+
+"""
+# Precinct and district assignment
+
+Precinct and district columns come from the state files, and many are blank.
+Once the households are geocoded (geocoder.py), each household's point is
+looked up in local boundary files, one PolygonLayer per voter file column,
+and the voter file is rewritten with the blank columns filled in. Columns the
+state did fill are cross-checked, and the share that agrees with the
+boundaries is reported per column.
+
+Boundaries are read from GeoJSON in lon/lat (Census TIGER shapefiles converted
+with `ogr2ogr -f GeoJSON -t_srs EPSG:4326 precincts.geojson precincts.shp`).
+A layer spreads its polygons over a grid of about CELLS_PER_POLYGON cells per
+polygon, by bounding box. Points are located in bulk: those of a batch are
+grouped by grid cell, and each candidate polygon of a cell is tested against
+all of the cell's points at once. The points are sorted by latitude, so every
+polygon edge only looks at the points level with it.
+
+    python -m national_voter_file.transformers.districts \\
+        -l PRECINCT:NAME=precincts.geojson -l CONGRESSIONAL_DIST:CD115FP=cd115.geojson \\
+        data/mi_output.csv
+"""
+
+CELLS_PER_POLYGON = 4
+ASSIGN_BATCH_SIZE = 10000
+
+POINT_RE = re.compile(r'POINT\s*\(\s*(\S+)\s+(\S+)\s*\)', re.IGNORECASE)
+
+
+def parse_point(geom):
+    """(lon, lat) of a POINT in WKT or EWKT, None for anything else"""
+    match = POINT_RE.search(geom or '')
+    if match is None:
+        return None
+    return float(match.group(1)), float(match.group(2))
+
+
+def parse_layer_spec(spec):
+    """
+    Inputs:
+        spec: COLUMN:PROPERTY=PATH, e.g. PRECINCT:NAME=precincts.geojson
+    Outputs:
+        (column, property, path)
+    """
+    target, sep, path = spec.partition('=')
+    column, colon, prop = target.partition(':')
+    if not sep or not colon or not column or not prop or not path:
+        raise ValueError('expected COLUMN:PROPERTY=PATH, got {!r}'.format(spec))
+    return column, prop, path
+
+
+def same_code(a, b):
+    """District codes compare case blind, and as numbers when both are"""
+    a, b = a.strip().upper(), b.strip().upper()
+    if a.isdigit() and b.isdigit():
+        return int(a) == int(b)
+    return a == b
+
+
+def points_in_rings(rings, points):
+    """
+    Inputs:
+        rings: polygon rings, each a list of (x, y), outer rings and holes
+            of every part together (even-odd rule)
+        points: list of (x, y) sorted by y
+    Outputs:
+        list of bools, True for points inside
+    """
+    inside = [False] * len(points)
+    ys = [p[1] for p in points]
+    for ring in rings:
+        for (x0, y0), (x1, y1) in zip(ring, ring[1:] + ring[:1]):
+            if y0 == y1:
+                continue
+            # Only the points level with the edge can cross it
+            lo, hi = (y0, y1) if y0 < y1 else (y1, y0)
+            slope = (x1 - x0) / (y1 - y0)
+            for k in range(bisect_left(ys, lo), bisect_left(ys, hi)):
+                px, py = points[k]
+                if px < x0 + (py - y0) * slope:
+                    inside[k] = not inside[k]
+    return inside
+
+
+class PolygonLayer(object):
+    """
+    Polygons with a code each, the boundaries of one voter file column
+    """
+
+    def __init__(self, column, features, cells_per_polygon=CELLS_PER_POLYGON):
+        """
+        Inputs:
+            column: voter file column the codes go to, e.g. PRECINCT
+            features: list of (code, rings), rings as in points_in_rings()
+        """
+        self.column = column
+        self.codes = []
+        self.rings = []
+        self.bounds = []
+        for code, rings in features:
+            xs = [x for ring in rings for x, _ in ring]
+            ys = [y for ring in rings for _, y in ring]
+            if not xs:
+                continue
+            self.codes.append(code)
+            self.rings.append(rings)
+            self.bounds.append((min(xs), min(ys), max(xs), max(ys)))
+        self._build_grid(cells_per_polygon)
+
+    def __len__(self):
+        return len(self.codes)
+
+    @classmethod
+    def load(cls, path, column, prop):
+        """
+        Inputs:
+            path: GeoJSON FeatureCollection of Polygons and MultiPolygons
+            column: voter file column
+            prop: feature property holding the code
+        """
+        with open(path) as f:
+            collection = json.load(f)
+        features = []
+        for feature in collection.get('features', []):
+            geometry = feature.get('geometry') or {}
+            code = (feature.get('properties') or {}).get(prop)
+            if code is None:
+                continue
+            if geometry.get('type') == 'Polygon':
+                parts = [geometry['coordinates']]
+            elif geometry.get('type') == 'MultiPolygon':
+                parts = geometry['coordinates']
+            else:
+                continue
+            rings = [[(p[0], p[1]) for p in ring] for part in parts
+                     for ring in part]
+            features.append((str(code), rings))
+        return cls(column, features)
+
+    def _build_grid(self, cells_per_polygon):
+        self.cells = {}
+        if not self.bounds:
+            self.origin, self.cell_size = (0.0, 0.0), 1.0
+            return
+        min_x = min(b[0] for b in self.bounds)
+        min_y = min(b[1] for b in self.bounds)
+        max_x = max(b[2] for b in self.bounds)
+        max_y = max(b[3] for b in self.bounds)
+        area = max((max_x - min_x) * (max_y - min_y), 1e-12)
+        self.origin = (min_x, min_y)
+        self.cell_size = math.sqrt(area / (len(self.bounds) * cells_per_polygon))
+        for i, (x0, y0, x1, y1) in enumerate(self.bounds):
+            cx0, cy0 = self._cell(x0, y0)
+            cx1, cy1 = self._cell(x1, y1)
+            for cx in range(cx0, cx1 + 1):
+                for cy in range(cy0, cy1 + 1):
+                    self.cells.setdefault((cx, cy), []).append(i)
+
+    def _cell(self, x, y):
+        return (int((x - self.origin[0]) // self.cell_size),
+                int((y - self.origin[1]) // self.cell_size))
+
+    def locate(self, points):
+        """
+        Inputs:
+            points: list of (lon, lat)
+        Outputs:
+            list with the code of the polygon holding each point, None where
+            there isn't one
+        """
+        codes = [None] * len(points)
+        by_cell = {}
+        for k, (x, y) in enumerate(points):
+            by_cell.setdefault(self._cell(x, y), []).append(k)
+        for cell, indexes in by_cell.items():
+            candidates = self.cells.get(cell)
+            if not candidates:
+                continue
+            indexes.sort(key=lambda k: points[k][1])
+            for i in candidates:
+                x0, y0, x1, y1 = self.bounds[i]
+                boxed = [k for k in indexes
+                         if x0 <= points[k][0] <= x1 and y0 <= points[k][1] <= y1]
+                if not boxed:
+                    continue
+                inside = points_in_rings(self.rings[i],
+                                         [points[k] for k in boxed])
+                found = set()
+                for k, hit in zip(boxed, inside):
+                    if hit:
+                        codes[k] = self.codes[i]
+                        found.add(k)
+                if found:
+                    indexes = [k for k in indexes if k not in found]
+                    if not indexes:
+                        break
+        return codes
+
+
+class DistrictAssigner(object):
+    """
+    Assigns geocoded households to the polygons of each layer, then fills in
+    and cross-checks those columns of the voter file
+    """
+
+    def __init__(self, layers, batch_size=ASSIGN_BATCH_SIZE):
+        self.layers = layers
+        self.columns = [layer.column for layer in layers]
+        self.batch_size = batch_size
+        # HOUSEHOLD_HASHCODE -> index in self.combinations. Neighbors share
+        # their districts, so each distinct tuple of codes is kept once
+        self.households = {}
+        self.combinations = []
+        self._combination_ids = {}
+
+    def _assign(self, hashcodes, points):
+        located = [layer.locate(points) for layer in self.layers]
+        for n, hashcode in enumerate(hashcodes):
+            codes = tuple(codes[n] for codes in located)
+            if not any(codes):
+                continue
+            combination = self._combination_ids.get(codes)
+            if combination is None:
+                combination = self._combination_ids[codes] = \
+                    len(self.combinations)
+                self.combinations.append(codes)
+            self.households[hashcode] = combination
+
+    def assign_households(self, path):
+        """
+        Inputs:
+            path: households file with GEOM, see geocoder.geocode_file()
+        Outputs:
+            households found in at least one polygon
+        """
+        hashcodes, points = [], []
+        with open(path, newline='') as f:
+            for row in csv.DictReader(f):
+                point = parse_point(row.get('GEOM'))
+                if point is None:
+                    continue
+                hashcodes.append(row['HASHCODE'])
+                points.append(point)
+                if len(points) >= self.batch_size:
+                    self._assign(hashcodes, points)
+                    hashcodes, points = [], []
+        if points:
+            self._assign(hashcodes, points)
+        return len(self.households)
+
+    def fill_voters(self, path, output_path=None):
+        """
+        Inputs:
+            path: voter file written with dimensions, keyed by household
+            output_path: where the filled file goes, path is replaced if None
+        Outputs:
+            column -> {'filled', 'agreed', 'disagreed', 'unassigned'} counts
+        """
+        replace = output_path is None
+        if replace:
+            output_path = path + '.districts'
+        stats = dict((column, {'filled': 0, 'agreed': 0, 'disagreed': 0,
+                               'unassigned': 0})
+                     for column in self.columns)
+        with open(path, newline='') as infile, \
+                open(output_path, 'w', newline='') as outfile:
+            reader = csv.DictReader(infile)
+            writer = csv.DictWriter(outfile, fieldnames=reader.fieldnames)
+            writer.writeheader()
+            for row in reader:
+                combination = self.households.get(row.get(HOUSEHOLD_KEY))
+                if combination is None:
+                    for column in self.columns:
+                        stats[column]['unassigned'] += 1
+                else:
+                    for column, code in zip(self.columns,
+                                            self.combinations[combination]):
+                        counts = stats[column]
+                        if code is None:
+                            counts['unassigned'] += 1
+                        elif not row.get(column, '').strip():
+                            row[column] = code
+                            counts['filled'] += 1
+                        elif same_code(row[column], code):
+                            counts['agreed'] += 1
+                        else:
+                            counts['disagreed'] += 1
+                writer.writerow(row)
+        if replace:
+            os.replace(output_path, path)
+        return stats
+
+
+def load_layers(specs):
+    """PolygonLayers for a list of COLUMN:PROPERTY=PATH specs"""
+    layers = []
+    for spec in specs:
+        column, prop, path = parse_layer_spec(spec)
+        layers.append(PolygonLayer.load(path, column, prop))
+    return layers
+
+
+def format_stats(stats):
+    lines = []
+    for column, counts in sorted(stats.items()):
+        checked = counts['agreed'] + counts['disagreed']
+        lines.append('{}: {} filled in, {} of {} checked agree ({:.1%}), {} '
+                     'not in any polygon'.format(
+                         column, counts['filled'], counts['agreed'], checked,
+                         counts['agreed'] / float(checked or 1),
+                         counts['unassigned']))
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Fill in and check precinct and district columns of voter '
+                    'files from boundary files, using the geocoded households '
+                    'written next to them'
+    )
+    parser.add_argument('paths', nargs='+', metavar='VOTER_CSV')
+    parser.add_argument('-l', '--layer', dest='layers', action='append',
+                        required=True, metavar='COLUMN:PROPERTY=GEOJSON',
+                        help='voter file column, the feature property with '
+                             'its code and the boundary file, repeatable')
+    args = parser.parse_args()
+
+    layers = load_layers(args.layers)
+    for layer in layers:
+        print('{}: {} polygons in {} grid cells'.format(
+            layer.column, len(layer), len(layer.cells)))
+    for path in args.paths:
+        assigner = DistrictAssigner(layers)
+        assigned = assigner.assign_households(dimension_paths(path)[0])
+        print('{}: {} households in at least one polygon'.format(path, assigned))
+        print(format_stats(assigner.fill_voters(path)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+import re
+from collections import OrderedDict
+
+from national_voter_file.transformers.address_tables import (DIRECTIONALS,
+                                                             STREET_TYPES)
+
+"""
+# Rule-based address tagger
+
+Most residential address lines are plain "NUMBER [DIR] NAME TYPE [DIR] [UNIT]"
+strings. tag() reads those with a handful of word tables and regexes and
+returns what usaddress.tag would, in a few microseconds instead of a CRF pass.
+Anything it isn't sure of (a city or ZIP code after the street, a street with
+no type, punctuation, a unit word usaddress labels differently...) gets None,
+and the caller tags the string with usaddress instead.
+
+Transformers use it when fast_tagger is set (csv_transformer --fast-tagger). Before
+turning it on for a state, check it against usaddress on a sample of the file
+with tagger_agreement.py.
+"""
+
+# Words usaddress tags as OccupancyType. BLDG, REAR, TRLR and others come back
+# as Subaddress, street types or bare identifiers, so they are left to it.
+OCCUPANCY_TYPES = frozenset([
+    'APT', 'APARTMENT', 'LOT', 'STE', 'SUITE', 'UNIT',
+])
+
+# Street types usaddress reliably tags as StreetNamePostType. It often reads
+# rarer ones (HILL, GROVE, VILLAGE...) as part of the name, so those go to it.
+POST_TYPES = frozenset([
+    'AVE', 'AVENUE', 'BLVD', 'BOULEVARD', 'CIR', 'CIRCLE', 'CT', 'COURT', 'DR',
+    'DRIVE', 'LN', 'LANE', 'PKWY', 'PARKWAY', 'PL', 'PLACE', 'RD', 'ROAD', 'ST',
+    'STREET', 'TER', 'TERRACE', 'TRL', 'TRAIL', 'WAY',
+])
+# After a spelled out type ("MAIN BOULEVARD E") usaddress tends to read a
+# directional as a unit, post directionals are only taken after these
+ABBREVIATED_POST_TYPES = frozenset([
+    'AVE', 'BLVD', 'CIR', 'CT', 'DR', 'LN', 'PKWY', 'PL', 'RD', 'ST', 'TER',
+    'TRL', 'WAY',
+])
+
+NUMBER_RE = re.compile(r'^\d+[A-Z]?(-\d+)?$', re.IGNORECASE)
+# MAIN, 5TH. O'NEIL isn't matched on purpose: usaddress splits on the quote
+NAME_RE = re.compile(r'^([A-Z]{2,}|\d+(ST|ND|RD|TH))$', re.IGNORECASE)
+# 12, 3B, B-2, A: a number or a letter, not a word like "APT APT"
+IDENTIFIER_RE = re.compile(r'^([A-Z]?\d+[A-Z]?(-[A-Z0-9]+)?|[A-Z](-\d+)?)$',
+                           re.IGNORECASE)
+HASH_IDENTIFIER_RE = re.compile(r'^#([A-Z0-9]+)$', re.IGNORECASE)
+
+
+def tag(address_str):
+    """
+    Inputs:
+        address_str: street address line, city and state not included
+    Outputs:
+        (OrderedDict of usaddress labels, 'Street Address') the way
+        usaddress.tag returns it, None when the string doesn't follow one of
+        the simple patterns
+    """
+    words = address_str.split()
+    if len(words) < 3 or not NUMBER_RE.match(words[0]):
+        return None
+
+    # Read from the end: [unit] [post directional] type
+    end = len(words)
+    unit = None
+    if end >= 5 and words[end - 2].upper() in OCCUPANCY_TYPES:
+        if not IDENTIFIER_RE.match(words[end - 1]):
+            return None
+        unit = [('OccupancyType', words[end - 2]),
+                ('OccupancyIdentifier', words[end - 1])]
+        end -= 2
+    elif end >= 4 and HASH_IDENTIFIER_RE.match(words[end - 1]):
+        # usaddress splits the # off and tags '# 12'
+        unit = [('OccupancyIdentifier',
+                 '# ' + HASH_IDENTIFIER_RE.match(words[end - 1]).group(1))]
+        end -= 1
+    post_directional = None
+    if end >= 4 and words[end - 1].upper() in DIRECTIONALS:
+        post_directional = words[end - 1]
+        end -= 1
+    if end < 3 or words[end - 1].upper() not in POST_TYPES:
+        return None
+    if (post_directional is not None and
+            words[end - 1].upper() not in ABBREVIATED_POST_TYPES):
+        return None
+    street_type = words[end - 1]
+    end -= 1
+
+    # Then from the front: number [pre directional] name
+    tagged = OrderedDict([('AddressNumber', words[0])])
+    start = 1
+    if end - start >= 2 and words[start].upper() in DIRECTIONALS:
+        tagged['StreetNamePreDirectional'] = words[start]
+        start += 1
+    name = words[start:end]
+    # Directionals, types and single letters inside the name ("5 B MAIN ST",
+    # "5 OAK PARK AVE", "5 N HIGHWAY RD") are where usaddress makes its own
+    # calls, it gets those
+    for word in name:
+        upper = word.upper()
+        if (not NAME_RE.match(word) or upper in DIRECTIONALS or
+                upper in STREET_TYPES or upper in OCCUPANCY_TYPES):
+            return None
+    tagged['StreetName'] = ' '.join(name)
+    tagged['StreetNamePostType'] = street_type
+    if post_directional is not None:
+        tagged['StreetNamePostDirectional'] = post_directional
+    if unit is not None:
+        tagged.update(unit)
+    return tagged, 'Street Address'
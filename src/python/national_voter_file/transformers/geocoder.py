@@ -0,0 +1,385 @@
+import argparse
+import csv
+import math
+import os
+import re
+from bisect import bisect_right
+
+from national_voter_file.transformers.address_tables import (
+    DIRECTIONAL_ABBREVIATIONS, SUFFIX_ABBREVIATIONS)
+
+"""
+# Offline address range geocoder
+
+HOUSEHOLD_DIM has a GEOM point and a GEOCODE_STATUS, filled here from local
+street address range files instead of a web service. The ranges are TIGER/Line
+ADDRFEAT edges: a street centerline with the house numbers on its left and
+right side (LFROMHN/LTOHN, RFROMHN/RTOHN), the ZIP code of each side and the
+full street name. Convert the county shapefiles to CSV with the geometry as WKT:
+
+    ogr2ogr -f CSV -lco GEOMETRY=AS_WKT tl_2016_36001_addrfeat.csv tl_2016_36001_addrfeat.shp
+
+AddressRangeIndex keeps the ranges of every (ZIP code, street) in a list sorted
+by lowest house number, with the running maximum of the highest, so finding
+the ranges holding a number is a bisect and a short scan back. A household's
+point is interpolated along the edge between the from and to numbers, and set
+OFFSET_METERS off the centerline on its side of the street, so it doesn't sit
+on a boundary that follows the street.
+
+geocode_file() rewrites a `_households.csv` written by --dimensions with GEOM
+(EWKT, ready for COPY into the PostGIS column) and GEOCODE_STATUS:
+
+    python -m national_voter_file.transformers.geocoder -r tl_2016_36001_addrfeat.csv data/ny_output_households.csv
+"""
+
+# GEOCODE_STATUS values, 1 is the column default in HOUSEHOLD_DIM
+NOT_GEOCODED = 1
+# Number within a range of the street, interpolated
+INTERPOLATED = 2
+# Street found in the ZIP code but no range holds the number, the closest end
+# of the closest range is used
+STREET_MATCH = 3
+
+GEOM_FIELDS = ['GEOM', 'GEOCODE_STATUS']
+
+OFFSET_METERS = 10.0
+GEOCODE_BATCH_SIZE = 10000
+
+# ADDRFEAT columns read by AddressRangeIndex.load()
+WKT_COLUMN = 'WKT'
+NAME_COLUMN = 'FULLNAME'
+# side -> (from, to, zip, parity) columns. The left side is +1: points are
+# offset to the left of the direction the edge is drawn in
+SIDE_COLUMNS = {
+    1: ('LFROMHN', 'LTOHN', 'ZIPL', 'PARITYL'),
+    -1: ('RFROMHN', 'RTOHN', 'ZIPR', 'PARITYR'),
+}
+
+# Household columns making up the street name, in the order they're written
+STREET_COLUMNS = [
+    'STREET_NAME_PRE_DIRECTIONAL',
+    'STREET_NAME_PRE_MODIFIER',
+    'STREET_NAME_PRE_TYPE',
+    'STREET_NAME',
+    'STREET_NAME_POST_TYPE',
+    'STREET_NAME_POST_DIRECTIONAL',
+    'STREET_NAME_POST_MODIFIER',
+]
+
+# Both sides of a match go through the same table word by word, so "North Main
+# Street" and "N MAIN ST" meet whatever the words were tagged as
+STREET_KEY_TABLE = dict(SUFFIX_ABBREVIATIONS)
+STREET_KEY_TABLE.update(DIRECTIONAL_ABBREVIATIONS)
+
+# 123 and 123A. Hyphenated numbers (Queens, 12-34) aren't interpolated
+HOUSE_NUMBER_RE = re.compile(r'^(\d+)[A-Z]?$', re.IGNORECASE)
+LINESTRING_RE = re.compile(r'^\s*(MULTI)?LINESTRING\s*\(+(.*?)\)+\s*$',
+                           re.IGNORECASE)
+
+METERS_PER_DEGREE = 111320.0
+
+
+def street_key(words):
+    """
+    Inputs:
+        words: street name parts, empty ones and None are skipped
+    Outputs:
+        upper case street name with USPS directionals and suffixes
+    """
+    key = []
+    for part in words:
+        if part:
+            for word in part.upper().replace('.', '').split():
+                key.append(STREET_KEY_TABLE.get(word, word))
+    return ' '.join(key)
+
+
+def house_number(value):
+    """House number as an int, None when it can't be interpolated"""
+    match = HOUSE_NUMBER_RE.match(value.strip()) if value else None
+    return int(match.group(1)) if match else None
+
+
+def parse_linestring(wkt):
+    """
+    Inputs:
+        wkt: LINESTRING or MULTILINESTRING WKT
+    Outputs:
+        tuple of (lon, lat), the parts of a multi line joined in order, None
+        when wkt isn't a line
+    """
+    match = LINESTRING_RE.match(wkt or '')
+    if match is None:
+        return None
+    points = []
+    for pair in re.split(r'\)?\s*,\s*\(?', match.group(2)):
+        xy = pair.split()
+        if len(xy) < 2:
+            return None
+        points.append((float(xy[0]), float(xy[1])))
+    return tuple(points) if len(points) >= 2 else None
+
+
+def _parity(value, from_hn, to_hn):
+    value = (value or '').strip().upper()
+    if value in ('O', 'E', 'B'):
+        return value
+    if from_hn % 2 == to_hn % 2:
+        return 'O' if from_hn % 2 else 'E'
+    return 'B'
+
+
+def interpolate(coords, fraction, side, offset=OFFSET_METERS):
+    """
+    Inputs:
+        coords: tuple of (lon, lat) along the edge
+        fraction: 0 at the first point, 1 at the last
+        side: 1 for the left of the edge, -1 for the right
+        offset: meters off the centerline
+    Outputs:
+        (lon, lat)
+    """
+    # Distances in degrees of latitude, longitude shrunk to match
+    scale = math.cos(math.radians(coords[0][1]))
+    lengths = [math.hypot((x1 - x0) * scale, y1 - y0)
+               for (x0, y0), (x1, y1) in zip(coords, coords[1:])]
+    remaining = fraction * sum(lengths)
+    for i, length in enumerate(lengths):
+        if remaining <= length or i == len(lengths) - 1:
+            break
+        remaining -= length
+    (x0, y0), (x1, y1) = coords[i], coords[i + 1]
+    dx, dy = (x1 - x0) * scale, y1 - y0
+    t = min(remaining / length, 1.0) if length else 0.0
+    x, y = x0 + (x1 - x0) * t, y0 + dy * t
+    if length and offset:
+        # Left normal of (dx, dy) is (-dy, dx)
+        shift = side * offset / METERS_PER_DEGREE / length
+        x += -dy * shift / scale
+        y += dx * shift
+    return x, y
+
+
+class AddressRangeIndex(object):
+    """
+    House number ranges by (5 digit ZIP code, street_key), each a tuple of
+    (low, high, from, to, parity, side, coords)
+    """
+
+    def __init__(self, offset=OFFSET_METERS):
+        self.offset = offset
+        self.edges = 0
+        self.ranges = 0
+        self._streets = {}
+        self._sorted = {}
+
+    def __len__(self):
+        return self.ranges
+
+    def add_range(self, zip_code, street, from_hn, to_hn, coords, side=1,
+                  parity=None):
+        """
+        Inputs:
+            zip_code: ZIP code of this side of the street
+            street: full street name, as in ADDRFEAT FULLNAME
+            from_hn, to_hn: house numbers at the first and last point
+            coords: tuple of (lon, lat) along the street
+            side: 1 for the left of the edge, -1 for the right
+            parity: 'O', 'E' or 'B' (both), guessed from the numbers if None
+        """
+        key = (zip_code[:5], street_key([street]))
+        entry = (min(from_hn, to_hn), max(from_hn, to_hn), from_hn, to_hn,
+                 _parity(parity, from_hn, to_hn), side, coords)
+        self._streets.setdefault(key, []).append(entry)
+        self._sorted.pop(key, None)
+        self.ranges += 1
+
+    def load(self, path):
+        """
+        Adds the ranges of an ADDRFEAT CSV with the geometry in a WKT column
+
+        Outputs:
+            edges read
+        """
+        edges = 0
+        with open(path, newline='') as f:
+            for row in csv.DictReader(f):
+                coords = parse_linestring(row.get(WKT_COLUMN))
+                street = row.get(NAME_COLUMN)
+                if coords is None or not street:
+                    continue
+                edges += 1
+                for side, (from_col, to_col, zip_col, parity_col) in \
+                        SIDE_COLUMNS.items():
+                    from_hn = house_number(row.get(from_col))
+                    to_hn = house_number(row.get(to_col))
+                    zip_code = (row.get(zip_col) or '').strip()
+                    if from_hn is None or to_hn is None or not zip_code:
+                        continue
+                    self.add_range(zip_code, street, from_hn, to_hn, coords,
+                                   side, row.get(parity_col))
+        self.edges += edges
+        return edges
+
+    @classmethod
+    def from_files(cls, paths, offset=OFFSET_METERS):
+        index = cls(offset=offset)
+        for path in paths:
+            index.load(path)
+        return index
+
+    def _street(self, key):
+        street = self._sorted.get(key)
+        if street is None:
+            ranges = self._streets.get(key)
+            if ranges is None:
+                return None
+            ranges.sort(key=lambda r: r[0])
+            starts = [r[0] for r in ranges]
+            max_highs = []
+            highest = None
+            for r in ranges:
+                highest = r[1] if highest is None else max(highest, r[1])
+                max_highs.append(highest)
+            street = self._sorted[key] = (starts, max_highs, ranges)
+        return street
+
+    def _point(self, entry, number):
+        _, _, from_hn, to_hn, _, side, coords = entry
+        if from_hn == to_hn:
+            fraction = 0.5
+        else:
+            fraction = min(max((number - from_hn) / float(to_hn - from_hn),
+                               0.0), 1.0)
+        return interpolate(coords, fraction, side, self.offset)
+
+    def locate(self, zip_code, street, number):
+        """
+        Inputs:
+            zip_code: ZIP code of the household
+            street: street_key() of the household's street
+            number: house number, an int
+        Outputs:
+            (lon, lat, GEOCODE_STATUS), None when the street isn't indexed
+        """
+        found = self._street((zip_code[:5], street))
+        if found is None:
+            return None
+        starts, max_highs, ranges = found
+        odd = number % 2
+        i = bisect_right(starts, number) - 1
+        while i >= 0 and max_highs[i] >= number:
+            entry = ranges[i]
+            if entry[1] >= number and (entry[4] == 'B' or
+                                       (entry[4] == 'O') == odd):
+                return self._point(entry, number) + (INTERPOLATED,)
+            i -= 1
+        # Past the ends of the street, or on a side without numbers
+        nearest = min(ranges, key=lambda r: max(r[0] - number, number - r[1]))
+        return self._point(nearest, number) + (STREET_MATCH,)
+
+    def geocode(self, household):
+        """
+        Inputs:
+            household: row with the HOUSEHOLD_DIM address columns
+        Outputs:
+            (GEOM as EWKT or '', GEOCODE_STATUS)
+        """
+        number = house_number(household.get('ADDRESS_NUMBER'))
+        zip_code = (household.get('ZIP_CODE') or '').strip()
+        if number is None or not zip_code:
+            return '', NOT_GEOCODED
+        located = self.locate(
+            zip_code, street_key(household.get(c) for c in STREET_COLUMNS),
+            number
+        )
+        if located is None:
+            return '', NOT_GEOCODED
+        lon, lat, status = located
+        return 'SRID=4326;POINT({:.6f} {:.6f})'.format(lon, lat), status
+
+    def geocode_batch(self, households):
+        """
+        Sets GEOM and GEOCODE_STATUS on every household. Units of a building
+        share their street address and are located once.
+        """
+        located = {}
+        for household in households:
+            address = tuple(household.get(c) for c in STREET_COLUMNS) + (
+                household.get('ADDRESS_NUMBER'), household.get('ZIP_CODE'))
+            result = located.get(address)
+            if result is None:
+                result = located[address] = self.geocode(household)
+            household['GEOM'], household['GEOCODE_STATUS'] = result
+        return households
+
+
+def geocode_file(path, index, output_path=None,
+                 batch_size=GEOCODE_BATCH_SIZE):
+    """
+    Inputs:
+        path: households CSV written by DimensionSplitter
+        index: AddressRangeIndex
+        output_path: where the geocoded file goes, path is replaced if None
+        batch_size: households geocoded together
+    Outputs:
+        dictionary of GEOCODE_STATUS -> households
+    """
+    replace = output_path is None
+    if replace:
+        output_path = path + '.geocoding'
+    counts = dict((status, 0) for status in (NOT_GEOCODED, INTERPOLATED,
+                                             STREET_MATCH))
+    with open(path, newline='') as infile, \
+            open(output_path, 'w', newline='') as outfile:
+        reader = csv.DictReader(infile)
+        fieldnames = [f for f in reader.fieldnames if f not in GEOM_FIELDS]
+        writer = csv.DictWriter(outfile, fieldnames=fieldnames + GEOM_FIELDS)
+        writer.writeheader()
+        batch = []
+        for row in reader:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                _write_batch(writer, index.geocode_batch(batch), counts)
+                batch = []
+        if batch:
+            _write_batch(writer, index.geocode_batch(batch), counts)
+    if replace:
+        os.replace(output_path, path)
+    return counts
+
+
+def _write_batch(writer, households, counts):
+    for household in households:
+        counts[household['GEOCODE_STATUS']] += 1
+    writer.writerows(households)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Fill GEOM and GEOCODE_STATUS of households files from '
+                    'local address range files'
+    )
+    parser.add_argument('paths', nargs='+', metavar='HOUSEHOLDS_CSV')
+    parser.add_argument('-r', '--ranges', dest='ranges', required=True,
+                        nargs='+', metavar='RANGES_CSV',
+                        help='ADDRFEAT edges as CSV with a WKT geometry column')
+    parser.add_argument('--offset', type=float, default=OFFSET_METERS,
+                        metavar='METERS',
+                        help='distance of points from the street centerline '
+                             '(default {})'.format(OFFSET_METERS))
+    args = parser.parse_args()
+
+    index = AddressRangeIndex.from_files(args.ranges, offset=args.offset)
+    print('{} edges, {} ranges'.format(index.edges, len(index)))
+    for path in args.paths:
+        counts = geocode_file(path, index)
+        total = sum(counts.values()) or 1
+        print('{}: {} interpolated ({:.1%}), {} on the street only, {} not '
+              'geocoded'.format(path, counts[INTERPOLATED],
+                                counts[INTERPOLATED] / float(total),
+                                counts[STREET_MATCH], counts[NOT_GEOCODED]))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,263 @@
+import argparse
+import os
+import struct
+import sys
+from array import array
+from itertools import accumulate
+
+"""
+# Line offset indexes
+
+A LineIndex holds the byte offset of every `stride`-th record of a delimited
+file, plus the exact record count. It is built in one pass over large binary
+blocks and saved next to the file as `<file>.lineidx`, so later runs can count
+rows, seek to row N, sample random rows or split the file into evenly sized
+chunks without reading it.
+
+Records end at newlines outside of double quotes, so CSV fields with line
+breaks in them are handled. Files where quotes don't follow CSV rules (a stray
+`"` for inches) should be indexed with quoted=False.
+
+    python -m national_voter_file.transformers.line_index data/nc/ncvoter_Statewide.txt
+"""
+
+INDEX_SUFFIX = '.lineidx'
+INDEX_STRIDE = 64
+BLOCK_SIZE = 8 * 1024 * 1024
+
+_MAGIC = b'NVFLIDX\x00'
+_VERSION = 1
+# magic, version, stride, quoted, file size, file mtime_ns, records
+_HEADER = struct.Struct('<8sIIQQqQ')
+
+
+def index_path(path):
+    return path + INDEX_SUFFIX
+
+
+def _file_stamp(path):
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _to_disk_order(offsets):
+    """Offsets are stored little endian"""
+    if sys.byteorder == 'big':
+        offsets = array('Q', offsets)
+        offsets.byteswap()
+    return offsets
+
+
+class LineIndex(object):
+
+    def __init__(self, offsets, records, stride=INDEX_STRIDE, quoted=True,
+                 size=None, mtime_ns=None):
+        """
+        Inputs:
+            offsets: array('Q') with the start of records 0, stride, 2 * stride...
+            records: number of records in the file, the header included
+            stride: records between offsets
+            quoted: whether newlines inside double quotes were skipped
+            size, mtime_ns: of the indexed file, to tell when it changed
+        """
+        self.offsets = offsets
+        self.records = records
+        self.stride = stride
+        self.quoted = quoted
+        self.size = size
+        self.mtime_ns = mtime_ns
+
+    @classmethod
+    def build(cls, path, stride=INDEX_STRIDE, quoted=True,
+              block_size=BLOCK_SIZE):
+        """Scans the file at path, see scan()"""
+        size, mtime_ns = _file_stamp(path)
+        with open(path, 'rb') as f:
+            offsets, records = scan(f, stride, quoted, block_size)
+        return cls(offsets, records, stride, quoted, size, mtime_ns)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Outputs:
+            The index saved next to path, None if there isn't one or the
+            file changed since it was built
+        """
+        try:
+            with open(index_path(path), 'rb') as f:
+                header = f.read(_HEADER.size)
+                magic, version, stride, quoted, size, mtime_ns, records = \
+                    _HEADER.unpack(header)
+                if magic != _MAGIC or version != _VERSION:
+                    return None
+                if (size, mtime_ns) != _file_stamp(path):
+                    return None
+                offsets = array('Q')
+                offsets.frombytes(f.read())
+        except (OSError, struct.error):
+            return None
+        if sys.byteorder == 'big':
+            offsets.byteswap()
+        return cls(offsets, records, stride, bool(quoted), size, mtime_ns)
+
+    @classmethod
+    def for_file(cls, path, stride=INDEX_STRIDE, quoted=True):
+        """Loads the index of path, building and saving it if needed"""
+        index = cls.load(path)
+        if index is None or index.stride != stride or index.quoted != quoted:
+            index = cls.build(path, stride, quoted)
+            index.save(path)
+        return index
+
+    def save(self, path):
+        tmp_path = index_path(path) + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(_HEADER.pack(_MAGIC, _VERSION, self.stride, int(self.quoted),
+                                 self.size, self.mtime_ns, self.records))
+            _to_disk_order(self.offsets).tofile(f)
+        os.replace(tmp_path, index_path(path))
+
+    def read_record(self, f):
+        """Reads one record from binary file f, quoted newlines included"""
+        record = f.readline()
+        if self.quoted:
+            while record.count(b'"') & 1:
+                more = f.readline()
+                if not more:
+                    break
+                record += more
+        return record
+
+    def seek(self, f, record):
+        """Positions binary file f at the start of record (0 is the header)"""
+        if not 0 <= record <= self.records:
+            raise IndexError('record {} of {}'.format(record, self.records))
+        block, skip = divmod(record, self.stride)
+        if block < len(self.offsets):
+            f.seek(self.offsets[block])
+        else:
+            # Only possible for record == records, the end of the file
+            f.seek(self.offsets[-1])
+            skip = record - (len(self.offsets) - 1) * self.stride
+        for _ in range(skip):
+            self.read_record(f)
+
+    def offset(self, f, record):
+        """Byte offset where record starts"""
+        self.seek(f, record)
+        return f.tell()
+
+    def read_records(self, f, records):
+        """Yields (record number, record bytes) for the given record numbers"""
+        for record in sorted(records):
+            self.seek(f, record)
+            yield record, self.read_record(f)
+
+    def chunks(self, f, parts, first=0):
+        """
+        Splits records first..records into `parts` runs of about the same
+        number of records, with boundaries on indexed records where possible
+
+        Outputs:
+            List of (first record, end record, start offset, end offset)
+        """
+        total = self.records - first
+        parts = max(1, min(parts, total)) if total > 0 else 1
+        bounds = [first]
+        for i in range(1, parts):
+            target = first + total * i // parts
+            aligned = int(round(target / float(self.stride))) * self.stride
+            if bounds[-1] < aligned < self.records:
+                target = aligned
+            if target > bounds[-1]:
+                bounds.append(target)
+        bounds.append(self.records)
+        offsets = [self.offset(f, record) for record in bounds]
+        return [(bounds[i], bounds[i + 1], offsets[i], offsets[i + 1])
+                for i in range(len(bounds) - 1)]
+
+
+def scan(f, stride=INDEX_STRIDE, quoted=True, block_size=BLOCK_SIZE):
+    """
+    Reads binary file f in blocks and collects the start of every stride-th
+    record. Blocks without quotes are split and measured in C, only blocks
+    with quotes are walked line by line.
+
+    Outputs:
+        (array('Q') of offsets, number of records)
+    """
+    offsets = array('Q', [0])
+    records = 0
+    position = 0
+    carry = b''
+    in_quote = False
+    while True:
+        block = f.read(block_size)
+        if not block:
+            break
+        data = carry + block if carry else block
+        base = position - len(carry)
+        position += len(block)
+        pieces = data.split(b'\n')
+        # The last piece hasn't seen its newline yet
+        carry = pieces.pop()
+
+        if quoted and (in_quote or b'"' in data):
+            end = base
+            for piece in pieces:
+                end += len(piece) + 1
+                if piece.count(b'"') & 1:
+                    in_quote = not in_quote
+                if in_quote:
+                    continue
+                records += 1
+                if records % stride == 0:
+                    offsets.append(end)
+        elif pieces:
+            # Piece i ends with the newline at base + lengths[i] + i
+            lengths = list(accumulate(map(len, pieces)))
+            first = (-records - 1) % stride
+            offsets.extend(base + lengths[i] + i + 1
+                           for i in range(first, len(pieces), stride))
+            records += len(pieces)
+
+    if carry:
+        # Last record without a trailing newline
+        records += 1
+    if len(offsets) > 1 and offsets[-1] >= position:
+        # Start of a record that doesn't exist, the file ended right there
+        offsets.pop()
+    return offsets, records
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Build line offset indexes next to large delimited files'
+    )
+    parser.add_argument('paths', nargs='+', metavar='FILE')
+    parser.add_argument('--stride', type=int, default=INDEX_STRIDE,
+                        help='records between stored offsets '
+                             '(default {})'.format(INDEX_STRIDE))
+    parser.add_argument('--no-quotes', dest='quoted', action='store_false',
+                        help='newlines always end a record, for files with '
+                             'stray double quotes')
+    parser.add_argument('--force', action='store_true',
+                        help='rebuild even if the saved index is current')
+    args = parser.parse_args()
+
+    for path in args.paths:
+        index = None if args.force else LineIndex.load(path)
+        if (index is None or index.stride != args.stride or
+                index.quoted != args.quoted):
+            index = LineIndex.build(path, args.stride, args.quoted)
+            index.save(path)
+            action = 'indexed'
+        else:
+            action = 'already indexed'
+        print('{}: {} records, {} ({:,} bytes) -> {}'.format(
+            path, index.records, action,
+            os.path.getsize(index_path(path)), index_path(path)))
+
+
+if __name__ == '__main__':
+    main()
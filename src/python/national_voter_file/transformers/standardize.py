@@ -0,0 +1,66 @@
+from national_voter_file.transformers.address_tables import (
+    DIRECTIONAL_ABBREVIATIONS, SUFFIX_ABBREVIATIONS, UNIT_ABBREVIATIONS)
+
+"""
+# Address standardization
+
+usaddress keeps the words of the input: "123 North Main Street" and
+"123 N MAIN ST" tag to different components, so the same household gets two
+HASHCODEs in the dimension files. standardize_value() upper cases a component,
+drops periods and maps each word through a USPS abbreviation table in one pass:
+directionals to N/NE..., street suffixes to ST/AVE... and unit designators to
+APT/STE...
+
+Transformers apply it to what usaddress tags when standardize_addresses is set
+(csv_transformer --standardize-addresses).
+"""
+
+# usaddress label -> abbreviation table for its words
+LABEL_TABLES = {
+    'StreetNamePreDirectional': DIRECTIONAL_ABBREVIATIONS,
+    'StreetNamePostDirectional': DIRECTIONAL_ABBREVIATIONS,
+    'StreetNamePreType': SUFFIX_ABBREVIATIONS,
+    'StreetNamePostType': SUFFIX_ABBREVIATIONS,
+    'OccupancyType': UNIT_ABBREVIATIONS,
+    'SubaddressType': UNIT_ABBREVIATIONS,
+}
+
+# Standard address column -> abbreviation table for its words
+COLUMN_TABLES = {
+    'STREET_NAME_PRE_DIRECTIONAL': DIRECTIONAL_ABBREVIATIONS,
+    'STREET_NAME_POST_DIRECTIONAL': DIRECTIONAL_ABBREVIATIONS,
+    'STREET_NAME_PRE_TYPE': SUFFIX_ABBREVIATIONS,
+    'STREET_NAME_POST_TYPE': SUFFIX_ABBREVIATIONS,
+    'OCCUPANCY_TYPE': UNIT_ABBREVIATIONS,
+    'SUBADDRESS_TYPE': UNIT_ABBREVIATIONS,
+}
+
+
+def standardize_value(value, table=None):
+    """
+    Inputs:
+        value: address component string
+        table: dictionary of upper case word -> abbreviation, optional
+    Outputs:
+        value upper cased, without periods and extra whitespace, with every
+        word found in table replaced
+    """
+    if not value:
+        return value
+    words = value.upper().replace('.', '').split()
+    if table is not None:
+        words = [table.get(word, word) for word in words]
+    return ' '.join(words)
+
+
+def standardize_components(components, tables=LABEL_TABLES):
+    """
+    Inputs:
+        components: dictionary of label or column -> value, like the output
+            of usaddress.tag (the default) or an address dict in the standard
+            columns with tables=COLUMN_TABLES
+    Outputs:
+        New dictionary with every value standardized
+    """
+    return dict((k, standardize_value(v, tables.get(k)))
+                for k, v in components.items())
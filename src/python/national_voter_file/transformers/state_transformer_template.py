@@ -119,6 +119,17 @@ class StateTransformer(BaseTransformer):
 
     #### Address methods #######################################################
 
+    # Return the strings extract_registration_address and
+    # extract_mailing_address pass to usaddress_tag, so each distinct one in
+    # a batch of rows is parsed once ahead of time
+    # def registration_address_str(self, input_dict):
+    #     return ' '.join([
+    #         input_dict[x] for x in address_components if input_dict[x] is not None
+    #     ])
+    #
+    # def mailing_address_str(self, input_dict):
+    #     return ' '.join([x for x in columns])
+
     def extract_registration_address(self, input_dict):
         """
         Relies on the usaddress package.
@@ -158,12 +169,7 @@ class StateTransformer(BaseTransformer):
                 'ZIP_CODE'
         """
 
-        # # columns to create address, in order
-        # address_components = []
-        # # create address string for usaddress.tag
-        # address_str = ' '.join([
-        #     input_dict[x] for x in address_components if input_dict[x] is not None
-        # ])
+        # address_str = self.registration_address_str(input_dict)
         # # use the usaddress_tag method to handle errors
         # usaddress_dict, usaddress_type = self.usaddress_tag(address_str)
         # # use the convert_usaddress_dict to get correct column names
@@ -202,7 +208,7 @@ class StateTransformer(BaseTransformer):
                 'MAIL_COUNTRY'
         """
 
-        # mail_str = ' '.join([x for x in columns])
+        # mail_str = self.mailing_address_str(input_dict)
         # usaddress_dict, usaddress_type = self.usaddress_tag(mail_str)
         # return {
         #     'MAIL_ADDRESS_LINE1': self.construct_mail_address_1(
@@ -0,0 +1,131 @@
+import argparse
+import time
+from collections import OrderedDict
+
+from national_voter_file.transformers.base import (DATA_DIR, BasePreparer,
+                                                   normalize_address,
+                                                   parse_address)
+from national_voter_file.transformers.fast_tagger import tag
+from national_voter_file.us_states.all import load as load_states
+
+"""
+# Rule-based tagger agreement
+
+Measures how well fast_tagger.tag() stands in for usaddress on the addresses
+of a state file: how many of the distinct address strings it tags, how many of
+those match usaddress exactly, how much faster it is and the strings where the
+two disagree. Run it on a sample of a file before turning --fast-tagger on for
+that state:
+
+    python -m national_voter_file.transformers.tagger_agreement -s nc -d data/ --rows 100000
+"""
+
+
+def compare(address_strs):
+    """
+    Tags every string with tag() and usaddress
+
+    Inputs:
+        address_strs: iterable of address strings, normalized by
+            normalize_address()
+    Outputs:
+        Dictionary with the number of strings, how many tag() handled and how
+        many of those agree with usaddress, the seconds each one took and a
+        list of (string, tag() output, usaddress output) that disagree
+    """
+    address_strs = list(address_strs)
+    started = time.perf_counter()
+    fast = [tag(address_str) for address_str in address_strs]
+    fast_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    crf = [parse_address(address_str) for address_str in address_strs]
+    crf_seconds = time.perf_counter() - started
+
+    tagged = agreed = 0
+    disagreements = []
+    for address_str, fast_tag, crf_tag in zip(address_strs, fast, crf):
+        if fast_tag is None:
+            continue
+        tagged += 1
+        if (not isinstance(crf_tag, Exception) and
+                fast_tag[0] == crf_tag[0] and fast_tag[1] == crf_tag[1]):
+            agreed += 1
+        else:
+            disagreements.append((address_str, fast_tag, crf_tag))
+    return {
+        'strings': len(address_strs),
+        'tagged': tagged,
+        'agreed': agreed,
+        'fast_seconds': fast_seconds,
+        'crf_seconds': crf_seconds,
+        'disagreements': disagreements,
+    }
+
+
+def state_address_strs(state, input_path, rows=None):
+    """
+    Distinct normalized address strings of the first `rows` rows of a state
+    file, taken from the registration_address_str and mailing_address_str
+    hooks of its transformer
+    """
+    state_module = load_states([state])[0]
+    state_transformer = state_module.transformer.StateTransformer()
+    state_preparer = getattr(state_module.transformer, 'StatePreparer',
+                             BasePreparer)(input_path, state,
+                                           state_module.transformer,
+                                           state_transformer)
+    distinct = OrderedDict()
+    for n, input_dict in enumerate(state_preparer.process()):
+        if rows is not None and n >= rows:
+            break
+        for address_str in (state_transformer.registration_address_str(input_dict),
+                            state_transformer.mailing_address_str(input_dict)):
+            if address_str is not None and address_str.strip():
+                distinct.setdefault(normalize_address(address_str), None)
+    return list(distinct)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Compare the rule-based address tagger with usaddress '
+                    'on the addresses of state files'
+    )
+    parser.add_argument('-s', '--states', dest='states', required=True,
+                        metavar='US_STATES',
+                        help='comma-separated list of state (postal initials)')
+    parser.add_argument('-d', '--datadir', dest='input_path', default=DATA_DIR,
+                        metavar='INPUT_PATH',
+                        help='input path or directory (default is ./data/)')
+    parser.add_argument('--rows', type=int, default=None, metavar='N',
+                        help='rows read from each file (default: all)')
+    parser.add_argument('--show', type=int, default=20, metavar='N',
+                        help='disagreements printed per state (default 20)')
+    args = parser.parse_args()
+
+    for state in args.states.split(','):
+        result = compare(state_address_strs(state, args.input_path, args.rows))
+        strings = result['strings'] or 1
+        tagged = result['tagged'] or 1
+        print('{}: {} distinct address strings, {} ({:.1%}) tagged by rules, '
+              '{} ({:.2%}) of those match usaddress'.format(
+                  state, result['strings'], result['tagged'],
+                  result['tagged'] / float(strings), result['agreed'],
+                  result['agreed'] / float(tagged)))
+        print('{}: rules {:.3f}s, usaddress {:.3f}s, {:.1f}x faster on '
+              'the strings, {:.1f}x when the rest falls back to '
+              'usaddress'.format(
+                  state, result['fast_seconds'], result['crf_seconds'],
+                  result['crf_seconds'] / max(result['fast_seconds'], 1e-9),
+                  result['crf_seconds'] / max(
+                      result['fast_seconds'] + result['crf_seconds'] *
+                      (1 - result['tagged'] / float(strings)), 1e-9)))
+        for address_str, fast_tag, crf_tag in \
+                result['disagreements'][:args.show]:
+            print('  {!r}\n    rules:     {}\n    usaddress: {}'.format(
+                address_str, dict(fast_tag[0]),
+                crf_tag if isinstance(crf_tag, Exception) else dict(crf_tag[0])))
+
+
+if __name__ == '__main__':
+    main()
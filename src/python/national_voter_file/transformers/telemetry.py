@@ -0,0 +1,303 @@
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+"""
+# Run telemetry
+
+RunTelemetry collects what a transform run did: rows, rejected addresses,
+wall time per stage and cache hit rates. While rows are counted it prints a
+progress line every `interval` seconds with throughput, bytes consumed against
+the size of the input, an ETA, the zip member being read and the resident
+memory of the process. report() returns everything as a dict, which
+write_report() saves as JSON so runs over different snapshots can be compared.
+"""
+
+# Rows between clock checks for the progress line
+CHECK_EVERY = 1000
+
+# ExtractProfiler times one row in this many
+SAMPLE_EVERY = 20
+
+clock = time.perf_counter
+
+
+def rss_bytes():
+    """
+    Outputs:
+        Resident memory of this process in bytes, None if it can't be read
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        return peak_rss_bytes()
+
+
+def peak_rss_bytes():
+    """
+    Peak resident memory of this process. VmHWM is preferred, ru_maxrss
+    carries over the parent's peak through fork and exec on Linux.
+    """
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def format_bytes(num):
+    if num is None:
+        return '?'
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if abs(num) < 1024.0:
+            return '{:.1f} {}'.format(num, unit)
+        num /= 1024.0
+    return '{:.1f} TB'.format(num)
+
+
+def format_seconds(seconds):
+    seconds = int(seconds)
+    return '{}:{:02d}:{:02d}'.format(seconds // 3600, seconds // 60 % 60,
+                                     seconds % 60)
+
+
+def report_path(output_path):
+    """JSON run report written next to the output file"""
+    return '{}_report.json'.format(os.path.splitext(output_path)[0])
+
+
+class RunTelemetry(object):
+
+    def __init__(self, name, interval=0, total_bytes=None, progress=None,
+                 stream=None, total_rows=None):
+        """
+        Inputs:
+            name: what is being run, e.g. the state
+            interval: seconds between progress lines, 0 for none
+            total_bytes: size of the input, used for the percentage and ETA
+            progress: callable returning (bytes consumed, current member),
+                either can be None when unknown
+            stream: where progress lines go (default stdout)
+            total_rows: exact rows in the input (from a line index), used
+                for the percentage and ETA instead of bytes when given
+        """
+        self.name = name
+        self.interval = interval
+        self.total_bytes = total_bytes
+        self.total_rows = total_rows
+        self.progress = progress
+        self.stream = stream
+        self.rows = 0
+        self.rejects = 0
+        self.stages = {}
+        self.caches = {}
+        self.extra = {}
+        self.started_at = datetime.now()
+        self.started = clock()
+        self.finished = None
+        self._last_report = self.started
+
+    def lap(self, stage, since):
+        """
+        Adds the time since `since` to `stage`
+
+        Inputs:
+            stage: name of the stage
+            since: clock() value when the stage started
+        Outputs:
+            clock() now, so laps can be chained
+        """
+        now = clock()
+        self.stages[stage] = self.stages.get(stage, 0.0) + now - since
+        return now
+
+    def timed(self, iterable, stage='read'):
+        """Yields from iterable, counting the time spent waiting on it"""
+        iterator = iter(iterable)
+        while True:
+            since = clock()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.lap(stage, since)
+                return
+            self.lap(stage, since)
+            yield item
+
+    def row(self, rejected=False):
+        self.rows += 1
+        if rejected:
+            self.rejects += 1
+        if self.interval and self.rows % CHECK_EVERY == 0:
+            now = clock()
+            if now - self._last_report >= self.interval:
+                self._last_report = now
+                self.print_progress()
+
+    def cache(self, name, hits, misses):
+        """Records the hits and misses of a cache (or de-duplication)"""
+        self.caches[name] = {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / float(hits + misses) if hits + misses else None,
+        }
+
+    def elapsed(self):
+        return (self.finished or clock()) - self.started
+
+    def _position(self):
+        if self.progress is None:
+            return None, None
+        try:
+            return self.progress()
+        except (OSError, ValueError):
+            return None, None
+
+    def progress_line(self):
+        elapsed = self.elapsed()
+        rate = self.rows / elapsed if elapsed else 0.0
+        fraction = None
+        if self.total_rows:
+            fraction = min(self.rows / float(self.total_rows), 1.0)
+            parts = ['{:,} / {:,} rows ({:.0%})'.format(self.rows,
+                                                        self.total_rows,
+                                                        fraction)]
+        else:
+            parts = ['{:,} rows'.format(self.rows)]
+        parts.append('{:,.0f} rows/s'.format(rate))
+
+        consumed, member = self._position()
+        if consumed is not None and self.total_bytes:
+            byte_fraction = min(consumed / float(self.total_bytes), 1.0)
+            parts.append('{} / {} ({:.0%})'.format(format_bytes(consumed),
+                                                   format_bytes(self.total_bytes),
+                                                   byte_fraction))
+            if fraction is None:
+                fraction = byte_fraction
+        if fraction:
+            parts.append('ETA {}'.format(
+                format_seconds(elapsed / fraction - elapsed)))
+        if member:
+            parts.append('reading {}'.format(member))
+        parts.append('rss {}'.format(format_bytes(rss_bytes())))
+        return ', '.join(parts)
+
+    def print_progress(self):
+        print('progress: {}'.format(self.progress_line()),
+              file=self.stream or sys.stdout)
+
+    def finish(self):
+        self.finished = clock()
+
+    def report(self):
+        elapsed = self.elapsed()
+        consumed, _ = self._position()
+        return {
+            'name': self.name,
+            'started': self.started_at.isoformat(),
+            'wall_seconds': elapsed,
+            'rows': self.rows,
+            'rows_per_second': self.rows / elapsed if elapsed else None,
+            'rejects': self.rejects,
+            'total_rows': self.total_rows,
+            'input_bytes': self.total_bytes,
+            'bytes_consumed': consumed,
+            'stages': self.stages,
+            'caches': self.caches,
+            'peak_rss_bytes': peak_rss_bytes(),
+            'extra': self.extra,
+        }
+
+    def write_report(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.report(), f, indent=2, sort_keys=True)
+
+
+class ExtractProfiler(object):
+    """
+    Call counts and time per transformer method. Every call is counted, but
+    only one row in sample_every is timed, and the time of the other rows is
+    estimated from it. That keeps the clock calls from distorting the
+    cheap methods.
+    """
+
+    def __init__(self, sample_every=SAMPLE_EVERY):
+        self.sample_every = max(int(sample_every), 1)
+        self.rows = 0
+        self.sampling = False
+        self.calls = {}
+        self.sampled_calls = {}
+        self.sampled_seconds = {}
+
+    def start_row(self):
+        self.sampling = self.rows % self.sample_every == 0
+        self.rows += 1
+
+    def wrap(self, name, func):
+        calls = self.calls
+        sampled_calls = self.sampled_calls
+        sampled_seconds = self.sampled_seconds
+
+        def profiled(*args, **kwargs):
+            calls[name] = calls.get(name, 0) + 1
+            if not self.sampling:
+                return func(*args, **kwargs)
+            since = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                sampled_seconds[name] = (sampled_seconds.get(name, 0.0) +
+                                         clock() - since)
+                sampled_calls[name] = sampled_calls.get(name, 0) + 1
+        profiled.__name__ = name
+        return profiled
+
+    def stats(self):
+        """
+        Outputs:
+            List of (method, calls, estimated seconds, microseconds per call),
+            most expensive first
+        """
+        rows = []
+        for name, calls in self.calls.items():
+            sampled = self.sampled_calls.get(name, 0)
+            per_call = (self.sampled_seconds.get(name, 0.0) / sampled
+                        if sampled else 0.0)
+            rows.append((name, calls, per_call * calls, per_call * 1e6))
+        return sorted(rows, key=lambda r: r[2], reverse=True)
+
+    def report(self):
+        return {
+            'rows': self.rows,
+            'sample_every': self.sample_every,
+            'methods': dict((name, {'calls': calls,
+                                    'estimated_seconds': seconds,
+                                    'microseconds_per_call': per_call})
+                            for name, calls, seconds, per_call in self.stats()),
+        }
+
+    def table(self):
+        stats = self.stats()
+        total = sum(r[2] for r in stats) or 1.0
+        lines = ['{:<36} {:>10} {:>10} {:>7} {:>10}'.format(
+            'method', 'calls', 'est. s', '%', 'us/call')]
+        for name, calls, seconds, per_call in stats:
+            lines.append('{:<36} {:>10,} {:>10.2f} {:>6.1f}% {:>10.1f}'.format(
+                name, calls, seconds, 100 * seconds / total, per_call))
+        lines.append('{} rows, timed 1 in {}'.format(self.rows, self.sample_every))
+        return '\n'.join(lines)
@@ -3,8 +3,10 @@ import os
 import re
 import sys
 import gzip
+import shutil
+import tempfile
 from zipfile import ZipFile
-from io import BytesIO, TextIOWrapper
+from io import TextIOWrapper
 from datetime import date
 from national_voter_file.transformers.base import (DATA_DIR,
                                                    BasePreparer,
@@ -51,19 +53,25 @@ class StatePreparer(BasePreparer):
         file_list = [f for f in zip_obj.namelist() if prefix in f and f.endswith('.zip')]
 
         for f in file_list:
-            z_data = ZipFile(BytesIO(zip_obj.read(f)))
-            for z_f in z_data.namelist():
-                with z_data.open(z_f) as zdf:
-                    reader = csv.DictReader(TextIOWrapper(zdf), delimiter=self.sep)
-                    for row in reader:
-                        yield row
+            # Inner zips are copied to disk rather than read into memory,
+            # ZipFile needs to seek and each part can be hundreds of MB
+            with tempfile.TemporaryFile() as tmp:
+                with zip_obj.open(f) as zf:
+                    shutil.copyfileobj(zf, tmp)
+                tmp.seek(0)
+                z_data = ZipFile(tmp)
+                for z_f in z_data.namelist():
+                    with z_data.open(z_f) as zdf:
+                        reader = csv.DictReader(TextIOWrapper(zdf), delimiter=self.sep)
+                        for row in reader:
+                            yield row
 
     def yield_hist_rows(self, zip_obj):
         prefix = self.hist_pre
         file_list = [f for f in zip_obj.namelist() if prefix in f and f.endswith('.gz')]
 
         for f in file_list:
-            with gzip.open(BytesIO(zip_obj.read(f)), 'rt') as gf:
+            with gzip.open(zip_obj.open(f), 'rt') as gf:
                 reader = csv.DictReader(gf, delimiter=self.sep)
                 for row in reader:
                     yield row
@@ -128,10 +136,8 @@ class StateTransformer(BaseTransformer):
 
     #### Address methods #######################################################
 
-    def extract_registration_address(self, input_dict):
-        # TODO: Currently parsing with usaddress, but CO has almost all fields,
-        # might be worth just taking as is
-        address_str = ' '.join([
+    def registration_address_str(self, input_dict):
+        return ' '.join([
             input_dict['HOUSE_NUM'],
             input_dict['HOUSE_SUFFIX'],
             input_dict['PRE_DIR'],
@@ -142,6 +148,20 @@ class StateTransformer(BaseTransformer):
             input_dict['UNIT_NUM']
         ])
 
+    def mailing_address_str(self, input_dict):
+        if not input_dict['MAIL_ADDR1'].strip():
+            return None
+        return ' '.join([
+            input_dict['MAIL_ADDR1'],
+            input_dict['MAIL_ADDR2'],
+            input_dict['MAIL_ADDR3']
+        ])
+
+    def extract_registration_address(self, input_dict):
+        # TODO: Currently parsing with usaddress, but CO has almost all fields,
+        # might be worth just taking as is
+        address_str = self.registration_address_str(input_dict)
+
         raw_dict = {
             'RAW_ADDR1': address_str,
             # Including Raw Addr 2 as same because not as clear of a division
@@ -172,13 +192,10 @@ class StateTransformer(BaseTransformer):
         return converted_addr
 
     def extract_mailing_address(self, input_dict):
-        if input_dict['MAIL_ADDR1'].strip():
+        mail_str = self.mailing_address_str(input_dict)
+        if mail_str is not None:
             try:
-                tagged_address, address_type = usaddress.tag(' '.join([
-                    input_dict['MAIL_ADDR1'],
-                    input_dict['MAIL_ADDR2'],
-                    input_dict['MAIL_ADDR3']
-                ]))
+                tagged_address, address_type = self.tag_address(mail_str)
 
                 if address_type == 'Ambiguous':
                     print("Warn - {}: Ambiguous mailing address falling back to residential ({})".format(address_type, input_dict['MAIL_ADDR1']))
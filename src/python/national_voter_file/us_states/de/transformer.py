@@ -108,6 +108,19 @@ class StateTransformer(BaseTransformer):
 
     #### Address methods #######################################################
 
+    def registration_address_str(self, input_dict):
+        # columns to create address, in order
+        address_components = [
+            'HOME-NO',
+            'HOME-STREET',
+            'HOME-APT',
+            'HOME-DEV',
+        ]
+        # create address string for usaddress.tag
+        return ' '.join([
+            input_dict[x] for x in address_components if input_dict[x] is not None
+        ])
+
     def extract_registration_address(self, input_dict):
         """
         Relies on the usaddress package.
@@ -147,17 +160,7 @@ class StateTransformer(BaseTransformer):
                 'ZIP_CODE'
         """
 
-        # columns to create address, in order
-        address_components = [
-            'HOME-NO',
-            'HOME-STREET',
-            'HOME-APT',
-            'HOME-DEV',
-        ]
-        # create address string for usaddress.tag
-        address_str = ' '.join([
-            input_dict[x] for x in address_components if input_dict[x] is not None
-        ])
+        address_str = self.registration_address_str(input_dict)
 
         raw_dict = {
             'RAW_ADDR1': address_str,
@@ -182,7 +185,7 @@ class StateTransformer(BaseTransformer):
             converted_addr = self.constructEmptyResidentialAddress()
             converted_addr.update(raw_dict)
             converted_addr.update({
-                'STATE_NAME': input_dict['STATE'],
+                'STATE_NAME': 'DE',
                 'VALIDATION_STATUS': '1'
             })
 
@@ -198,6 +201,18 @@ class StateTransformer(BaseTransformer):
         """
         return {'COUNTYCODE': input_dict['COUNTY']}
 
+    def mailing_address_str(self, input_dict):
+        address_components = [
+            "MAIL-NO",
+            "MAIL-APT",
+            "MAIL-STR",
+            "MAIL-CITY",
+            "MAIL-STATE",
+            "MAIL-ZIP"
+        ]
+        mail_str = ' '.join([input_dict[x] for x in address_components if input_dict[x] is not None])
+        return mail_str if mail_str.strip() else None
+
     def extract_mailing_address(self, input_dict):
         """
         Relies on the usaddress package.
@@ -213,21 +228,11 @@ class StateTransformer(BaseTransformer):
                 'MAIL_ZIP_CODE'
                 'MAIL_COUNTRY'
         """
-
-
-        address_components = [
-            "MAIL-NO",
-            "MAIL-APT",
-            "MAIL-STR",
-            "MAIL-CITY",
-            "MAIL-STATE",
-            "MAIL-ZIP"
-        ]
-        mail_str = ' '.join([input_dict[x] for x in address_components if input_dict[x] is not None])
+        mail_str = self.mailing_address_str(input_dict)
 
         mail_addr_dict = {}
 
-        if mail_str.strip():
+        if mail_str is not None:
             usaddress_dict, usaddress_type = self.usaddress_tag(mail_str)
 
             if usaddress_type == 'Ambiguous':
@@ -239,16 +239,18 @@ class StateTransformer(BaseTransformer):
 
     #### Address methods #######################################################
 
-    def extract_registration_address(self, input_dict):
+    def registration_address_str(self, input_dict):
         address_components = [
             'Residence Address Line 1',
             'Residence Address Line 2'
         ]
-
-        address_str = ' '.join([
+        return ' '.join([
             input_dict[x] for x in address_components if input_dict[x] is not None
         ])
 
+    def extract_registration_address(self, input_dict):
+        address_str = self.registration_address_str(input_dict)
+
         raw_dict = {
             'RAW_ADDR1': input_dict['Residence Address Line 1'],
             'RAW_ADDR2': input_dict['Residence Address Line 2'],
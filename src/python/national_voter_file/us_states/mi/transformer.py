@@ -248,6 +248,18 @@ class StateTransformer(BaseTransformer):
     col_type_dict['PRECINCT_SPLIT'] = set([str, type(None)])
     col_type_dict['COUNTY_VOTER_REF'] = set([str, type(None)])
 
+    # The residence address comes split up, see structured_address()
+    structured_address_columns = {
+        'ADDRESS_NUMBER_PREFIX': 'HOUSE_NUM_CHARACTER',
+        'ADDRESS_NUMBER': 'RESIDENCE_STREET_NUMBER',
+        'ADDRESS_NUMBER_SUFFIX': 'HOUSE_SUFFIX',
+        'STREET_NAME_PRE_DIRECTIONAL': 'PRE_DIRECTION',
+        'STREET_NAME': 'STREET_NAME',
+        'STREET_NAME_POST_TYPE': 'STREET_TYPE',
+        'STREET_NAME_POST_DIRECTIONAL': 'SUFFIX_DIRECTION',
+        'OCCUPANCY': 'RESIDENCE_EXTENSION',
+    }
+
 
     #### Demographics methods #################################################
 
@@ -262,6 +274,23 @@ class StateTransformer(BaseTransformer):
 
     #### Address methods ######################################################
 
+    def registration_address_str(self, input_dict):
+        # columns to create address, in order
+        address_components = [
+            'HOUSE_NUM_CHARACTER',
+            'RESIDENCE_STREET_NUMBER',
+            'HOUSE_SUFFIX',
+            'PRE_DIRECTION',
+            'STREET_NAME',
+            'STREET_TYPE',
+            'SUFFIX_DIRECTION',
+            'RESIDENCE_EXTENSION'
+        ]
+        # create address string for usaddress.tag
+        return ' '.join([
+            input_dict[x] for x in address_components if input_dict[x] is not None
+        ])
+
     def extract_registration_address(self, input_dict):
         """
         Relies on the usaddress package.
@@ -300,21 +329,7 @@ class StateTransformer(BaseTransformer):
                 'USPS_BOX_TYPE'
                 'ZIP_CODE'
         """
-        # columns to create address, in order
-        address_components = [
-            'HOUSE_NUM_CHARACTER',
-            'RESIDENCE_STREET_NUMBER',
-            'HOUSE_SUFFIX',
-            'PRE_DIRECTION',
-            'STREET_NAME',
-            'STREET_TYPE',
-            'SUFFIX_DIRECTION',
-            'RESIDENCE_EXTENSION'
-        ]
-        # create address string for usaddress.tag
-        address_str = ' '.join([
-            input_dict[x] for x in address_components if input_dict[x] is not None
-        ])
+        address_str = self.registration_address_str(input_dict)
 
         raw_dict = {
             'RAW_ADDR1': address_str,
@@ -324,11 +339,16 @@ class StateTransformer(BaseTransformer):
             'RAW_ZIP': input_dict['ZIP']
         }
 
-        usaddress_dict = self.usaddress_tag(address_str)[0]
-
-        if usaddress_dict:
-            converted_addr = self.convert_usaddress_dict(usaddress_dict)
+        # Only tag the string when the columns don't fit together
+        converted_addr = self.standardize_address(
+            self.structured_address(input_dict)
+        )
+        if converted_addr is None:
+            usaddress_dict = self.usaddress_tag(address_str)[0]
+            if usaddress_dict:
+                converted_addr = self.convert_usaddress_dict(usaddress_dict)
 
+        if converted_addr:
             converted_addr.update({
                 'PLACE_NAME': input_dict['CITY'],
                 'STATE_NAME': input_dict['STATE'],
@@ -346,7 +366,7 @@ class StateTransformer(BaseTransformer):
 
         return converted_addr
 
-    def extract_mailing_address(self, input_dict):
+    def mailing_address_str(self, input_dict):
         # columns to create address, in order
         address_components = [
             'MAIL_ADDR_1',
@@ -359,8 +379,12 @@ class StateTransformer(BaseTransformer):
         address_str = ' '.join([
             input_dict[x] for x in address_components if input_dict[x] is not None
         ])
+        return address_str if address_str.strip() else None
+
+    def extract_mailing_address(self, input_dict):
+        address_str = self.mailing_address_str(input_dict)
         mail_addr_dict = {}
-        if address_str.strip():
+        if address_str is not None:
             usaddress_dict, usaddress_type = self.usaddress_tag(address_str)
             if usaddress_type == 'Ambiguous':
                 print('Warn - {}: Ambiguous mailing address, falling back to residential'.format(usaddress_type))
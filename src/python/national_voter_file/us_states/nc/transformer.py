@@ -132,6 +132,22 @@ class StateTransformer(BaseTransformer):
 
     #### Address methods #######################################################
 
+    def registration_address_str(self, input_dict):
+        # columns to create address, in order
+        address_components = [
+            'res_street_address',
+        ]
+        # create address string for usaddress.tag
+        address_str = ' '.join([
+            input_dict[x] for x in address_components if input_dict[x] is not None
+        ])
+        # res_street_address contains #<description> in some entries.
+        # This is removed until we know we should not remove it.
+        for pattern in self.hashtag_patterns:
+            if pattern in address_str:
+                address_str = ' '.join(address_str.split(pattern))
+        return address_str
+
     def extract_registration_address(self, input_dict):
         """
         Relies on the usaddress package.
@@ -170,14 +186,7 @@ class StateTransformer(BaseTransformer):
                 'USPS_BOX_TYPE'
                 'ZIP_CODE'
         """
-        # columns to create address, in order
-        address_components = [
-            'res_street_address',
-        ]
-        # create address string for usaddress.tag
-        address_str = ' '.join([
-            input_dict[x] for x in address_components if input_dict[x] is not None
-        ])
+        address_str = self.registration_address_str(input_dict)
 
         # res_street_address contains #<description> in some entries.
         # This is removed until we know we should not remove it.
@@ -185,8 +194,6 @@ class StateTransformer(BaseTransformer):
         for pattern in self.hashtag_patterns:
             if pattern in res_street_addr:
                 res_street_addr = ' '.join(res_street_addr.split(pattern))
-            if pattern in address_str:
-                address_str = ' '.join(address_str.split(pattern))
 
         # save the raw information too
         raw_dict = {
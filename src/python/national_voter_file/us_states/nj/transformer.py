@@ -137,6 +137,20 @@ class StateTransformer(BaseTransformer):
 
     #### Address methods ######################################################
 
+    def registration_address_str(self, input_dict):
+        # columns to create address, in order
+        address_components = [
+            'STREET NUMBER',
+            'SUFF A',
+            'SUFF B',
+            'STREET NAME',
+            'APT/UNIT NO'
+        ]
+        # create address string for usaddress.tag
+        return ' '.join([
+            input_dict[x] for x in address_components if input_dict[x] is not None
+        ])
+
     def extract_registration_address(self, input_dict):
         """
         Relies on the usaddress package.
@@ -175,18 +189,7 @@ class StateTransformer(BaseTransformer):
                 'USPS_BOX_TYPE'
                 'ZIP_CODE'
         """
-        # columns to create address, in order
-        address_components = [
-            'STREET NUMBER',
-            'SUFF A',
-            'SUFF B',
-            'STREET NAME',
-            'APT/UNIT NO'
-        ]
-        # create address string for usaddress.tag
-        address_str = ' '.join([
-            input_dict[x] for x in address_components if input_dict[x] is not None
-        ])
+        address_str = self.registration_address_str(input_dict)
 
         raw_dict = {
             'RAW_ADDR1': address_str,
@@ -218,7 +221,7 @@ class StateTransformer(BaseTransformer):
 
         return converted_addr
 
-    def extract_mailing_address(self, input_dict):
+    def mailing_address_str(self, input_dict):
         # columns to create address, in order
         address_components = [
             'STREET NUMBER',
@@ -231,8 +234,12 @@ class StateTransformer(BaseTransformer):
         address_str = ' '.join([
             input_dict[x] for x in address_components if input_dict[x] is not None
         ])
+        return address_str if address_str.strip() else None
+
+    def extract_mailing_address(self, input_dict):
+        address_str = self.mailing_address_str(input_dict)
         mail_addr_dict = {}
-        if address_str.strip():
+        if address_str is not None:
             usaddress_dict, usaddress_type = self.usaddress_tag(address_str)
             if usaddress_type == 'Ambiguous':
                 print('Warn - {}: Ambiguous mailing address, falling back to residential'.format(usaddress_type))
@@ -147,9 +147,30 @@ class StateTransformer(BaseTransformer):
 
     #### Address methods #######################################################
 
-    def extract_registration_address(self, input_dict):
+    # The residence address comes split up, with the street type still in
+    # RSTREETNAME, see structured_address()
+    structured_address_columns = {
+        'ADDRESS_NUMBER': 'RADDNUMBER',
+        'ADDRESS_NUMBER_SUFFIX': 'RHALFCODE',
+        'STREET_NAME_PRE_DIRECTIONAL': 'RPREDIRECTION',
+        'STREET_NAME': 'RSTREETNAME',
+        'STREET_NAME_POST_DIRECTIONAL': 'RPOSTDIRECTION',
+        'OCCUPANCY_IDENTIFIER': 'RAPARTMENT',
+    }
+
+    def structured_address(self, input_dict):
+        address_dict = super(StateTransformer, self).structured_address(input_dict)
+        if address_dict and address_dict['OCCUPANCY_IDENTIFIER']:
+            # RAPARTMENT only has the apartment number, a bare APT is no number
+            if address_dict['OCCUPANCY_IDENTIFIER'] == 'APT':
+                address_dict['OCCUPANCY_IDENTIFIER'] = None
+            else:
+                address_dict['OCCUPANCY_TYPE'] = 'Apt'
+        return address_dict
+
+    def registration_address_str(self, input_dict):
         aptField = input_dict['RAPARTMENT'].strip()
-        address_str = ' '.join([
+        return ' '.join([
             input_dict['RADDNUMBER'],
             input_dict['RHALFCODE'],
             input_dict['RPREDIRECTION'],
@@ -158,6 +179,19 @@ class StateTransformer(BaseTransformer):
             'Apt ' + input_dict['RAPARTMENT'] if aptField and aptField != 'APT' else ''
         ])
 
+    def mailing_address_str(self, input_dict):
+        if not input_dict['MAILADD1'].strip():
+            return None
+        return ' '.join([
+            input_dict['MAILADD1'],
+            input_dict['MAILADD2'],
+            input_dict['MAILADD3'],
+            input_dict['MAILADD4']
+        ])
+
+    def extract_registration_address(self, input_dict):
+        address_str = self.registration_address_str(input_dict)
+
         raw_dict = {
             'RAW_ADDR1': self.construct_val(input_dict, ['RADDNUMBER', 'RHALFCODE', 'RPREDIRECTION', 'RSTREETNAME', 'RPOSTDIRECTION']),
             'RAW_ADDR2': input_dict['RAPARTMENT'].strip(),
@@ -165,10 +199,16 @@ class StateTransformer(BaseTransformer):
             'RAW_ZIP': input_dict['RZIP5']
         }
 
-        usaddress_dict = self.usaddress_tag(address_str)[0]
-        if usaddress_dict:
-            converted_addr = self.convert_usaddress_dict(usaddress_dict)
+        # Only tag the string when the columns don't fit together
+        converted_addr = self.standardize_address(
+            self.structured_address(input_dict)
+        )
+        if converted_addr is None:
+            usaddress_dict = self.usaddress_tag(address_str)[0]
+            if usaddress_dict:
+                converted_addr = self.convert_usaddress_dict(usaddress_dict)
 
+        if converted_addr:
             converted_addr.update({
                 'PLACE_NAME':input_dict['RCITY'],
                 'STATE_NAME':"NY",
@@ -192,14 +232,10 @@ class StateTransformer(BaseTransformer):
         return {'COUNTYCODE': input_dict['COUNTYCODE']}
 
     def extract_mailing_address(self, input_dict):
-        if input_dict['MAILADD1'].strip():
+        mail_str = self.mailing_address_str(input_dict)
+        if mail_str is not None:
             try:
-                tagged_address, address_type = usaddress.tag(' '.join([
-                    input_dict['MAILADD1'],
-                    input_dict['MAILADD2'],
-                    input_dict['MAILADD3'],
-                    input_dict['MAILADD4']
-                ]))
+                tagged_address, address_type = self.tag_address(mail_str)
 
                 if address_type == 'Ambiguous':
                     print("Warn - %s: Ambiguous mailing address falling back to residential (%s)" % (address_type, input_dict['MAILADD1']))
@@ -93,7 +93,7 @@ class StateTransformer(BaseTransformer):
 
     #### Address methods #######################################################
 
-    def extract_registration_address(self, input_dict):
+    def registration_address_str(self, input_dict):
         address_components = [
             'StreetNum',
             'StreetDir',
@@ -101,10 +101,13 @@ class StateTransformer(BaseTransformer):
             'StreetType',
             'BldgNum'
         ]
-        address_str = ' '.join([
+        return ' '.join([
             input_dict[x] for x in address_components if input_dict[x] is not None
         ])
 
+    def extract_registration_address(self, input_dict):
+        address_str = self.registration_address_str(input_dict)
+
         raw_dict = {
             'RAW_ADDR1': ' '.join([
                 input_dict['StreetNum'],
@@ -202,6 +202,25 @@ class StateTransformer(BaseTransformer):
 
     #### Address methods ######################################################
 
+    # columns to create address, in order
+    registration_address_components = [
+        'ADDRESS_NUMBER',
+        'ADDRESS_NUMBER_SUFFIX',
+        'STREET_NAME'
+    ]
+
+    def registration_address_str(self, input_dict):
+        # create address string for usaddress.tag
+        address_str = ' '.join([
+            input_dict[x] for x in self.registration_address_components
+            if input_dict[x] is not None
+        ])
+        if input_dict['_ADDRESS_APARTMENT_NUM']:
+            address_str = '{} Apt {}'.format(address_str, input_dict['_ADDRESS_APARTMENT_NUM'])
+        if input_dict['_ADDRESS_LINE2']:
+            address_str = '{}, {}'.format(address_str, input_dict['_ADDRESS_LINE2'])
+        return address_str
+
     def extract_registration_address(self, input_dict):
         """
         Relies on the usaddress package.
@@ -240,20 +259,8 @@ class StateTransformer(BaseTransformer):
                 'USPS_BOX_TYPE'
                 'ZIP_CODE'
         """
-        # columns to create address, in order
-        address_components = [
-            'ADDRESS_NUMBER',
-            'ADDRESS_NUMBER_SUFFIX',
-            'STREET_NAME'
-        ]
-        # create address string for usaddress.tag
-        address_str = ' '.join([
-            input_dict[x] for x in address_components if input_dict[x] is not None
-        ])
-        if input_dict['_ADDRESS_APARTMENT_NUM']:
-            address_str = '{} Apt {}'.format(address_str, input_dict['_ADDRESS_APARTMENT_NUM'])
-        if input_dict['_ADDRESS_LINE2']:
-            address_str = '{}, {}'.format(address_str, input_dict['_ADDRESS_LINE2'])
+        address_components = self.registration_address_components
+        address_str = self.registration_address_str(input_dict)
 
         # use the usaddress_tag method to handle errors
         usaddress_dict, usaddress_type = self.usaddress_tag(address_str)
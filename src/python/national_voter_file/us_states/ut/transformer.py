@@ -119,6 +119,17 @@ class StateTransformer(BaseTransformer):
 
     #### Address methods #######################################################
 
+    def registration_address_str(self, input_dict):
+        # columns to create address, in order
+        address_components = [
+            'House Number', 'House Number Suffix', 'Direction Prefix', 'Street', 'Direction Suffix',
+            'Street Type', 'Unit Type', 'Unit Number',
+        ]
+        # create address string for usaddress.tag
+        return ' '.join([
+            input_dict[x] for x in address_components if input_dict[x] is not None
+        ])
+
     def extract_registration_address(self, input_dict):
         """
         Relies on the usaddress package.
@@ -157,15 +168,7 @@ class StateTransformer(BaseTransformer):
                 'USPS_BOX_TYPE'
                 'ZIP_CODE'
         """
-        # columns to create address, in order
-        address_components = [
-            'House Number', 'House Number Suffix', 'Direction Prefix', 'Street', 'Direction Suffix',
-            'Street Type', 'Unit Type', 'Unit Number',
-        ]
-        # create address string for usaddress.tag
-        address_str = ' '.join([
-            input_dict[x] for x in address_components if input_dict[x] is not None
-        ])
+        address_str = self.registration_address_str(input_dict)
         raw_dict = {
             'RAW_ADDR1': address_str,
             'RAW_ADDR2': address_str,
@@ -189,6 +192,13 @@ class StateTransformer(BaseTransformer):
         converted['STATE_NAME'] = 'UT'
         return converted
 
+    def mailing_address_str(self, input_dict):
+        columns = ['Mailing Address']
+        address_str = ' '.join([
+            input_dict[x] for x in columns if input_dict[x] is not None
+        ])
+        return address_str if address_str.strip() else None
+
     def extract_mailing_address(self, input_dict):
         """
         Relies on the usaddress package.
@@ -204,12 +214,16 @@ class StateTransformer(BaseTransformer):
                 'MAIL_ZIP_CODE'
                 'MAIL_COUNTRY'
         """
-        columns = ['Mailing Address']
-        mail_str = ' '.join([x for x in columns])
-        usaddress_dict, usaddress_type = self.usaddress_tag(mail_str)
+        mail_str = self.mailing_address_str(input_dict)
+        city_state_zip = input_dict['Mailing city, state  zip']
+        if mail_str is None and not (city_state_zip or '').strip():
+            # No mailing address, fix_missing_mailing_addr copies the residence
+            return {}
+        usaddress_dict, usaddress_type = {}, 'Street Address'
+        if mail_str is not None:
+            usaddress_dict, usaddress_type = self.usaddress_tag(mail_str)
 
         city = state = zipcode = None
-        city_state_zip = input_dict['Mailing city, state  zip']
         try:
             if ',' in city_state_zip:
                 city, state_zip = input_dict['Mailing city, state  zip'].split(',')
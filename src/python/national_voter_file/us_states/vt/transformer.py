@@ -86,6 +86,16 @@ class StateTransformer(BaseTransformer):
 
     #### Address methods #######################################################
 
+    def registration_address_str(self, input_dict):
+        columns = [
+            'Legal Address Line 1',
+            'Legal Address Line 2',
+            'Legal Address City',
+            'Legal Address State',
+            'Legal Address Zip'
+        ]
+        return ' '.join([input_dict[x] for x in columns if input_dict[x] is not None])
+
     def extract_registration_address(self, input_dict):
         """
         Relies on the usaddress package.
@@ -125,15 +135,7 @@ class StateTransformer(BaseTransformer):
                 'ZIP_CODE'
         """
 
-        columns = [
-            'Legal Address Line 1',
-            'Legal Address Line 2',
-            'Legal Address City',
-            'Legal Address State',
-            'Legal Address Zip'
-        ]
-
-        mail_str = ' '.join([input_dict[x] for x in columns if input_dict[x] is not None])
+        mail_str = self.registration_address_str(input_dict)
         usaddress_dict, usaddress_type = self.usaddress_tag(mail_str)
 
         raw_dict = {
@@ -193,6 +195,16 @@ class StateTransformer(BaseTransformer):
         }
         return {'COUNTYCODE': county_code_map[input_dict.get('County')]}
 
+    def mailing_address_str(self, input_dict):
+        columns = [
+            'Mailing Address Line 1',
+            'Mailing Address Line 2',
+            'Mailing Address City',
+            'Mailing Address State',
+            'Mailing Address Zip'
+        ]
+        return ' '.join([input_dict[x] for x in columns if input_dict[x] is not None])
+
     def extract_mailing_address(self, input_dict):
         """
         Relies on the usaddress package.
@@ -208,15 +220,7 @@ class StateTransformer(BaseTransformer):
                 'MAIL_ZIP_CODE'
                 'MAIL_COUNTRY'
         """
-        columns = [
-            'Mailing Address Line 1',
-            'Mailing Address Line 2',
-            'Mailing Address City',
-            'Mailing Address State',
-            'Mailing Address Zip'
-        ]
-
-        mail_str = ' '.join([input_dict[x] for x in columns if input_dict[x] is not None])
+        mail_str = self.mailing_address_str(input_dict)
         usaddress_dict, usaddress_type = self.usaddress_tag(mail_str)
 
         mail_addr_dict = {}
@@ -3,11 +3,207 @@ import pandas as pd
 import csv
 import sys
 import re
+import os
+import atexit
+import json
+import time
+import hashlib
+import threading
 import collections
-from jsonmerge import merge
 
 API_URL="http://api.censusreporter.org/1.0/data/show/{release}?table_ids={table_ids}&geo_ids={geoids}"
 
+# Responses are saved under CACHE_DIR, one JSON file per request, and reused
+# for CACHE_TTL seconds (None: forever). With OFFLINE set nothing is fetched,
+# a request that isn't cached raises CacheMiss. See configure_cache().
+CACHE_DIR = os.environ.get('CENSUSREPORTER_CACHE',
+                           os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache'))
+CACHE_TTL = 30 * 24 * 3600
+OFFLINE = False
+
+
+# Requests that fail to connect, time out or get one of RETRY_STATUSES are
+# retried MAX_TRIES times in all, waiting BACKOFF_SECONDS, then twice as long...
+MAX_TRIES = 5
+BACKOFF_SECONDS = 1.0
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+REQUEST_TIMEOUT = 60
+
+# Longest URL the API takes, see max_geoids()
+MAX_URL_SIZE = 4020
+
+# The one error that is an answer, see iter_responses()
+MISSING_GEOIDS_ERROR = "release doesn't include GeoID(s) "
+
+_local = threading.local()
+_geoid_indexes = {}
+_geoid_indexes_lock = threading.Lock()
+
+
+class CacheMiss(Exception):
+    pass
+
+
+def configure_cache(cache_dir=None, ttl=CACHE_TTL, offline=False):
+    """Where responses are cached, how long they stay fresh and whether
+    requests that aren't cached fail instead of going to the API.
+    cache_dir -- directory of the cache, None to turn caching off
+    ttl -- seconds a cached response is used for, None for no expiry
+    offline -- replay from the cache only, raising CacheMiss for the rest
+    """
+    global CACHE_DIR, CACHE_TTL, OFFLINE
+    if offline and cache_dir is None:
+        raise ValueError('offline replay needs a cache directory')
+    # Indexes belong to the cache directory they were loaded from
+    save_geoid_indexes()
+    _geoid_indexes.clear()
+    CACHE_DIR = cache_dir
+    CACHE_TTL = ttl
+    OFFLINE = offline
+
+
+class GeoidIndex(object):
+    """Geoids a release is known to have and known to lack, learnt from
+    responses and kept next to the cached responses as geoids.json. Geoids
+    it lacks are dropped before a request is sent, so later runs don't pay
+    for the error and the second request. Like cached responses, that a
+    geoid is missing is only trusted for CACHE_TTL seconds: 'latest' moves
+    on to releases that may have it.
+    """
+
+    def __init__(self, release):
+        self.release = release
+        self.valid = set()
+        # geoid -> time the API last said the release lacks it
+        self.missing = {}
+        self.dirty = False
+        self.lock = threading.Lock()
+        path = self.path()
+        if path is not None and os.path.exists(path):
+            with open(path) as f:
+                saved = json.load(f)
+            self.valid.update(saved['valid'])
+            missing = saved['missing']
+            if not isinstance(missing, dict):
+                # Saved without times, as old as the file
+                saved_at = os.path.getmtime(path)
+                missing = dict((x, saved_at) for x in missing)
+            self.missing.update(missing)
+            self.expire()
+
+    def path(self):
+        if CACHE_DIR is None:
+            return None
+        return os.path.join(CACHE_DIR, self.release, 'geoids.json')
+
+    def expire(self):
+        """Forgets missing geoids older than CACHE_TTL, offline they're kept"""
+        if OFFLINE or CACHE_TTL is None:
+            return
+        oldest = time.time() - CACHE_TTL
+        with self.lock:
+            expired = [x for x, seen in self.missing.items() if seen < oldest]
+            for x in expired:
+                del self.missing[x]
+            if expired:
+                self.dirty = True
+
+    def filter(self, geoids):
+        self.expire()
+        return [x for x in geoids if x not in self.missing]
+
+    def add(self, valid=(), missing=()):
+        """The latest answer about a geoid wins"""
+        now = time.time()
+        with self.lock:
+            for x in valid:
+                if x not in self.valid or x in self.missing:
+                    self.valid.add(x)
+                    self.missing.pop(x, None)
+                    self.dirty = True
+            for x in missing:
+                self.valid.discard(x)
+                self.missing[x] = now
+                self.dirty = True
+
+    def save(self):
+        path = self.path()
+        with self.lock:
+            if path is None or not self.dirty or OFFLINE:
+                return
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = _tmp_path(path)
+            with open(tmp_path, 'w') as f:
+                json.dump({'valid': sorted(self.valid),
+                           'missing': self.missing}, f, sort_keys=True)
+            os.replace(tmp_path, path)
+            self.dirty = False
+
+
+def geoid_index(release):
+    """GeoidIndex of release, loaded once per process and saved on exit"""
+    with _geoid_indexes_lock:
+        index = _geoid_indexes.get(release)
+        if index is None:
+            if not _geoid_indexes:
+                atexit.register(save_geoid_indexes)
+            index = _geoid_indexes[release] = GeoidIndex(release)
+    return index
+
+
+def save_geoid_indexes():
+    for index in list(_geoid_indexes.values()):
+        index.save()
+
+
+def _cache_path(tables, geoids, release):
+    # The API doesn't care about order or the case of table IDs
+    key = json.dumps([release, sorted(t.upper() for t in tables), sorted(geoids)])
+    digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+    return os.path.join(CACHE_DIR, release, digest[:2], digest + '.json')
+
+
+def _cacheable(status_code, data):
+    """Data, and the error listing geoids a release lacks, are answers that
+    are replayed. Anything else (rate limits, server errors...) may not
+    happen again and is never kept.
+    """
+    if status_code in RETRY_STATUSES:
+        return False
+    if isinstance(data, dict) and 'error' in data:
+        return MISSING_GEOIDS_ERROR in str(data['error'])
+    return status_code == 200
+
+
+def _read_cache(path):
+    try:
+        with open(path) as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not OFFLINE and CACHE_TTL is not None and \
+            time.time() - cached['fetched'] > CACHE_TTL:
+        return None
+    # Caches written before only 200s were kept can hold other errors
+    if not _cacheable(cached.get('status', 200), cached['response']):
+        return None
+    return cached['response']
+
+
+def _tmp_path(path):
+    """Temp file next to path for os.replace(), one per process and thread,
+    since the ThreadPool fetches of a run share the pid"""
+    return '{}.{}.{}.tmp'.format(path, os.getpid(), threading.get_ident())
+
+
+def _write_cache(path, url, response, status=200):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = _tmp_path(path)
+    with open(tmp_path, 'w') as f:
+        json.dump({'url': url, 'fetched': time.time(), 'status': status,
+                   'response': response}, f)
+    os.replace(tmp_path, path)
+
 
 def _clean_list_arg(arg,default):
     if arg is None:
@@ -16,13 +212,91 @@ def _clean_list_arg(arg,default):
         arg = [arg]
     return arg
 
+def session():
+    """Keep-alive session of this thread, sessions aren't shared by threads"""
+    if getattr(_local, 'session', None) is None:
+        _local.session = requests.Session()
+    return _local.session
+
+
+def fetch(url):
+    """GET url, retrying with exponential backoff"""
+    for attempt in range(MAX_TRIES):
+        last = attempt == MAX_TRIES - 1
+        try:
+            response = session().get(url, timeout=REQUEST_TIMEOUT)
+        except requests.RequestException:
+            if last:
+                raise
+        else:
+            if last or response.status_code not in RETRY_STATUSES:
+                return response
+        time.sleep(BACKOFF_SECONDS * 2 ** attempt)
+
+
+def max_geoids(tables, geoids):
+    """How many geoids like geoids[0] fit in one request URL with tables"""
+    geoSize = len(geoids[0]) + 1
+    tblSize = len(tables[0]) + 1
+    return max(int((MAX_URL_SIZE - len(tables) * tblSize) / geoSize), 1)
+
+
 def get_url_response(tables, geoids, release):
     url = API_URL.format(table_ids=','.join(tables).upper(),
                          geoids=','.join(geoids),
                          release=release)
 
-    response = requests.get(url)
-    return response.json()
+    path = None
+    if CACHE_DIR is not None:
+        path = _cache_path(tables, geoids, release)
+        cached = _read_cache(path)
+        if cached is not None:
+            return cached
+    if OFFLINE:
+        raise CacheMiss('not in the offline cache: ' + url)
+
+    response = fetch(url)
+    data = response.json()
+    if path is not None and _cacheable(response.status_code, data):
+        _write_cache(path, url, data, response.status_code)
+    return data
+
+
+def iter_responses(tables, geoids, release):
+    """Yield the API responses for tables and geoids, one per request.
+    Geoid lists too long for one URL are cut into consecutive pages of
+    max_geoids(). Geoids the release's GeoidIndex knows it doesn't include
+    are left out up front. Others the API reports missing are dropped from
+    their page, which is requested again, and added to the index; any other
+    error raises an Exception.
+    """
+    index = geoid_index(release)
+    geoids = index.filter(geoids)
+    if len(geoids) == 0:
+        return
+
+    maxGeos = max_geoids(tables, geoids)
+    if len(geoids) > maxGeos:
+        print("URL maybe too big, breaking up.")
+
+    for start in range(0, len(geoids), maxGeos):
+        page = geoids[start:start + maxGeos]
+        response = get_url_response(tables, page, release)
+
+        if "error" in response and MISSING_GEOIDS_ERROR in response['error']:
+            geoList = re.findall(r'(\d+US\w+)\W/', response['error'])
+            index.add(missing=geoList)
+
+            page = [x for x in page if x not in geoList]
+            if len(page) == 0:
+                continue
+
+            response = get_url_response(tables, page, release)
+
+        if "error" in response:
+            raise Exception(response['error'])
+        index.add(valid=response['data'])
+        yield response
 
 
 def json_data(tables=None, geoids=None, release='latest'):
@@ -34,40 +308,25 @@ def json_data(tables=None, geoids=None, release='latest'):
         acs2013_1yr - the 2013 1-year ACS data. Only includes geographies with population >65,000
         acs2013_3yr - the 2011-13 3-year ACS data. Only includes geographies with population >20,000
         acs2013_5yr - the 2009-13 5-year ACS data. Includes all geographies covered in the ACS.
+    The responses of every request are combined into one, None if none of the
+    geoids are in the release.
     """
     geoids = _clean_list_arg(geoids,'040|01000US')
     tables = _clean_list_arg(tables,'B01001')
 
-    #If the URL is too big it will fail, estimating the size here and if it is too big we'll break this up
-    #This should never happen, but we're going to check just to make sure
-    maxURLSize = 4020
-    geoSize = len(geoids[0]) + 1
-    tblSize = len(tables[0]) + 1
-    urlSize = (len(tables) * tblSize) + (len(geoids) * geoSize)
-
-    if urlSize > maxURLSize:
-        tableSize = len(tables) * tblSize
-        maxGeos = int((maxURLSize - tableSize) / geoSize)
-        print("URL maybe too big, breaking up.")
-        print((len(tables) * tblSize) + (len(geoids[:maxGeos]) * geoSize))
-        resp = get_url_response(tables, geoids[:maxGeos], release)
-        if "error" in resp:
-            raise Exception(resp['error'])
-
-        return merge(resp, json_data(tables, geoids[maxGeos:], release))
-
-    response = get_url_response(tables, geoids, release)
-
-    if "error" in response and "release doesn't include GeoID(s) " in response['error']:
-        geoList = re.findall(r'(\d+US\w+)\W/', response['error'])
-
-        geoids = [x for x in geoids if x not in geoList]
-        if len(geoids) == 0:
-            return None
-
-        response = get_url_response(tables, geoids, release)
-
-    return response
+    combined = None
+    for response in iter_responses(tables, geoids, release):
+        if combined is None:
+            combined = response
+            continue
+        # Pages are keyed by geoid ('data', 'geography') or repeat the same
+        # metadata ('tables', 'release'), so one level of update merges them
+        for key, value in response.items():
+            if isinstance(value, dict) and isinstance(combined.get(key), dict):
+                combined[key].update(value)
+            else:
+                combined[key] = value
+    return combined
 
 
 def get_dataframe(tables=None, geoids=None, release='latest',level=None,place_names=True,column_names=True):
@@ -84,24 +343,31 @@ def get_dataframe(tables=None, geoids=None, release='latest',level=None,place_na
     place_names -- specify False to omit a 'name' column for each geography row
     column_names -- specify False to preserve the coded column names instead of using verbal labels
     """
+    geoids = _clean_list_arg(geoids,'040|01000US')
+    tables = _clean_list_arg(tables,'B01001')
 
-    response = json_data(tables, geoids, release)
-
-    if 'error' in response:
-        raise Exception(response['error'])
-
-    result_list = []
-    for geoid, tables in response['data'].items():
-        result = {
-            'GEOID': geoid
-        }
-        for table, table_data in tables.items():
-            result.update(table_data['estimate'])
-
-        result_list.append(result)
+    # One list per column, filled page by page as the responses come in, so
+    # the DataFrame is built once from columns instead of a dict per row
+    columns = collections.OrderedDict([('GEOID', [])])
+    rows = 0
+    for response in iter_responses(tables, geoids, release):
+        for geoid, geo_tables in response['data'].items():
+            columns['GEOID'].append(geoid)
+            for table_data in geo_tables.values():
+                for column, value in table_data['estimate'].items():
+                    values = columns.get(column)
+                    if values is None:
+                        values = columns[column] = [None] * rows
+                    values.append(value)
+            rows += 1
+            # A table missing for this geography leaves its columns empty
+            for values in columns.values():
+                if len(values) < rows:
+                    values.append(None)
 
-    df = pd.DataFrame(result_list)
-    return df
+    if rows == 0:
+        return pd.DataFrame()
+    return pd.DataFrame(columns)
 
 
 # Create string translation tables
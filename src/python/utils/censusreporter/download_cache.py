@@ -0,0 +1,139 @@
+import os
+import json
+import hashlib
+import threading
+
+import requests
+
+"""
+Local copies of the Census Gazetteer files and index pages getCensus.py reads.
+
+cached_download() keeps each URL as a file under DOWNLOAD_DIR, with the ETag
+and Last-Modified headers it came with in a .json file next to it. Later runs
+send those back (If-None-Match / If-Modified-Since) and only download the file
+again when the server has a new one, otherwise the 304 answer is enough. A URL
+is revalidated once per run. With OFFLINE set the saved files are used as they
+are and nothing is requested.
+"""
+
+DOWNLOAD_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            'cache', 'downloads')
+OFFLINE = False
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+REQUEST_TIMEOUT = 60
+
+_checked = set()
+_lock = threading.Lock()
+
+
+class NotCached(Exception):
+    pass
+
+
+def configure_downloads(download_dir=None, offline=False):
+    """download_dir -- where files are kept, default DOWNLOAD_DIR
+    offline -- only use files already downloaded, raising NotCached for others
+    """
+    global DOWNLOAD_DIR, OFFLINE
+    if download_dir is not None:
+        DOWNLOAD_DIR = download_dir
+    OFFLINE = offline
+    _checked.clear()
+
+
+def _paths(url):
+    digest = hashlib.sha1(url.encode('utf-8')).hexdigest()[:16]
+    name = url.rstrip('/').rsplit('/', 1)[-1] or 'index'
+    path = os.path.join(DOWNLOAD_DIR, '{}_{}'.format(digest, name))
+    return path, path + '.json'
+
+
+def _read_meta(meta_path):
+    try:
+        with open(meta_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def cached_download(url):
+    """Path of a local copy of url, downloaded or revalidated if needed.
+    Returns None when the server doesn't have url (4xx).
+    """
+    path, meta_path = _paths(url)
+    meta = _read_meta(meta_path)
+    have_file = meta is not None and os.path.exists(path)
+    if OFFLINE:
+        if not have_file:
+            raise NotCached('not downloaded yet: ' + url)
+        return path if meta.get('status', 200) == 200 else None
+    if have_file and url in _checked:
+        return path if meta.get('status', 200) == 200 else None
+
+    headers = {}
+    if have_file and meta.get('status', 200) == 200:
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+    response = requests.get(url, headers=headers, stream=True,
+                            timeout=REQUEST_TIMEOUT)
+    with response:
+        if response.status_code == 304 and have_file:
+            pass
+        elif 400 <= response.status_code < 500:
+            # Remember the miss too, getCensus probes for the latest year
+            meta = {'url': url, 'status': response.status_code}
+            _write_meta(meta_path, meta)
+            open(path, 'wb').close()
+        else:
+            response.raise_for_status()
+            os.makedirs(DOWNLOAD_DIR, exist_ok=True)
+            tmp_path = _tmp_path(path)
+            with open(tmp_path, 'wb') as f:
+                for block in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                    f.write(block)
+            os.replace(tmp_path, path)
+            meta = {'url': url, 'status': 200,
+                    'etag': response.headers.get('ETag'),
+                    'last_modified': response.headers.get('Last-Modified')}
+            _write_meta(meta_path, meta)
+    with _lock:
+        _checked.add(url)
+    return path if meta.get('status', 200) == 200 else None
+
+
+def _tmp_path(path):
+    """Temp file next to path for os.replace(), one per process and thread"""
+    return '{}.{}.{}.tmp'.format(path, os.getpid(), threading.get_ident())
+
+
+def _write_meta(meta_path, meta):
+    os.makedirs(os.path.dirname(meta_path), exist_ok=True)
+    tmp_path = _tmp_path(meta_path)
+    with open(tmp_path, 'w') as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, meta_path)
+
+
+def url_exists(url):
+    """Whether the server has url, without downloading it when it isn't
+    saved yet (a HEAD request). The answer is saved like a download's, so
+    offline runs know it too.
+    """
+    path, meta_path = _paths(url)
+    meta = _read_meta(meta_path)
+    if meta is not None and (OFFLINE or url in _checked):
+        return meta.get('status', 200) == 200
+    if OFFLINE:
+        raise NotCached('not checked yet: ' + url)
+    if meta is not None and meta.get('status', 200) == 200 and \
+            os.path.exists(path):
+        return cached_download(url) is not None
+    response = requests.head(url, allow_redirects=True, timeout=REQUEST_TIMEOUT)
+    # Server errors say nothing about the URL, they aren't kept
+    if response.status_code == 200 or 400 <= response.status_code < 500:
+        _write_meta(meta_path, {'url': url, 'status': response.status_code})
+        with _lock:
+            _checked.add(url)
+    return response.status_code == 200
@@ -1,19 +1,24 @@
 # This gets all the census data, can be filted by level and state.
-# Should play with all the chunk sizes, to see how that affects speed.  I'm leaving a message in censusreporter_api.py for now that will alert you if the size gets too big and it does a json_merge.  json_merge is slow, we want to avoid those.
+# Should play with all the chunk sizes, to see how that affects speed.  censusreporter_api.py prints a message when a request has to be broken up into several pages, each page is another round trip.
 import pandas as pd
 from censusreporter_api import *
+from download_cache import cached_download, configure_downloads, url_exists
 import os
-from io import BytesIO
 import io
 from zipfile import ZipFile
-import requests
 import datetime
 import re
 import argparse
+import shutil
+from concurrent.futures import ThreadPoolExecutor
 from bs4 import BeautifulSoup
 
 def getTractInfo(url, regex=''):
-    page = requests.get(url).text
+    path = cached_download(url)
+    if path is None:
+        return []
+    with open(path, encoding='utf-8', errors='ignore') as f:
+        page = f.read()
     soup = BeautifulSoup(page, 'html.parser')
     return [url + '/' + node.get('href') for node in soup.find_all('a', href=re.compile(regex))]
 
@@ -22,6 +27,15 @@ def getTractInfo(url, regex=''):
 BASE_URL = "http://www2.census.gov/geo/docs/maps-data/data/gazetteer/"
 YEAR = datetime.datetime.now().year
 GAZ_YEAR_URL = '{}{}_Gazetteer/'.format(BASE_URL, YEAR)
+# Gazetteer rows read at a time, and censusreporter requests in flight
+READ_CHUNK_SIZE = 1000
+FETCH_WORKERS = 8
+# Parquet output is split into directories by these, see write_parquet()
+PARTITION_COLS = ['ENTITYTYPE', 'USPS']
+ESTIMATE_RE = re.compile(r'^B\d{5}[A-Z]?\d{3}$')
+# Oldest versions writing the dataset: to_parquet(partition_cols=) and the
+# nullable Int64 estimates, as load/jurisdictions.py reads them
+PARQUET_VERSIONS = (('pandas', (0, 24)), ('pyarrow', (0, 15)))
 
 # For easier Windows compatibility
 OUTPUT_DIR = os.path.join(
@@ -95,9 +109,46 @@ STATE_ABBREVS = {
 
 DATA_TABLES = ['B01001','B03002','B06008','B23001','B19001','B25009','B25077']
 
+def parquet_unsupported():
+    """Why --format parquet can't be written here, None if it can"""
+    for name, minimum in PARQUET_VERSIONS:
+        try:
+            module = __import__(name)
+        except ImportError:
+            return "--format parquet needs {}".format(name)
+        version = tuple(int(n) for n in re.findall(r'\d+', module.__version__)[:2])
+        if version < minimum:
+            return "--format parquet needs {} {} or later, {} is installed".format(
+                name, '.'.join(map(str, minimum)), module.__version__)
+    return None
+
+
+def write_parquet(df, path):
+    """census.csv as a Parquet dataset: the ACS estimates as nullable
+    integers, everything else as text, and a directory per ENTITYTYPE and USPS
+    so a loader reads only the state it needs. Replaces the dataset at path.
+    """
+    df = df.reset_index().rename(columns={'index': 'FIPS'})
+    for col in df.columns:
+        if ESTIMATE_RE.match(str(col)):
+            df[col] = pd.to_numeric(df[col], errors='coerce').round().astype('Int64')
+        elif df[col].dtype == object or col in PARTITION_COLS:
+            # Gazetteer codes come back as ints or strs depending on the file
+            df[col] = df[col].where(df[col].isnull(), df[col].astype(str))
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    df.to_parquet(path, engine='pyarrow', partition_cols=PARTITION_COLS, index=False)
+
+
 parser = argparse.ArgumentParser()
 parser.add_argument("-s", "--states", help="State Abbreviation List, space seperated ie NY AK", nargs="*")
 parser.add_argument("-t", "--type", help="ALL|County|Upper|Lower|Congress|City|State|Tract space separated", nargs="*")
+parser.add_argument("--cache-dir", default=CACHE_DIR, help="Where censusreporter API responses are cached (default: %(default)s)")
+parser.add_argument("--cache-days", type=float, default=CACHE_TTL / 86400.0, help="Days a cached API response is used before it is fetched again, 0 for ever (default: %(default)s)")
+parser.add_argument("--no-cache", action="store_true", help="Always call the censusreporter API, don't cache responses")
+parser.add_argument("--fetch-workers", type=int, default=FETCH_WORKERS, help="censusreporter API requests sent at the same time (default: %(default)s)")
+parser.add_argument("--format", choices=["csv", "parquet"], default="csv", help="csv writes census.csv, parquet a census/ dataset with typed columns split by entity type and state, for load/jurisdictions.py (needs pyarrow) (default: %(default)s)")
+parser.add_argument("--offline", action="store_true", help="Only replay cached API responses and Gazetteer files downloaded before, fail on any that isn't cached")
 
 
 def get_combinedData(thePD=None, tables=None):
@@ -125,14 +176,18 @@ def get_combinedData(thePD=None, tables=None):
     return None
 
 
-def get_zip(file_url):
-    url = requests.get(file_url)
-    zipfile = ZipFile(BytesIO(url.content), 'r')
+def get_zip(zip_path, encoding='cp1252'):
+    """
+    Returns the only member of a downloaded zip as a text stream, read from
+    disk as pandas consumes it, so neither the zip nor the file inside it is
+    held in memory.
+    """
+    zipfile = ZipFile(zip_path, 'r')
     zip_names = zipfile.namelist()
     if len(zip_names) == 1:
         file_name = zip_names.pop()
-        extracted_file = zipfile.open(file_name).read()
-        return extracted_file
+        return io.TextIOWrapper(zipfile.open(file_name), encoding=encoding)
+    zipfile.close()
 
 
 # Util for cleaning up column names of extra whitespace
@@ -172,41 +227,54 @@ def get_census_data(geo_type, geo_url, state_list, fips_func,
                     census_tables=DATA_TABLES,
                     find_zz=False,
                     delim='\t',
-                    chunk_size=250):
+                    chunk_size=None,
+                    fetch_workers=None):
+    """
+    chunk_size -- geographies per API request, default: as many as fit in
+        the URL (max_geoids in censusreporter_api)
+    fetch_workers -- requests sent at the same time, default FETCH_WORKERS.
+        Results are joined in file order whichever request finishes first.
+    """
     print("Working " + geo_type)
 
-    if requests.get(geo_url).status_code != 200:
+    # Downloaded once, later runs only check that the server's copy is the same
+    geo_path = cached_download(geo_url)
+    if geo_path is None:
         raise ValueError("{} file not found at URL: {}".format(geo_type, geo_url))
 
-    # Changing source if city URL
+    # City and tract files aren't zipped
     if geo_type != 'City' and geo_type != "Tract":
-        csv_file = get_zip(geo_url)
-        file_source = io.StringIO(csv_file.decode('cp1252'))
+        file_source = get_zip(geo_path)
     else:
-        file_source = geo_url
+        file_source = geo_path
 
     reader = pd.read_csv(file_source,
                          delimiter=delim,
                          iterator=True,
-                         chunksize=chunk_size)
+                         chunksize=READ_CHUNK_SIZE)
     context_df_list = []
-    census_df_list = []
-
-    for chunk in reader:
-        if geo_type == "Tract":
-            chunk.rename(columns={'CODE': 'GEOID'}, inplace=True)
-            chunk['USPS'] = state_list[0] #Tracts are passed in one state at a time, but don't have this field
-        else:
-            chunk = chunk.loc[chunk['USPS'].isin(state_list)]
-        if find_zz:
-            chunk['GEOID'] = chunk['GEOID'].astype(str)
-            chunk = chunk.loc[chunk['GEOID'].str.find('ZZ') == -1]
-        if len(chunk) > 0:
-            chunk['FIPS'] = chunk['GEOID'].apply(fips_func)
-            context_df_list.append(chunk)
-            chunk = chunk.set_index('FIPS')
-            data = get_combinedData(chunk, tables=census_tables)
-            census_df_list.append(data)
+    futures = []
+
+    with ThreadPoolExecutor(max_workers=fetch_workers or FETCH_WORKERS) as pool:
+        for chunk in reader:
+            if geo_type == "Tract":
+                chunk.rename(columns={'CODE': 'GEOID'}, inplace=True)
+                chunk['USPS'] = state_list[0] #Tracts are passed in one state at a time, but don't have this field
+            else:
+                chunk = chunk.loc[chunk['USPS'].isin(state_list)]
+            if find_zz:
+                chunk['GEOID'] = chunk['GEOID'].astype(str)
+                chunk = chunk.loc[chunk['GEOID'].str.find('ZZ') == -1]
+            if len(chunk) > 0:
+                chunk['FIPS'] = chunk['GEOID'].apply(fips_func)
+                context_df_list.append(chunk)
+                chunk = chunk.set_index('FIPS')
+                step = chunk_size or max_geoids(census_tables, chunk.index.tolist())
+                for start in range(0, len(chunk), step):
+                    futures.append(pool.submit(get_combinedData,
+                                               chunk.iloc[start:start + step],
+                                               tables=census_tables))
+        census_df_list = [future.result() for future in futures]
 
     context_df = pd.concat(context_df_list)
     census_df = pd.concat(census_df_list)
@@ -260,6 +328,17 @@ def get_state(state_list, state_codes, census_tables=DATA_TABLES):
 
 if __name__ == '__main__':
     args = parser.parse_args()
+    if args.no_cache and args.offline:
+        parser.error("--offline replays the cache, it can't be used with --no-cache")
+    unsupported = parquet_unsupported() if args.format == "parquet" else None
+    if unsupported:
+        parser.error(unsupported)
+    configure_cache(cache_dir=None if args.no_cache else args.cache_dir,
+                    ttl=args.cache_days * 86400 or None,
+                    offline=args.offline)
+    FETCH_WORKERS = args.fetch_workers
+    configure_downloads(download_dir=os.path.join(args.cache_dir, 'downloads'),
+                        offline=args.offline)
 
     print("Writing to "+OUTPUT_DIR)
     if args.states is None:
@@ -276,7 +355,7 @@ if __name__ == '__main__':
             raise ValueError("Unknown state: " + state)
 
     # Verify Gazetteer URL
-    while requests.get(GAZ_YEAR_URL).status_code != 200:
+    while not url_exists(GAZ_YEAR_URL):
         YEAR -= 1
         GAZ_YEAR_URL = '{}{}_Gazetteer/'.format(BASE_URL, YEAR)
         print(GAZ_YEAR_URL)
@@ -309,7 +388,7 @@ if __name__ == '__main__':
         congress = int((YEAR - 1789) / 2) + 2
 
         conYearURL = FILE_BASE_URL + str(congress) + "CDs_national.zip"
-        while requests.get(conYearURL).status_code != 200:
+        while not url_exists(conYearURL):
             if congress < 115: #Using 115 as when I wrote this code that was the current number, so I know that exists
                 raise ValueError("Crap, can't find congress file at: " + conYearURL)
 
@@ -412,8 +491,7 @@ if __name__ == '__main__':
                          [state],
                          lambda x: "14000US" + str(x).zfill(11),
                          state_idx=(-9, 2),
-                         delim=';',
-                         chunk_size=200
+                         delim=';'
                       )
                       temp_tract_df_list.append(temp_tract_df)
                 div_tract_df_list.append(pd.concat(temp_tract_df_list))
@@ -422,4 +500,7 @@ if __name__ == '__main__':
         tract_df = pd.concat(tracts_df_list)
         output_df = pd.concat([output_df, tract_df])
 
-    output_df.to_csv(os.path.join(OUTPUT_DIR, "census.csv"), index_label="FIPS", sep=',')
+    if args.format == "parquet":
+        write_parquet(output_df, os.path.join(OUTPUT_DIR, "census"))
+    else:
+        output_df.to_csv(os.path.join(OUTPUT_DIR, "census.csv"), index_label="FIPS", sep=',')
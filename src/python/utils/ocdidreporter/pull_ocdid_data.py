@@ -48,7 +48,7 @@ try:
     from csv import DictReader
 
     def get_iostream(response):
-        return io.StringIO(response.read().decode('utf-8'))
+        return io.TextIOWrapper(response, encoding='utf-8', newline='')
 
     def utf8(text):
         return text
@@ -77,82 +77,92 @@ else:
     DATABASE_NAME = 'ocd-id.sqlite.db'
 
 
-print('Downloading from\n', OCDID_US_DATA_URI)
-response = request.urlopen(OCDID_US_DATA_URI)
-iostream = get_iostream(response)
-rdr = DictReader(iostream)
-fieldnames = rdr.fieldnames
-all_rows = [row for row in rdr]
-ids = [row['id'] for row in all_rows]
-
-
-# First, put the whole dataset into sqlite3 as it is.
-# Create the table
-print('Writing to', DATABASE_NAME)
-conn = sqlite3.connect(DATABASE_NAME)
-c = conn.cursor()
-c.execute("""
-    CREATE TABLE IF NOT EXISTS
-    country_us (ocdid TEXT PRIMARY KEY
-        ,{},
-        CONSTRAINT unique_ocdid UNIQUE (ocdid) ON CONFLICT IGNORE
-    );
-    """.format('\n        ,'.join(
-        '{} TEXT'.format(k) for k in fieldnames[1:]))
-)
-
-# Populate the table
-insertion = """ 
-    INSERT INTO country_us
-    (ocdid\n,{})
-    VALUES ({})
-""".format('\n,'.join(fieldnames[1:]), ', '.join(['?'] * len(fieldnames)))
-c.executemany(
-    insertion,
-    [tuple(utf8(row[f]) for f in fieldnames) for row in all_rows])
-
-
-# Now, get the hierarchy of region types by looking at the first column.
-# OCD-ID values are of the form 
-#   ocd-division/country:<country_code>(/<type>:<type_id>)*
-splits = [id.split('/') for id in ids]
-types = [(s[2], tuple(sub.split(':')[0] for sub in s[2:])) for s in splits if len(s) > 2]
-type_hierarchy = {}
-for locale, entry in types:
-    if locale not in type_hierarchy:
-        type_hierarchy[locale] = {}
-    sub_type = type_hierarchy[locale]
-    for type in entry:
-        if type not in sub_type:
-            sub_type[type] = {'COUNT': 0}
-        sub_type[type]['COUNT'] += 1
-        sub_type = sub_type[type]
-
-
-# -----------------------
-# Get all of the possible columns in the dataset
-tmp = set([sub.split(':')[0] for s in splits if len(s) > 2 for sub in s[2:]])
-all_possible_columns = sorted([s.lower() for s in tmp])
-
-c.execute("""
-    CREATE TABLE IF NOT EXISTS
-    lookup (
-        ocdid TEXT PRIMARY KEY
-        ,{},
-        CONSTRAINT unique_lookup_ocid UNIQUE (ocdid) ON CONFLICT IGNORE
-    );
-    """.format('\n        ,'.join(
-            '{} TEXT'.format(k) for k in all_possible_columns))
-)
-
-insertion_template = """ 
-    INSERT INTO lookup
-    (ocdid, {})
-    VALUES ('{}', {})
-"""
-
-for id, split in zip(ids, splits):
-    if len(split) > 2:
+def load_country_us(conn, rdr):
+    """
+    Puts the whole dataset into sqlite3 as it is, one row at a time
+
+    Inputs:
+        conn: sqlite3 connection
+        rdr: DictReader over country-us.csv
+    """
+    fieldnames = rdr.fieldnames
+    c = conn.cursor()
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS
+        country_us (ocdid TEXT PRIMARY KEY
+            ,{},
+            CONSTRAINT unique_ocdid UNIQUE (ocdid) ON CONFLICT IGNORE
+        );
+        """.format('\n            ,'.join(
+            '{} TEXT'.format(k) for k in fieldnames[1:]))
+    )
+
+    # Populate the table
+    insertion = """
+        INSERT INTO country_us
+        (ocdid\n,{})
+        VALUES ({})
+    """.format('\n,'.join(fieldnames[1:]), ', '.join(['?'] * len(fieldnames)))
+    c.executemany(
+        insertion,
+        (tuple(utf8(row[f]) for f in fieldnames) for row in rdr))
+
+
+def iter_splits(conn):
+    """
+    Yields (ocdid, split ocdid) for every division below the country, read
+    back from country_us so the ids don't have to be held in memory
+    """
+    for (ocdid,) in conn.execute('SELECT ocdid FROM country_us'):
+        split = ocdid.split('/')
+        if len(split) > 2:
+            yield ocdid, split
+
+
+def load_lookup(conn):
+    """
+    Breaks the OCD-ID types into columns of the `lookup` table, read from
+    country_us
+    """
+    # Get the hierarchy of region types by looking at the first column.
+    # OCD-ID values are of the form
+    #   ocd-division/country:<country_code>(/<type>:<type_id>)*
+    type_hierarchy = {}
+    tmp = set()
+    for _, s in iter_splits(conn):
+        entry = tuple(sub.split(':')[0] for sub in s[2:])
+        tmp.update(entry)
+        sub_type = type_hierarchy.setdefault(s[2], {})
+        for type in entry:
+            if type not in sub_type:
+                sub_type[type] = {'COUNT': 0}
+            sub_type[type]['COUNT'] += 1
+            sub_type = sub_type[type]
+
+    # -----------------------
+    # Get all of the possible columns in the dataset
+    all_possible_columns = sorted([s.lower() for s in tmp])
+
+    c = conn.cursor()
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS
+        lookup (
+            ocdid TEXT PRIMARY KEY
+            ,{},
+            CONSTRAINT unique_lookup_ocid UNIQUE (ocdid) ON CONFLICT IGNORE
+        );
+        """.format('\n            ,'.join(
+                '{} TEXT'.format(k) for k in all_possible_columns))
+    )
+
+    insertion_template = """
+        INSERT INTO lookup
+        (ocdid, {})
+        VALUES ('{}', {})
+    """
+
+    # The ids are read from a second cursor while this one inserts
+    for id, split in iter_splits(conn.cursor()):
         all_keys, all_vals = zip(*[utf8(s).split(':') for s in split[2:]])
         insertion = insertion_template.format(
             ', '.join(all_keys),
@@ -160,6 +170,30 @@ for id, split in zip(ids, splits):
             ','.join(['?'] * len(all_vals))
         )
         c.execute(insertion, all_vals)
+    return type_hierarchy
+
+
+def load(iostream, database=DATABASE_NAME):
+    """
+    Loads country-us.csv from iostream into the sqlite3 database, without
+    holding more than a row of it in memory
+    """
+    print('Writing to', database)
+    conn = sqlite3.connect(database)
+    try:
+        load_country_us(conn, DictReader(iostream))
+        conn.commit()
+        load_lookup(conn)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def main():
+    print('Downloading from\n', OCDID_US_DATA_URI)
+    response = request.urlopen(OCDID_US_DATA_URI)
+    load(get_iostream(response))
+
 
-conn.commit()
-conn.close()
+if __name__ == '__main__':
+    main()
@@ -1,27 +1,406 @@
+"""
+CSVFileSampler
+
+usage:
+    python3 CSVFileSampler.py INPUT -n 1000 [-s COUNTYCODE] [-o sample.csv]
+    python3 CSVFileSampler.py INPUT -n 1000 --seek [--length-biased]
+    python3 CSVFileSampler.py --help
+
+Samples exactly N lines from a delimited file in a single pass, keeping the
+header and the order of the lines in the file. Inputs can be plain text,
+gzip, bz2, xz or zip (the first member, or --member).
+
+* Reservoir sampling holds N lines at a time, whatever the size of the input.
+* --stratify COLUMN keeps a reservoir per value of COLUMN, then splits N
+  between them in proportion to their counts (or evenly with --equal), so
+  small counties still show up in the sample.
+* --seek reads only the picked lines instead of the whole file, which takes
+  seconds on a 10GB file. It needs an uncompressed file with a current line
+  index (see national_voter_file/transformers/line_index.py), and picks the
+  lines uniformly from it. Line counts come from the index too.
+* --seek --length-biased works without an index by jumping to random byte
+  offsets and taking the next line. That is not a uniform sample: a line's
+  chance is proportional to the length of the line before it, and the first
+  data line is hardly ever picked. Fine for eyeballing a file, not for
+  anything that needs representative rows.
+
+A line is a record, so fields with embedded line breaks aren't supported.
+"""
+import argparse
+import bz2
+import csv
+import gzip
+import io
+import itertools
+import lzma
+import math
+import os
 import random
+import sys
+import zipfile
+
+try:
+    from national_voter_file.transformers.line_index import LineIndex
+except ImportError:
+    LineIndex = None
+
+# Random offsets tried per wanted line before --seek gives up
+SEEK_TRIES = 20
+SNIFF_DELIMITERS = ',\t|;'
+
+
+def open_input(fname, encoding='utf-8', member=None):
+    """
+    Opens fname as text, decompressing it by extension
+
+    Inputs:
+        fname: path to a plain, .gz, .bz2, .xz or .zip file
+        member: file inside a zip, the first one when not given
+    """
+    lower = fname.lower()
+    if lower.endswith('.gz'):
+        return gzip.open(fname, 'rt', encoding=encoding, errors='replace',
+                         newline='')
+    if lower.endswith('.bz2'):
+        return bz2.open(fname, 'rt', encoding=encoding, errors='replace',
+                        newline='')
+    if lower.endswith('.xz'):
+        return lzma.open(fname, 'rt', encoding=encoding, errors='replace',
+                         newline='')
+    if lower.endswith('.zip'):
+        archive = zipfile.ZipFile(fname)
+        if member is None:
+            member = [n for n in archive.namelist() if not n.endswith('/')][0]
+        return io.TextIOWrapper(archive.open(member), encoding=encoding,
+                                errors='replace', newline='')
+    return open(fname, encoding=encoding, errors='replace', newline='')
+
+
+def sniff_delimiter(header):
+    try:
+        return csv.Sniffer().sniff(header, delimiters=SNIFF_DELIMITERS).delimiter
+    except csv.Error:
+        return ','
+
+
+def reservoir_sample(items, n, rng=random):
+    """
+    Picks n items uniformly in one pass, skipping ahead between replacements
+    (Li's Algorithm L) so most items are passed over at C speed
+
+    Outputs:
+        List of (position, item), in input order, all of them if there are
+        fewer than n
+    """
+    numbered = enumerate(items)
+    reservoir = list(itertools.islice(numbered, n))
+    if n <= 0 or len(reservoir) < n:
+        return reservoir
+    # 1 - random() is in (0, 1], safe to take the log of
+    w = math.exp(math.log(1.0 - rng.random()) / n)
+    while True:
+        skip = int(math.log(1.0 - rng.random()) / math.log(1.0 - w))
+        picked = next(itertools.islice(numbered, skip, None), None)
+        if picked is None:
+            break
+        reservoir[rng.randrange(n)] = picked
+        w *= math.exp(math.log(1.0 - rng.random()) / n)
+    return sorted(reservoir)
+
+
+def allocate(counts, n, equal=False):
+    """
+    Splits n between strata
+
+    Inputs:
+        counts: dict of stratum -> number of lines
+        n: total lines wanted
+        equal: same share for every stratum instead of proportional
+    Outputs:
+        dict of stratum -> lines to take, summing to n (or every line when
+        there are fewer than n)
+    """
+    total = sum(counts.values())
+    if n >= total:
+        return dict(counts)
+    if not equal:
+        exact = dict((k, n * c / float(total)) for k, c in counts.items())
+        alloc = dict((k, int(v)) for k, v in exact.items())
+        # Largest remainder gets the lines lost to rounding down
+        left = n - sum(alloc.values())
+        for k in sorted(exact, key=lambda k: exact[k] - alloc[k],
+                        reverse=True)[:left]:
+            alloc[k] += 1
+        return alloc
+
+    alloc = dict((k, 0) for k in counts)
+    left = n
+    open_strata = [k for k in counts if counts[k]]
+    while left and open_strata:
+        share = max(left // len(open_strata), 1)
+        # Smallest strata first, whatever they can't take goes to the others
+        for k in sorted(open_strata, key=lambda k: counts[k] - alloc[k]):
+            take = min(share, counts[k] - alloc[k], left)
+            alloc[k] += take
+            left -= take
+        open_strata = [k for k in open_strata if alloc[k] < counts[k]]
+    return alloc
+
+
+def stratified_sample(lines, n, key, equal=False, rng=random):
+    """
+    Samples n lines in one pass, split between the values of key(line).
+    Holds up to n lines per stratum, fine for counties or precincts but not
+    for a column with a value per line.
+
+    Inputs:
+        lines: iterable of lines
+        key: function of a line returning its stratum
+        equal: same number of lines per stratum, see allocate()
+    Outputs:
+        (list of (position, line) in input order, dict of stratum ->
+        (lines seen, lines sampled))
+    """
+    counts = {}
+    reservoirs = {}
+    for i, line in enumerate(lines):
+        k = key(line)
+        seen = counts.get(k, 0) + 1
+        counts[k] = seen
+        reservoir = reservoirs.setdefault(k, [])
+        # Each stratum keeps up to n, allocate() never gives one more
+        if len(reservoir) < n:
+            reservoir.append((i, line))
+        else:
+            j = rng.randrange(seen)
+            if j < n:
+                reservoir[j] = (i, line)
+
+    alloc = allocate(counts, n, equal)
+    sample = []
+    for k, reservoir in reservoirs.items():
+        # A uniform subset of a uniform sample is still uniform
+        sample.extend(rng.sample(reservoir, alloc[k]))
+    stats = dict((k, (counts[k], alloc[k])) for k in counts)
+    return sorted(sample), stats
+
+
+def column_key(header, column, sep):
+    """Function returning `column` (a name or 0-based index) of a line"""
+    names = next(csv.reader([header], delimiter=sep))
+    if column in names:
+        index = names.index(column)
+    elif column.isdigit():
+        index = int(column)
+    else:
+        raise ValueError('No column {} in {}'.format(column, names))
+
+    def key(line):
+        fields = next(csv.reader([line], delimiter=sep), [])
+        return fields[index] if index < len(fields) else ''
+    return key
+
+
+def load_index(fname):
+    """The current line index of fname, None without one"""
+    if LineIndex is None:
+        return None
+    return LineIndex.load(fname)
+
+
+def index_sample(fname, index, n, header=True, encoding='utf-8', rng=random):
+    """
+    Picks n distinct records uniformly using the line index of fname
+
+    Outputs:
+        (header line or None, list of records in file order)
+    """
+    first = 1 if header else 0
+    population = range(first, index.records)
+    picked = rng.sample(population, min(n, len(population)))
+    with open(fname, 'rb') as f:
+        head = None
+        if header:
+            index.seek(f, 0)
+            head = index.read_record(f).decode(encoding, 'replace')
+        return head, [record.decode(encoding, 'replace')
+                      for _, record in index.read_records(f, picked)]
+
+
+def seek_sample(fname, n, header=True, encoding='utf-8', rng=random,
+                length_biased=False):
+    """
+    Picks n distinct lines uniformly with the line index of fname.
+
+    Without an index and with length_biased, seeks to random byte offsets
+    and takes the first line starting at or after each, reading only around
+    them. Each line is then picked with a probability proportional to the
+    length of the line before it (the first data line only when the offset
+    is exactly its start), so the sample is not uniform. Files small enough
+    to hold fewer lines than asked for are read whole, uniformly.
+
+    Outputs:
+        (header line or None, list of lines in file order)
+    """
+    index = load_index(fname)
+    if index is not None:
+        return index_sample(fname, index, n, header, encoding, rng)
+    if not length_biased:
+        raise ValueError(
+            '--seek needs a line index for a uniform sample, build one with '
+            '`python -m national_voter_file.transformers.line_index {}` or '
+            'pass --length-biased'.format(fname))
+
+    with open(fname, 'rb') as f:
+        first = f.readline() if header else b''
+        start = len(first)
+        size = os.fstat(f.fileno()).st_size
+        picked = {}
+        tries = 0
+        while len(picked) < n and tries < n * SEEK_TRIES and size > start:
+            offsets = sorted(rng.randrange(start, size)
+                             for _ in range(n - len(picked)))
+            for offset in offsets:
+                tries += 1
+                # The line starting after offset - 1, i.e. the first one
+                # starting at or after offset
+                if offset > start:
+                    f.seek(offset - 1)
+                    f.readline()
+                else:
+                    f.seek(start)
+                line_start = f.tell()
+                line = f.readline()
+                if line and len(picked) < n:
+                    picked[line_start] = line
+
+    if len(picked) < n:
+        # Fewer lines than asked for, or too unlucky: read it all
+        with open_input(fname, encoding) as f:
+            head = f.readline() if header else None
+            return head, [line for _, line in reservoir_sample(f, n, rng)]
+    return (first.decode(encoding, 'replace') if header else None,
+            [picked[offset].decode(encoding, 'replace')
+             for offset in sorted(picked)])
+
+
+def sample_file(fname, n, stratify=None, equal=False, seek=False, sep=None,
+                header=True, encoding='utf-8', member=None, rng=random,
+                length_biased=False):
+    """
+    Inputs:
+        fname: delimited file, optionally compressed or zipped
+        n: number of lines wanted
+        stratify: column name (or 0-based index) to stratify by
+        equal: with stratify, the same number of lines per value
+        seek: read only the sampled lines, see seek_sample()
+        length_biased: with seek and no line index, accept the length
+            biased byte offset sample
+        sep: delimiter for stratify, sniffed from the header if not given
+        header: whether the first line is a header, kept in the output
+    Outputs:
+        (header line or None, list of sampled lines in file order, stratum
+        stats or None)
+    """
+    if seek:
+        if stratify:
+            raise ValueError('--seek and --stratify can\'t be combined')
+        if fname.lower().endswith(('.gz', '.bz2', '.xz', '.zip')):
+            raise ValueError('--seek needs an uncompressed file')
+        head, lines = seek_sample(fname, n, header, encoding, rng,
+                                  length_biased)
+        return head, lines, None
+
+    with open_input(fname, encoding, member) as f:
+        head = f.readline() if header else None
+        if not stratify:
+            return head, [line for _, line in reservoir_sample(f, n, rng)], None
+        if head is None and not stratify.isdigit():
+            raise ValueError('Stratify by column index without a header')
+        sep = sep or (sniff_delimiter(head) if head else ',')
+        key = column_key(head or '', stratify, sep)
+        sample, stats = stratified_sample(f, n, key, equal, rng)
+        return head, [line for _, line in sample], stats
+
 
 def getHeaderLine(fname):
-    with open(fname) as f:
-        headers = f.readline()
-        return headers
-    
-def filesample(fname, desired_num_results, total_lines):
-    result = []
-    with open(fname) as f:
-        #Save the header in any event
-        result.append(f.readline())
-
-        chances_selected = desired_num_results / total_lines
-        for line in f:
-            if random.random() < chances_selected:
-                result.append(line)
-        
-    return result
+    with open_input(fname) as f:
+        return f.readline()
+
+
+def filesample(fname, desired_num_results, total_lines=None):
+    """
+    The header plus exactly desired_num_results lines. total_lines isn't
+    needed anymore and is ignored.
+    """
+    head, lines, _ = sample_file(fname, desired_num_results)
+    return [head] + lines
+
 
 def fileLen(fname):
-    with open(fname) as f:
-        for i, l in enumerate(f):
-            pass
-    return i + 1
+    index = load_index(fname)
+    if index is not None:
+        return index.records
+    with open_input(fname) as f:
+        return sum(1 for _ in f)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Sample exactly N lines from a (compressed) delimited file'
+    )
+    parser.add_argument('input', help='plain, .gz, .bz2, .xz or .zip file')
+    parser.add_argument('-n', '--lines', type=int, required=True,
+                        help='number of lines to sample')
+    parser.add_argument('-o', '--output', default=None,
+                        help='output file (default: stdout)')
+    parser.add_argument('-s', '--stratify', default=None, metavar='COLUMN',
+                        help='column name or 0-based index to stratify by, '
+                             'e.g. COUNTYCODE')
+    parser.add_argument('--equal', action='store_true',
+                        help='with --stratify, take as many lines from every '
+                             'value instead of proportional to its size')
+    parser.add_argument('--seek', action='store_true',
+                        help='read only the sampled lines of an uncompressed '
+                             'file with a line index')
+    parser.add_argument('--length-biased', action='store_true',
+                        help='with --seek and no line index, take the lines '
+                             'after random byte offsets. Not uniform, lines '
+                             'after long lines are picked more often')
+    parser.add_argument('--sep', default=None,
+                        help='delimiter for --stratify (default: sniffed)')
+    parser.add_argument('--no-header', dest='header', action='store_false',
+                        help='the first line is data')
+    parser.add_argument('--member', default=None,
+                        help='file inside a zip (default: the first one)')
+    parser.add_argument('--encoding', default='utf-8')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    head, lines, stats = sample_file(args.input, args.lines,
+                                     stratify=args.stratify, equal=args.equal,
+                                     seek=args.seek, sep=args.sep,
+                                     header=args.header,
+                                     encoding=args.encoding,
+                                     member=args.member, rng=rng,
+                                     length_biased=args.length_biased)
+    out = (open(args.output, 'w', encoding=args.encoding, newline='')
+           if args.output else sys.stdout)
+    try:
+        if head is not None:
+            out.write(head)
+        for line in lines:
+            out.write(line if line.endswith('\n') else line + '\n')
+    finally:
+        if args.output:
+            out.close()
+    if stats:
+        for k in sorted(stats):
+            print('{}: {} of {}'.format(k, stats[k][1], stats[k][0]),
+                  file=sys.stderr)
+    print('{} lines sampled'.format(len(lines)), file=sys.stderr)
 
 
+if __name__ == '__main__':
+    main()